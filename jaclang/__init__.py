@@ -1,11 +1,127 @@
-from jaclang.generator import generate
+import time
+from typing import Optional
+
+from jaclang.cache import FunctionCache
+from jaclang.generator import generate, Instruction, Instructions, LabelTable
 from jaclang.lexer import tokenize
+from jaclang.linker import ObjectFile, generateObject
+from jaclang.optimizer import optimize, FunctionOptimizer
+from jaclang.optimizer.size_report import getSymbolSizes, printSizeReport
 from jaclang.parser import parse
 from jaclang.preprocessor import preprocess
+from jaclang.source_map import SourceMap
+
+DEFAULT_INLINE_BUDGET = 128
+OPTIMIZATION_LEVELS = {"-O0": 0, "-O1": 1, "-O2": 2, "-Os": 2}
+DEFAULT_OPTIMIZATION_LEVEL = 2
+
+
+# reads an option given as name=value, like cache=build/cache
+def getOption(options: list[str], name: str, default: Optional[str]) -> Optional[str]:
+    for option in options:
+        if option.startswith(name + "="):
+            return option[len(name) + 1:]
+    return default
+
+
+def getIntOption(options: list[str], name: str, default: int) -> int:
+    value = getOption(options, name, None)
+    return int(value) if value is not None else default
 
 
-def compileJaclang(file_contents: str, options: list[str]) -> list[int]:
+def getOptimizationLevel(options: list[str]) -> int:
+    levels = [OPTIMIZATION_LEVELS[option] for option in options if option in OPTIMIZATION_LEVELS]
+    return levels[-1] if levels else DEFAULT_OPTIMIZATION_LEVEL
+
+
+def isSizeOptimized(options: list[str]) -> bool:
+    levels = [option for option in options if option in OPTIMIZATION_LEVELS]
+    return bool(levels) and levels[-1] == "-Os"
+
+
+def compileInstructions(file_contents: str, options: list[str], stage_times: dict[str, float], labels: LabelTable,
+                        start_code: bool) -> list[Instruction]:
+    # -O1 folds constants and runs the peephole patterns, -O2 also inlines and runs the control flow graph passes,
+    # -Os runs the passes of -O2 and also shares epilogues and outlines repeated code
+    optimization_level = getOptimizationLevel(options)
+    size_optimized = isSizeOptimized(options)
+    inline_budget = getIntOption(options, "inline_budget", DEFAULT_INLINE_BUDGET if optimization_level >= 2 else 0)
+
+    begin = time.perf_counter()
     preprocessed_contents = preprocess(file_contents, "debug_preprocess" in options)
+    stage_times["preprocess"] = time.perf_counter() - begin
+
+    begin = time.perf_counter()
     tokens = tokenize(preprocessed_contents, "debug_tokens" in options)
-    instructions = parse(tokens, "debug_tree" in options)
-    return generate(instructions, "debug_assembly" in options)
+    stage_times["tokenize"] = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    cache_directory = getOption(options, "cache", None)
+    function_cache = None
+    if cache_directory is not None:
+        function_cache = FunctionCache(cache_directory, preprocessed_contents, inline_budget, optimization_level,
+                                       size_optimized)
+    # functions are generated in parallel by this many processes, only when asked for, since starting the workers and
+    # sending them the functions costs more than it saves on machines with few cores
+    worker_count = getIntOption(options, "jobs", 1)
+    # each function is optimized as soon as it is generated, so the cache holds optimized code
+    function_optimizer = FunctionOptimizer(optimization_level, size_optimized, labels)
+    instructions = parse(tokens, labels, "debug_tree" in options, inline_budget, optimization_level >= 1,
+                         function_cache, start_code, worker_count, function_optimizer)
+    if function_cache is not None and "debug_cache" in options:
+        function_cache.printStatistics()
+    stage_times["parse"] = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    # without the start code, everything the object defines can be used by other objects
+    entry_labels = []
+    if not start_code:
+        entry_labels = [instruction.label for instruction in instructions
+                        if type(instruction) is Instructions.Label and labels.isNamed(instruction.label)]
+    instructions = optimize(instructions, function_optimizer, "debug_optimizer" in options, entry_labels)
+    stage_times["optimize"] = time.perf_counter() - begin
+    return instructions
+
+
+def compileJaclang(file_contents: str, options: list[str], stage_times: Optional[dict[str, float]] = None,
+                   source_map: Optional[SourceMap] = None) -> bytearray:
+    if stage_times is None:
+        stage_times = {}
+    labels = LabelTable()
+    instructions = compileInstructions(file_contents, options, stage_times, labels, True)
+    if "debug_size" in options and isSizeOptimized(options):
+        printSizeComparison(file_contents, options, instructions, labels)
+
+    begin = time.perf_counter()
+    binary_code = generate(instructions, labels, "debug_assembly" in options, source_map)
+    stage_times["generate"] = time.perf_counter() - begin
+
+    if source_map is not None and "debug_source_map" in options:
+        print("Source map:")
+        print("---------------------------------")
+        source_map.printRanges()
+        print("---------------------------------")
+    return binary_code
+
+
+# compiles the file again at -O2 and prints how much smaller every function got
+def printSizeComparison(file_contents: str, options: list[str], instructions: list[Instruction], labels: LabelTable):
+    baseline_options = [option for option in options if option not in OPTIMIZATION_LEVELS and
+                        not option.startswith("debug_")] + ["-O2"]
+    baseline_labels = LabelTable()
+    baseline_instructions = compileInstructions(file_contents, baseline_options, {}, baseline_labels, True)
+    printSizeReport("-O2", getSymbolSizes(baseline_instructions, baseline_labels), getSymbolSizes(instructions, labels))
+
+
+# compiles a file that can be linked with others, it has no start code and can use symbols declared extern
+def compileJaclangObject(file_contents: str, options: list[str], name: str,
+                         stage_times: Optional[dict[str, float]] = None) -> ObjectFile:
+    if stage_times is None:
+        stage_times = {}
+    labels = LabelTable()
+    instructions = compileInstructions(file_contents, options, stage_times, labels, False)
+
+    begin = time.perf_counter()
+    object_file = generateObject(instructions, labels, name, "debug_assembly" in options)
+    stage_times["generate"] = time.perf_counter() - begin
+    return object_file
@@ -1,38 +1,154 @@
 import sys
 
-from jaclang import compileJaclang
-from jaclang.binary_writer import binary_writer
+from jaclang import compileJaclang, compileJaclangObject, getOption
+from jaclang.binary_writer import BACKENDS, getBackend, getBackendForPath
+from jaclang.error.link_error import JaclangLinkError
 from jaclang.error.syntax_error import JaclangSyntaxError
+from jaclang.linker import ObjectFile, link
+from jaclang.source_map import SourceMap
+
+
+def compileToObject(input_file: str, options: list[str]) -> ObjectFile:
+    with open(input_file, "r") as file:
+        file_contents = file.read()
+    try:
+        return compileJaclangObject(file_contents, options, input_file)
+    except JaclangSyntaxError as error:
+        print(f"In {input_file}:")
+        error.printError(SourceMap(file_contents))
+        exit(1)
+
+
+def writeOutput(binary_code: bytearray, options: list[str]):
+    output_path = getOption(options, "output", None)
+    if output_path is not None:
+        format_name = getOption(options, "format", None)
+        backend = getBackend(format_name) if format_name is not None else getBackendForPath(output_path)
+        if backend is None or backend.extension is None:
+            file_formats = [name for name, backend in BACKENDS.items() if backend.extension is not None]
+            print(f"Unknown output format for '{output_path}', use format= with one of: {', '.join(file_formats)}")
+            exit(1)
+        backend.write(binary_code, output_path)
+        print(f"Binary written to {output_path}")
+    if "write" in options:
+        getBackend("keyboard").write(binary_code, options=options)
+    if "write_dry_run" in options:
+        getBackend("fake_keyboard").write(binary_code, options=options)
+
+
+def linkFiles(arguments: list[str]):
+    # inputs are told apart from options by their extension, objects are linked as they are, sources are compiled
+    input_files = [argument for argument in arguments if argument.endswith((".jl", ".jlo"))]
+    options = [argument for argument in arguments if argument not in input_files]
+
+    objects = []
+    try:
+        for input_file in input_files:
+            if input_file.endswith(".jlo"):
+                objects.append(ObjectFile.read(input_file))
+            else:
+                objects.append(compileToObject(input_file, options))
+        binary_code = link(objects, "debug_link" in options)
+    except JaclangLinkError as error:
+        error.printError()
+        exit(1)
+
+    print(f"Binary code size: {len(binary_code)} bytes")
+    writeOutput(binary_code, options)
+
+
+def runServer(options: list[str]):
+    # imported here, the socket modules are only needed by the server
+    import signal
+    from jaclang.server import serveStream, serveSocket
+
+    socket_path = getOption(options, "socket", None)
+    try:
+        if socket_path is None:
+            serveStream(sys.stdin, sys.stdout)
+        else:
+            # stopping the server like with Ctrl+C removes the socket
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+            serveSocket(socket_path)
+    except KeyboardInterrupt:
+        pass
+    except OSError as error:
+        print(f"Server error: {error}")
+        exit(1)
 
 
 def main():
     if len(sys.argv) < 2:
         print(
             """Usage: python3 -m jaclang [input_file] [options]
+       python3 -m jaclang link [input_files] [options]
+       python3 -m jaclang server [socket=PATH]
 Options:
 - debug_preprocess: print preprocessed code
 - debug_tokens: print tokens
 - debug_tree: print abstract syntax tree
+- debug_optimizer: print what each optimizer pass removed
 - debug_assembly: print generated assembly code
-- write: write binary code to logic world"""
+- debug_source_map: print which source range each address was generated from
+- inline_budget=N: inline non-recursive functions with bodies up to N bytes (default 128, 0 disables inlining)
+- cache=DIR: keep the optimized code of each function in DIR and reuse it for functions that didn't change,
+  only code generation and optimization are reused, the whole file is still preprocessed, tokenized and parsed
+- debug_cache: print how many functions were reused from the cache
+- jobs=N: generate the code of functions in N processes (default 1), small programs always use one
+- -O0, -O1, -O2: optimization level (default -O2), -O1 folds constants and runs peephole patterns,
+  -O2 also inlines functions and removes unreachable blocks and dead register writes
+- -Os: optimize for size, runs the passes of -O2, shares the return code of each function and moves repeated
+  instruction sequences into subroutines
+- debug_size: with -Os, print the size of every function compared to -O2
+- object=FILE: compile into a relocatable object file instead of a program, functions and variables of other
+  objects are declared with "extern func name(args)" and "extern var name"
+- write: write binary code to logic world, bit keys stay held between words that share them
+- key_delay=MS, clock_delay=MS, release_delay=MS: how long write holds bit keys before the clock, holds the clock key
+  and keeps it released before the next press (default 100 each, the delays of the old writer, shorter ones are not
+  calibrated against logic world), the first and the last wait overlap
+- write_dry_run: print how long write would take and check its keys without typing anything
+- output=FILE: write binary code to FILE, as raw bytes for .bin, Intel HEX for .hex or a listing of 16 bit words
+  for .txt
+- format=bin|hex|words: the format of output=FILE, instead of choosing it by the extension
+Linking:
+- input files ending in .jlo are objects, input files ending in .jl are compiled into objects first
+- the program starts at "func main", functions and variables that are never used are left out
+- debug_link: print the address of every linked function and variable
+Server:
+- compiles requests that are sent as JSON lines on stdin, or on the Unix socket at PATH, without starting again
+- a request is {"id": ..., "source": "...", "options": [...]}, with "object": NAME it is compiled into an object
+- every request gets one response line with "ok", "binary" or "object" as hex, "diagnostics" and "stage_times"
+  in the order of the requests"""
         )
         return
 
+    if sys.argv[1] == "link":
+        linkFiles(sys.argv[2:])
+        return
+    if sys.argv[1] == "server":
+        runServer(sys.argv[2:])
+        return
+
     input_file = sys.argv[1]
     options = sys.argv[2:]
 
+    object_path = getOption(options, "object", None)
+    if object_path is not None:
+        compileToObject(input_file, options).write(object_path)
+        print(f"Object written to {object_path}")
+        return
+
     with open(input_file, "r") as file:
         file_contents = file.read()
 
+    source_map = SourceMap(file_contents)
     try:
-        binary_code = compileJaclang(file_contents, options)
+        binary_code = compileJaclang(file_contents, options, source_map=source_map)
 
         print(f"Binary code size: {len(binary_code)} bytes")
-
-        if "write" in options:
-            binary_writer.writeBinary(binary_code)
+        writeOutput(binary_code, options)
     except JaclangSyntaxError as error:
-        error.printError(file_contents)
+        error.printError(source_map)
         exit(1)
 
 
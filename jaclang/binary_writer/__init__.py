@@ -1 +1 @@
-from jaclang.binary_writer.binary_writer import writeBinary
+from jaclang.binary_writer.backends import Backend, BACKENDS, getBackend, getBackendForPath
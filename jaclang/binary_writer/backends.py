@@ -0,0 +1,46 @@
+import importlib
+from os.path import splitext
+from typing import Optional
+
+
+class Backend:
+    # the module is imported the first time the backend writes, so unused backends cost nothing at startup
+    def __init__(self, name: str, module_name: str, function_name: str, extension: Optional[str], description: str):
+        self.name = name
+        self.module_name = module_name
+        self.function_name = function_name
+        # file extension the backend is picked by, None for backends that don't write a file
+        self.extension = extension
+        self.description = description
+
+    # backends without a file get the options instead, like the delays of the keyboard
+    def write(self, binary_code: bytearray, path: Optional[str] = None, options: list[str] = ()):
+        write_function = getattr(importlib.import_module(self.module_name), self.function_name)
+        if self.extension is None:
+            write_function(binary_code, options)
+        else:
+            write_function(binary_code, path)
+
+
+BACKENDS = {backend.name: backend for backend in [
+    Backend("keyboard", "jaclang.binary_writer.binary_writer", "writeBinary", None,
+            "type the program into logic world, which takes minutes"),
+    Backend("fake_keyboard", "jaclang.binary_writer.fake_keyboard", "writeFakeBinary", None,
+            "play the keys of an upload without typing them and check what logic world would receive"),
+    Backend("bin", "jaclang.binary_writer.file_writers", "writeRawBinary", ".bin", "raw bytes"),
+    Backend("hex", "jaclang.binary_writer.file_writers", "writeIntelHex", ".hex", "Intel HEX records"),
+    Backend("words", "jaclang.binary_writer.file_writers", "writeWordListing", ".txt",
+            "one 16 bit word per line with its address, in hex and binary"),
+]}
+
+
+def getBackend(name: str) -> Optional[Backend]:
+    return BACKENDS.get(name)
+
+
+def getBackendForPath(path: str) -> Optional[Backend]:
+    extension = splitext(path)[1].lower()
+    for backend in BACKENDS.values():
+        if backend.extension == extension:
+            return backend
+    return None
@@ -0,0 +1,94 @@
+from jaclang.binary_writer.upload_plan import WORD_KEYS, START_KEY, CLOCK_KEY, FINISH_KEY, CONTROL_KEYS, UploadTiming, \
+    planUpload, planSimpleUpload, printUploadEstimate, runUpload, getWords
+
+# sleeps add up to slightly less than their sum in floating point
+TIME_TOLERANCE = 1e-6
+
+
+class FakeKeyboard:
+    # receives keys like the computer in logic world, as far as the old writer shows how it reads them: a bit key
+    # latches its bit once it was held for key_delay while no control key was held, the clock key writes the latched
+    # bits, the latch is cleared while a control key is held and control keys have to be held for clock_delay and
+    # released for release_delay, time only passes in sleep
+    def __init__(self, timing: UploadTiming):
+        self.timing = timing
+        self.time = 0.0
+        # held key -> time it was pressed
+        self.held_keys: dict[str, float] = {}
+        self.control_release_time = float("-inf")
+        self.latched_word = 0
+        self.words: list[int] = []
+        self.key_presses = 0
+        self.finished = False
+
+    def isControlHeld(self) -> bool:
+        return any(key in self.held_keys for key in CONTROL_KEYS)
+
+    # latches the bits that were held long enough until now, called before every key changes
+    def updateLatch(self):
+        if self.isControlHeld():
+            return
+        for key, press_time in self.held_keys.items():
+            if self.time - max(press_time, self.control_release_time) + TIME_TOLERANCE >= self.timing.key_delay:
+                self.latched_word |= 1 << WORD_KEYS.index(key)
+
+    def press(self, key: str):
+        if key in self.held_keys:
+            raise ValueError(f"Key '{key}' is pressed while it is held")
+        self.updateLatch()
+        if key in CONTROL_KEYS:
+            if self.isControlHeld() or \
+                    self.time - self.control_release_time + TIME_TOLERANCE < self.timing.release_delay:
+                raise ValueError(f"Key '{key}' is pressed too soon after the last control key")
+            if key == START_KEY:
+                self.words = []
+                self.finished = False
+            elif key == CLOCK_KEY:
+                self.words.append(self.latched_word)
+            self.latched_word = 0
+        self.held_keys[key] = self.time
+        self.key_presses += 1
+
+    def release(self, key: str):
+        if key not in self.held_keys:
+            raise ValueError(f"Key '{key}' is released while it isn't held")
+        self.updateLatch()
+        press_time = self.held_keys.pop(key)
+        if key in CONTROL_KEYS:
+            if self.time - press_time + TIME_TOLERANCE < self.timing.clock_delay:
+                raise ValueError(f"Key '{key}' is released too soon after it was pressed")
+            self.control_release_time = self.time
+            if key == FINISH_KEY:
+                self.finished = True
+
+    def sleep(self, seconds: float):
+        self.time += seconds
+
+    # whether logic world received exactly binary_code and the upload ended with every key released
+    def hasWritten(self, binary_code: bytearray) -> bool:
+        return self.words == getWords(binary_code) and self.finished and not self.held_keys
+
+
+# the keyboard after playing the upload of binary_code, its words are what logic world would have received,
+# timing is how long logic world needs to see the keys, simple uses the steps of the old writer
+def replayUpload(binary_code: bytearray, timing: UploadTiming, simple: bool = False) -> FakeKeyboard:
+    keyboard = FakeKeyboard(timing)
+    steps = planSimpleUpload(binary_code, timing) if simple else planUpload(binary_code, timing)
+    runUpload(steps, keyboard, keyboard.sleep)
+    return keyboard
+
+
+def writeFakeBinary(binary_code: bytearray, options: list[str]):
+    timing = UploadTiming.fromOptions(options)
+    steps = planUpload(binary_code, timing)
+    printUploadEstimate(steps, binary_code)
+    keyboard = FakeKeyboard(timing)
+    try:
+        runUpload(steps, keyboard, keyboard.sleep)
+    except ValueError as error:
+        print(f"Fake upload failed: {error}")
+        exit(1)
+    if not keyboard.hasWritten(binary_code):
+        print("Fake upload doesn't match the binary code")
+        exit(1)
+    print(f"Fake upload matches the binary code, {keyboard.key_presses} key presses in {keyboard.time:.1f}s")
@@ -0,0 +1,46 @@
+import mmap
+
+from jaclang.generator.generator import FORMAT_WORD
+
+HEX_RECORD_SIZE = 16
+HEX_DATA = 0x00
+HEX_END_OF_FILE = 0x01
+HEX_EXTENDED_LINEAR_ADDRESS = 0x04
+
+
+def writeRawBinary(binary_code: bytearray, path: str):
+    with open(path, "w+b") as file:
+        if not binary_code:
+            return
+        # the file gets its final size first and the code is copied into the mapping in one go
+        file.truncate(len(binary_code))
+        with mmap.mmap(file.fileno(), len(binary_code)) as mapping:
+            mapping[:] = binary_code
+
+
+def getHexRecord(record_type: int, address: int, data: bytes) -> str:
+    record = bytes([len(data), address >> 8, address & 0xFF, record_type]) + data
+    checksum = -sum(record) & 0xFF
+    return f":{record.hex().upper()}{checksum:02X}\n"
+
+
+def writeIntelHex(binary_code: bytearray, path: str):
+    records = []
+    for offset in range(0, len(binary_code), HEX_RECORD_SIZE):
+        # records only hold 16 bit addresses, the upper half is set whenever it changes
+        if offset % 0x10000 == 0 and offset != 0:
+            records.append(getHexRecord(HEX_EXTENDED_LINEAR_ADDRESS, 0, (offset >> 16).to_bytes(2, "big")))
+        records.append(getHexRecord(HEX_DATA, offset & 0xFFFF, bytes(binary_code[offset:offset + HEX_RECORD_SIZE])))
+    records.append(getHexRecord(HEX_END_OF_FILE, 0, b""))
+    with open(path, "w") as file:
+        file.write("".join(records))
+
+
+def writeWordListing(binary_code: bytearray, path: str):
+    if len(binary_code) % 2 != 0:
+        binary_code = binary_code + b"\x00"
+    lines = []
+    for (word,), address in zip(FORMAT_WORD.iter_unpack(binary_code), range(0, len(binary_code), 2)):
+        lines.append(f"{address:04X}: {word:04X} {word:016b}\n")
+    with open(path, "w") as file:
+        file.write("".join(lines))
@@ -0,0 +1,105 @@
+from typing import Union
+
+from jaclang import getIntOption
+from jaclang.generator.generator import FORMAT_WORD
+
+# key of each bit of a word, from the lowest bit
+WORD_KEYS = "IUYTREWQ87654321"
+# moves the write address of logic world back to the beginning
+START_KEY = "o"
+# writes the word of the latched bits and moves to the next address
+CLOCK_KEY = "0"
+# pressed after the last word, like the writer always did
+FINISH_KEY = "l"
+# keys that don't set a bit, logic world clears the latched bits while one of them is held
+CONTROL_KEYS = (START_KEY, CLOCK_KEY, FINISH_KEY)
+
+PRESS = 0
+RELEASE = 1
+WAIT = 2
+
+# the delays the writer always used, they are known to be long enough for logic world to see every key, shorter ones
+# were never measured in logic world, so they are only used when given as options
+DEFAULT_DELAY_MS = 100
+
+
+class UploadTiming:
+    def __init__(self, key_delay: float = DEFAULT_DELAY_MS / 1000, clock_delay: float = DEFAULT_DELAY_MS / 1000,
+                 release_delay: float = DEFAULT_DELAY_MS / 1000):
+        # seconds a bit key is held before logic world latches its bit
+        self.key_delay = key_delay
+        # seconds a control key is held
+        self.clock_delay = clock_delay
+        # seconds from releasing a control key to pressing the next one
+        self.release_delay = release_delay
+
+    # key_delay=MS, clock_delay=MS and release_delay=MS
+    @staticmethod
+    def fromOptions(options: list[str]) -> "UploadTiming":
+        return UploadTiming(getIntOption(options, "key_delay", DEFAULT_DELAY_MS) / 1000,
+                            getIntOption(options, "clock_delay", DEFAULT_DELAY_MS) / 1000,
+                            getIntOption(options, "release_delay", DEFAULT_DELAY_MS) / 1000)
+
+
+def getWords(binary_code: bytearray) -> list[int]:
+    if len(binary_code) % 2 != 0:
+        binary_code = binary_code + b"\x00"
+    return [word for (word,) in FORMAT_WORD.iter_unpack(binary_code)]
+
+
+def getPressedKeys(bits: int) -> list[str]:
+    return [key for i, key in enumerate(WORD_KEYS) if (bits >> i) & 1]
+
+
+# (PRESS or RELEASE, key) and (WAIT, seconds) steps that type binary_code, bit keys stay held while the next word
+# has them set too, the bits that the next word doesn't have are released right before the clock like the old writer
+# did, since logic world latches them before, and the wait after the clock is the one for the new bits to latch
+def planUpload(binary_code: bytearray, timing: UploadTiming) -> list[tuple[int, Union[str, float]]]:
+    steps = [(PRESS, START_KEY), (WAIT, timing.clock_delay), (RELEASE, START_KEY)]
+    words = getWords(binary_code)
+    held_word = 0
+    for i, word in enumerate(words):
+        steps += [(PRESS, key) for key in getPressedKeys(word & ~held_word)]
+        held_word = word
+        # held bits latch again after the clock was released, so they wait as long as the new ones
+        steps.append((WAIT, max(timing.key_delay, timing.release_delay) if word else timing.release_delay))
+        next_word = words[i + 1] if i + 1 < len(words) else 0
+        steps += [(RELEASE, key) for key in getPressedKeys(held_word & ~next_word)]
+        held_word &= next_word
+        steps += [(PRESS, CLOCK_KEY), (WAIT, timing.clock_delay), (RELEASE, CLOCK_KEY)]
+    steps += [(WAIT, timing.release_delay), (PRESS, FINISH_KEY), (WAIT, timing.clock_delay), (RELEASE, FINISH_KEY)]
+    return steps
+
+
+# the steps of the writer before uploads were planned, every word presses all of its bits and releases them before
+# the clock, with a wait after each step, logic world is known to read these, so the fake keyboard is checked on them
+def planSimpleUpload(binary_code: bytearray, timing: UploadTiming) -> list[tuple[int, Union[str, float]]]:
+    steps = [(PRESS, START_KEY), (WAIT, timing.clock_delay), (RELEASE, START_KEY), (WAIT, timing.release_delay)]
+    for word in getWords(binary_code):
+        keys = getPressedKeys(word)
+        steps += [(PRESS, key) for key in keys] + [(WAIT, timing.key_delay)] + [(RELEASE, key) for key in keys]
+        steps += [(PRESS, CLOCK_KEY), (WAIT, timing.clock_delay), (RELEASE, CLOCK_KEY), (WAIT, timing.release_delay)]
+    steps += [(PRESS, FINISH_KEY), (WAIT, timing.clock_delay), (RELEASE, FINISH_KEY)]
+    return steps
+
+
+def getUploadTime(steps: list[tuple[int, Union[str, float]]]) -> float:
+    return sum(value for action, value in steps if action == WAIT)
+
+
+def printUploadEstimate(steps: list[tuple[int, Union[str, float]]], binary_code: bytearray):
+    upload_time = getUploadTime(steps)
+    key_presses = sum(action == PRESS for action, _ in steps)
+    print(f"Uploading {len(getWords(binary_code))} words with {key_presses} key presses, "
+          f"estimated time {int(upload_time // 60)}m {upload_time % 60:.1f}s")
+
+
+# keyboard is anything with press(key) and release(key), like the keyboard module or a FakeKeyboard
+def runUpload(steps: list[tuple[int, Union[str, float]]], keyboard, sleep):
+    for action, value in steps:
+        if action == PRESS:
+            keyboard.press(value)
+        elif action == RELEASE:
+            keyboard.release(value)
+        else:
+            sleep(value)
@@ -0,0 +1 @@
+from jaclang.cache.function_cache import FunctionCache, CachedFunction
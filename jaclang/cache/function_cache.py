@@ -0,0 +1,127 @@
+import hashlib
+import os
+import pickle
+from bisect import bisect_right
+from os.path import dirname, join
+from typing import Optional
+
+from jaclang.generator import Instruction, LabelTable
+from jaclang.generator.packing import packInstructions, unpackInstructions
+
+# bump when the layout of the cached entries changes
+CACHE_FORMAT_VERSION = 2
+
+compiler_fingerprint: Optional[str] = None
+
+
+# code generated by a different version of the compiler is never reused
+def getCompilerFingerprint() -> str:
+    global compiler_fingerprint
+    if compiler_fingerprint is None:
+        digest = hashlib.sha256(str(CACHE_FORMAT_VERSION).encode())
+        for root, dirs, files in os.walk(dirname(dirname(__file__))):
+            dirs.sort()
+            for file in sorted(files):
+                if file.endswith(".py"):
+                    with open(join(root, file), "rb") as source_file:
+                        digest.update(source_file.read())
+        compiler_fingerprint = digest.hexdigest()
+    return compiler_fingerprint
+
+
+class CachedFunction:
+    def __init__(self, instructions: list[Instruction], body_size: int, frame_size: int, recursive: bool):
+        self.instructions = instructions
+        self.body_size = body_size
+        self.frame_size = frame_size
+        self.recursive = recursive
+
+
+# only the generated and optimized code is cached, the source is still tokenized and parsed as a whole
+class FunctionCache:
+    # the cached code of a function is optimized on its own, so it depends on how it was optimized
+    def __init__(self, directory: str, source: str, inline_budget: int, optimization_level: int,
+                 size_optimized: bool):
+        self.directory = directory
+        self.source = source
+        self.options_key = f"{getCompilerFingerprint()} {inline_budget} {optimization_level} {size_optimized}".encode()
+        # spans and keys of the functions keyed so far, in source order, spans of cached code are stored
+        # relative to the function they were parsed from, which can be an inlined one
+        self.function_begins: list[int] = []
+        self.function_ends: list[int] = []
+        self.function_keys: list[str] = []
+        self.begin_by_key: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    # dependencies describe every symbol the function refers to, the code is reused only if all of them match
+    def addFunction(self, span: (int, int), dependencies: list[str]) -> str:
+        digest = hashlib.sha256(self.options_key)
+        digest.update(self.source[span[0]:span[1]].encode())
+        for dependency in dependencies:
+            digest.update(b"\0" + dependency.encode())
+        key = digest.hexdigest()
+
+        self.function_begins.append(span[0])
+        self.function_ends.append(span[1])
+        self.function_keys.append(key)
+        self.begin_by_key[key] = span[0]
+        return key
+
+    def getPath(self, key: str) -> str:
+        return join(self.directory, key)
+
+    def load(self, key: str, labels: LabelTable) -> Optional[CachedFunction]:
+        try:
+            with open(self.getPath(key), "rb") as cache_file:
+                body_size, frame_size, recursive, label_names, packed_instructions, spans = pickle.load(cache_file)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            self.misses += 1
+            return None
+        if any(span is not None and span[0] not in self.begin_by_key for span in spans):
+            # inlined from a function that is not part of this program anymore
+            self.misses += 1
+            return None
+
+        instructions = unpackInstructions(label_names, packed_instructions, labels)
+        for instruction, span in zip(instructions, spans):
+            instruction.span = self.unpackSpan(span)
+        self.hits += 1
+        return CachedFunction(instructions, body_size, frame_size, recursive)
+
+    def store(self, key: str, function: CachedFunction, labels: LabelTable):
+        spans = []
+        for instruction in function.instructions:
+            span = self.packSpan(instruction.span)
+            if span is None and instruction.span is not None:
+                # code from outside any function can't be placed again
+                return
+            spans.append(span)
+        label_names, packed_instructions = packInstructions(function.instructions, labels)
+
+        entry = (function.body_size, function.frame_size, function.recursive, label_names, packed_instructions, spans)
+        # written to a temporary file first, so an interrupted compile never leaves a broken entry behind
+        temporary_path = f"{self.getPath(key)}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as cache_file:
+            pickle.dump(entry, cache_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, self.getPath(key))
+
+    def packSpan(self, span: Optional[tuple[int, int]]) -> Optional[tuple[str, int, int]]:
+        if span is None:
+            return None
+        i = bisect_right(self.function_begins, span[0]) - 1
+        if i < 0 or span[1] > self.function_ends[i]:
+            return None
+        begin = self.function_begins[i]
+        return self.function_keys[i], span[0] - begin, span[1] - begin
+
+    def unpackSpan(self, span: Optional[tuple[str, int, int]]) -> Optional[tuple[int, int]]:
+        if span is None:
+            return None
+        key, begin, end = span
+        function_begin = self.begin_by_key[key]
+        return function_begin + begin, function_begin + end
+
+    def printStatistics(self):
+        print(f"Function cache: {self.hits} reused, {self.misses} generated")
@@ -0,0 +1,10 @@
+from jaclang.error.syntax_error import RED, BOLD, CLEAR
+
+
+class JaclangLinkError(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+    def printError(self):
+        print(f"{RED}{BOLD}LinkError: {self.message}{CLEAR}")
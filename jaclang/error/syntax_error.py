@@ -1,3 +1,5 @@
+from jaclang.source_map import SourceMap
+
 RED = '\033[91m'
 BOLD = '\033[1m'
 CLEAR = '\033[0m'
@@ -5,28 +7,17 @@ CLEAR = '\033[0m'
 
 class JaclangSyntaxError(Exception):
     def __init__(self, pos: int, message: str):
+        # the arguments are kept for pickling, errors of parallel code generation come from worker processes
+        super().__init__(pos, message)
         self.pos = pos
         self.message = message
 
-    def printError(self, file_contents: str):
+    def printError(self, source_map: SourceMap):
         print(f"{RED}{BOLD}SyntaxError: {self.message}")
         if self.pos == -1:
             print("Error location not provided")
         else:
-            right = self.pos
-            left = self.pos
-
-            while right < len(file_contents) and file_contents[right] != '\n':
-                right += 1
-
-            while left > 0 and file_contents[left - 1] != '\n':
-                left -= 1
-
-            line_num = 1
-            for i in range(self.pos):
-                if file_contents[i] == "\n":
-                    line_num += 1
-
+            line_num, column = source_map.getLineAndColumn(self.pos)
             line_num_prefix = f"line {line_num}: "
-            print(line_num_prefix + file_contents[left:right].replace("\t", " "))
-            print(" " * (self.pos - left + len(line_num_prefix)) + "^" + CLEAR)
+            print(line_num_prefix + source_map.getLine(line_num).replace("\t", " "))
+            print(" " * (column + len(line_num_prefix)) + "^" + CLEAR)
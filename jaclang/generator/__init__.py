@@ -1,2 +1,4 @@
-from jaclang.generator.generator import Registers, generate, Instruction
+from jaclang.generator.generator import Registers, RegisterParameter, generate, printAssembly, Instruction, Emitter, \
+    LabelTable, Assembler
 from jaclang.generator.instructions import Instructions, CompareFlags
+from jaclang.generator.register_allocator import RegisterAllocator
@@ -1,7 +1,22 @@
 from abc import abstractmethod
+from struct import Struct
+from typing import Optional
+
+from jaclang.error.syntax_error import JaclangSyntaxError
+from jaclang.source_map import SourceMap
+
+# encodings shared by the instructions, every instruction is packed straight into the output buffer
+FORMAT_BYTES_2 = Struct("2B")
+FORMAT_BYTES_4 = Struct("4B")
+FORMAT_IMMEDIATE = Struct("<BBH")
+FORMAT_WORD = Struct("<H")
+# zeroed room for an instruction of each length
+EMPTY_BYTES = {length: bytes(length) for length in (0, 2, 4)}
 
 
 class Parameter:
+    __slots__ = ()
+
     @abstractmethod
     def toBytes(self) -> list[int]:
         pass
@@ -12,6 +27,8 @@ class Parameter:
 
 
 class RegisterParameter(Parameter):
+    __slots__ = ("register_number", "name")
+
     def __init__(self, register_number, name):
         self.register_number = register_number
         self.name = name
@@ -35,6 +52,8 @@ class Registers:
 
 
 class Value16Parameter(Parameter):
+    __slots__ = ("value",)
+
     def __init__(self, value: int):
         self.value = value
 
@@ -46,6 +65,8 @@ class Value16Parameter(Parameter):
 
 
 class Value8Parameter(Parameter):
+    __slots__ = ("value",)
+
     def __init__(self, value: int):
         self.value = value
 
@@ -57,6 +78,8 @@ class Value8Parameter(Parameter):
 
 
 class EmptyByteParameter(Parameter):
+    __slots__ = ()
+
     def toBytes(self) -> list[int]:
         return [0]
 
@@ -64,56 +87,137 @@ class EmptyByteParameter(Parameter):
         return ""
 
 
+class LabelTable:
+    def __init__(self):
+        # label id -> name, numbered labels only store their kind, the id is appended when the name is printed
+        self.names: list[str] = []
+        self.named_labels: dict[str, int] = {}
+
+    # the same id for every use of a name, like "func main"
+    def getNamed(self, name: str) -> int:
+        label = self.named_labels.get(name)
+        if label is None:
+            label = len(self.names)
+            self.names.append(name)
+            self.named_labels[name] = label
+        return label
+
+    # a new label that is distinct from every other one, like the end of an if statement
+    def createNumbered(self, kind: str) -> int:
+        self.names.append(kind)
+        return len(self.names) - 1
+
+    def isNamed(self, label: int) -> bool:
+        return self.named_labels.get(self.names[label]) == label
+
+    def getName(self, label: int) -> str:
+        name = self.names[label]
+        return name if self.isNamed(label) else f"{name} {label}"
+
+    def getCount(self) -> int:
+        return len(self.names)
+
+
 class Instruction:
-    def __init__(self, name: str, opcode: int, params: list[Parameter], length: int):
-        self.name = name
-        self.opcode = opcode
-        self.params = params
-        self.length = length
-        if length not in [0, 2, 4]:
-            raise Exception("Instruction length must be either 0, 2 or 4")
+    # operands are stored directly on the instruction, parameters are only built for the assembly listing
+    __slots__ = ("span",)
+    name = ""
+    opcode = 0b00000
+    length = 4
+
+    def __init__(self):
+        # source range of the innermost statement this instruction was generated for
+        self.span: Optional[tuple[int, int]] = None
 
-    def printInfo(self):
+    @abstractmethod
+    def getParams(self) -> list[Parameter]:
+        pass
+
+    def printInfo(self, _: LabelTable):
         info = "    " + self.name + " "
-        for param in self.params:
+        for param in self.getParams():
             param_info = param.getInfo()
             info += param.getInfo()
             if param_info:
                 info += " "
         print(info)
 
-    def toBytes(self, _: dict[str, int]) -> list[int]:
-        if self.length == 0:
-            return []
-
-        byte_arr = [self.opcode]
-        for param in self.params:
-            byte_arr += param.toBytes()
-
-        if len(byte_arr) != self.length:
-            raise Exception("Byte array length must match")
-
-        return byte_arr
-
-    def preCompile(self, curr_addr: int, labels: dict[str, int]):
+    # writes the instruction into buffer at offset, the buffer already has room for it
+    @abstractmethod
+    def encode(self, buffer: bytearray, offset: int):
         pass
 
+    def assemble(self, assembler: "Assembler"):
+        offset = len(assembler.binary_code)
+        assembler.binary_code += EMPTY_BYTES[self.length]
+        self.encode(assembler.binary_code, offset)
+
+
+class Assembler:
+    def __init__(self, labels: LabelTable):
+        self.labels = labels
+        self.binary_code = bytearray()
+        # label id -> address, None until the label is placed
+        self.label_addresses: list[Optional[int]] = [None] * labels.getCount()
+        # (offset of the value, label id, instruction) for label loads placed before their label
+        self.fixups: list[tuple[int, int, Instruction]] = []
+
+    def patchFixups(self):
+        for offset, label, instruction in self.fixups:
+            address = self.label_addresses[label]
+            if address is None:
+                raise JaclangSyntaxError(instruction.span[0] if instruction.span is not None else -1,
+                                         f"Undefined symbol '{self.labels.getName(label)}'")
+            FORMAT_WORD.pack_into(self.binary_code, offset, address & 0xFFFF)
+
+
+class Emitter:
+    def __init__(self):
+        self.instructions: list[Instruction] = []
+        # size of the emitted instructions in bytes
+        self.size = 0
+        self.span: Optional[tuple[int, int]] = None
+
+    def emit(self, instruction: Instruction):
+        instruction.span = self.span
+        self.instructions.append(instruction)
+        self.size += instruction.length
+
+    # appends instructions that already carry their spans
+    def extend(self, instructions: list[Instruction]):
+        self.instructions += instructions
+        self.size += sum(instruction.length for instruction in instructions)
+
+    # instructions emitted until endSpan are attributed to span, unless a nested statement sets its own
+    def beginSpan(self, span: (int, int)) -> Optional[tuple[int, int]]:
+        outer_span = self.span
+        if span[0] != -1:
+            self.span = span
+        return outer_span
+
+    def endSpan(self, outer_span: Optional[tuple[int, int]]):
+        self.span = outer_span
+
+
+def printAssembly(instructions: list[Instruction], labels: LabelTable):
+    print("Generated assembly code:")
+    print("---------------------------------")
+    for instruction in instructions:
+        instruction.printInfo(labels)
+    print("---------------------------------")
 
-def generate(instructions: list[Instruction], debug_output: bool = False) -> list[int]:
-    if debug_output:
-        print("Generated assembly code:")
-        print("---------------------------------")
-        for instruction in instructions:
-            instruction.printInfo()
-        print("---------------------------------")
-    binary_code = []
-    curr_addr = 0
-    labels = {}
 
-    for instruction in instructions:
-        instruction.preCompile(curr_addr, labels)
-        curr_addr += instruction.length
+def generate(instructions: list[Instruction], labels: LabelTable, debug_output: bool = False,
+             source_map: Optional[SourceMap] = None) -> bytearray:
+    if debug_output:
+        printAssembly(instructions, labels)
 
+    # a single pass, loads of labels that are not placed yet are patched once every label is known
+    assembler = Assembler(labels)
     for instruction in instructions:
-        binary_code += instruction.toBytes(labels)
-    return binary_code
+        begin = len(assembler.binary_code)
+        instruction.assemble(assembler)
+        if source_map is not None and instruction.length != 0 and instruction.span is not None:
+            source_map.addRange(begin, begin + instruction.length, instruction.span)
+    assembler.patchFixups()
+    return assembler.binary_code
@@ -1,5 +1,5 @@
-from jaclang.error.syntax_error import JaclangSyntaxError
-from jaclang.generator.generator import Instruction, EmptyByteParameter, RegisterParameter, Value16Parameter, Value8Parameter
+from jaclang.generator.generator import Instruction, Parameter, LabelTable, Assembler, EmptyByteParameter, \
+    RegisterParameter, Value16Parameter, Value8Parameter, FORMAT_BYTES_2, FORMAT_BYTES_4, FORMAT_IMMEDIATE, FORMAT_WORD
 
 
 class CompareFlags:
@@ -9,227 +9,408 @@ class CompareFlags:
     LESSER_OR_EQUAL = LESSER | EQUAL
     GREATER_OR_EQUAL = GREATER | EQUAL
     NOT_EQUAL = GREATER | LESSER
+    ALL = GREATER | LESSER | EQUAL
 
+    # two values are always exactly one of greater, lesser or equal, so flipping every flag negates the comparison
+    @staticmethod
+    def complement(flags: int) -> int:
+        return flags ^ CompareFlags.ALL
 
-class Instructions:
-    class Terminate(Instruction):
-        def __init__(self):
-            super().__init__("NOP", 0b00000, [EmptyByteParameter()], 2)
-
-    class Add(Instruction):
-        def __init__(self, reg_a: RegisterParameter, reg_b: RegisterParameter, reg_save: RegisterParameter):
-            super().__init__("ADD", 0b00001, [reg_a, reg_b, reg_save], 4)
-            self.reg_a = reg_a
-            self.reg_b = reg_b
-            self.reg_save = reg_save
-
-        def printInfo(self):
-            print(f"    {self.reg_save.getInfo()} = {self.reg_a.getInfo()} + {self.reg_b.getInfo()}")
-
-    class Subtract(Instruction):
-        def __init__(self, reg_a: RegisterParameter, reg_b: RegisterParameter, reg_save: RegisterParameter):
-            super().__init__("SUB", 0b00010, [reg_a, reg_b, reg_save], 4)
-            self.reg_a = reg_a
-            self.reg_b = reg_b
-            self.reg_save = reg_save
-
-        def printInfo(self):
-            print(f"    {self.reg_save.getInfo()} = {self.reg_a.getInfo()} - {self.reg_b.getInfo()}")
 
-    class BitShiftLeft(Instruction):
-        def __init__(self, reg_a: RegisterParameter, reg_b: RegisterParameter, reg_save: RegisterParameter):
-            super().__init__("BSL", 0b00011, [reg_a, reg_b, reg_save], 4)
-            self.reg_a = reg_a
-            self.reg_b = reg_b
-            self.reg_save = reg_save
-
-        def printInfo(self):
-            print(f"    {self.reg_save.getInfo()} = {self.reg_a.getInfo()} << {self.reg_b.getInfo()}")
-
-    class BitShiftRight(Instruction):
-        def __init__(self, reg_a: RegisterParameter, reg_b: RegisterParameter, reg_save: RegisterParameter):
-            super().__init__("BSR", 0b00100, [reg_a, reg_b, reg_save], 4)
-            self.reg_a = reg_a
-            self.reg_b = reg_b
-            self.reg_save = reg_save
-
-        def printInfo(self):
-            print(f"    {self.reg_save.getInfo()} = {self.reg_a.getInfo()} >> {self.reg_b.getInfo()}")
+# reg_save = reg_a operation reg_b
+class BinaryOperation(Instruction):
+    __slots__ = ("reg_a", "reg_b", "reg_save")
+    symbol = ""
 
-    class Or(Instruction):
-        def __init__(self, reg_a: RegisterParameter, reg_b: RegisterParameter, reg_save: RegisterParameter):
-            super().__init__("OR", 0b00101, [reg_a, reg_b, reg_save], 4)
-            self.reg_a = reg_a
-            self.reg_b = reg_b
-            self.reg_save = reg_save
+    def __init__(self, reg_a: RegisterParameter, reg_b: RegisterParameter, reg_save: RegisterParameter):
+        super().__init__()
+        self.reg_a = reg_a
+        self.reg_b = reg_b
+        self.reg_save = reg_save
 
-        def printInfo(self):
-            print(f"    {self.reg_save.getInfo()} = {self.reg_a.getInfo()} OR {self.reg_b.getInfo()}")
+    def getParams(self) -> list[Parameter]:
+        return [self.reg_a, self.reg_b, self.reg_save]
 
-    class And(Instruction):
-        def __init__(self, reg_a: RegisterParameter, reg_b: RegisterParameter, reg_save: RegisterParameter):
-            super().__init__("AND", 0b00111, [reg_a, reg_b, reg_save], 4)
-            self.reg_a = reg_a
-            self.reg_b = reg_b
-            self.reg_save = reg_save
+    def printInfo(self, _: LabelTable):
+        print(f"    {self.reg_save.getInfo()} = {self.reg_a.getInfo()} {self.symbol} {self.reg_b.getInfo()}")
 
-        def printInfo(self):
-            print(f"    {self.reg_save.getInfo()} = {self.reg_a.getInfo()} AND {self.reg_b.getInfo()}")
+    def encode(self, buffer: bytearray, offset: int):
+        FORMAT_BYTES_4.pack_into(buffer, offset, self.opcode, self.reg_a.register_number,
+                                 self.reg_b.register_number, self.reg_save.register_number)
 
-    class Xor(Instruction):
-        def __init__(self, reg_a: RegisterParameter, reg_b: RegisterParameter, reg_save: RegisterParameter):
-            super().__init__("XOR", 0b00110, [reg_a, reg_b, reg_save], 4)
-            self.reg_a = reg_a
-            self.reg_b = reg_b
-            self.reg_save = reg_save
 
-        def printInfo(self):
-            print(f"    {self.reg_save.getInfo()} = {self.reg_a.getInfo()} XOR {self.reg_b.getInfo()}")
+class Instructions:
+    class Terminate(Instruction):
+        __slots__ = ()
+        name = "NOP"
+        length = 2
+
+        def getParams(self) -> list[Parameter]:
+            return [EmptyByteParameter()]
+
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_BYTES_2.pack_into(buffer, offset, self.opcode, 0)
+
+    class Add(BinaryOperation):
+        __slots__ = ()
+        name = "ADD"
+        opcode = 0b00001
+        symbol = "+"
+
+    class Subtract(BinaryOperation):
+        __slots__ = ()
+        name = "SUB"
+        opcode = 0b00010
+        symbol = "-"
+
+    class BitShiftLeft(BinaryOperation):
+        __slots__ = ()
+        name = "BSL"
+        opcode = 0b00011
+        symbol = "<<"
+
+    class BitShiftRight(BinaryOperation):
+        __slots__ = ()
+        name = "BSR"
+        opcode = 0b00100
+        symbol = ">>"
+
+    class Or(BinaryOperation):
+        __slots__ = ()
+        name = "OR"
+        opcode = 0b00101
+        symbol = "OR"
+
+    class And(BinaryOperation):
+        __slots__ = ()
+        name = "AND"
+        opcode = 0b00111
+        symbol = "AND"
+
+    class Xor(BinaryOperation):
+        __slots__ = ()
+        name = "XOR"
+        opcode = 0b00110
+        symbol = "XOR"
 
     class Not(Instruction):
+        __slots__ = ("reg_a", "reg_save")
+        name = "NOT"
+        opcode = 0b01000
+
         def __init__(self, reg_a: RegisterParameter, reg_save: RegisterParameter):
-            super().__init__("NOT", 0b01000, [reg_a, EmptyByteParameter(), reg_save], 4)
+            super().__init__()
             self.reg_a = reg_a
             self.reg_save = reg_save
 
-        def printInfo(self):
-            print(f"    {self.reg_save.getInfo()} = NOT {self.reg_a.getInfo()}")
+        def getParams(self) -> list[Parameter]:
+            return [self.reg_a, EmptyByteParameter(), self.reg_save]
 
-    class Xnor(Instruction):
-        def __init__(self, reg_a: RegisterParameter, reg_b: RegisterParameter, reg_save: RegisterParameter):
-            super().__init__("XNOR", 0b01001, [reg_a, reg_b, reg_save], 4)
-            self.reg_a = reg_a
-            self.reg_b = reg_b
-            self.reg_save = reg_save
+        def printInfo(self, _: LabelTable):
+            print(f"    {self.reg_save.getInfo()} = NOT {self.reg_a.getInfo()}")
 
-        def printInfo(self):
-            print(f"    {self.reg_save.getInfo()} = {self.reg_a.getInfo()} XNOR {self.reg_b.getInfo()}")
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_BYTES_4.pack_into(buffer, offset, self.opcode, self.reg_a.register_number, 0,
+                                     self.reg_save.register_number)
 
-    class Nand(Instruction):
-        def __init__(self, reg_a: RegisterParameter, reg_b: RegisterParameter, reg_save: RegisterParameter):
-            super().__init__("NAND", 0b01010, [reg_a, reg_b, reg_save], 4)
-            self.reg_a = reg_a
-            self.reg_b = reg_b
-            self.reg_save = reg_save
+    class Xnor(BinaryOperation):
+        __slots__ = ()
+        name = "XNOR"
+        opcode = 0b01001
+        symbol = "XNOR"
 
-        def printInfo(self):
-            print(f"    {self.reg_save.getInfo()} = {self.reg_a.getInfo()} NAND {self.reg_b.getInfo()}")
+    class Nand(BinaryOperation):
+        __slots__ = ()
+        name = "NAND"
+        opcode = 0b01010
+        symbol = "NAND"
 
     class MemoryWrite(Instruction):
+        __slots__ = ("reg_addr", "addr_offset", "reg_value")
+        name = "MEMW"
+        opcode = 0b01011
+
         def __init__(self, reg_addr: RegisterParameter, addr_offset: int, reg_value: RegisterParameter):
-            super().__init__("MEMW", 0b01011, [reg_addr, reg_value, Value8Parameter(addr_offset)], 4)
+            super().__init__()
             self.reg_addr = reg_addr
             self.addr_offset = addr_offset
             self.reg_value = reg_value
 
-        def printInfo(self):
+        def getParams(self) -> list[Parameter]:
+            return [self.reg_addr, self.reg_value, Value8Parameter(self.addr_offset)]
+
+        def printInfo(self, _: LabelTable):
             print(f"    [{self.reg_addr.getInfo()} + {self.addr_offset}] = {self.reg_value.getInfo()}")
 
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_BYTES_4.pack_into(buffer, offset, self.opcode, self.reg_addr.register_number,
+                                     self.reg_value.register_number, self.addr_offset & 0xFF)
+
     class MemRead(Instruction):
+        __slots__ = ("reg_addr", "addr_offset", "reg_save")
+        name = "MEMR"
+        opcode = 0b01100
+
         def __init__(self, reg_addr: RegisterParameter, addr_offset: int, reg_save: RegisterParameter):
-            super().__init__("MEMR", 0b01100, [reg_addr, Value8Parameter(addr_offset), reg_save], 4)
+            super().__init__()
             self.reg_addr = reg_addr
             self.addr_offset = addr_offset
             self.reg_save = reg_save
 
-        def printInfo(self):
+        def getParams(self) -> list[Parameter]:
+            return [self.reg_addr, Value8Parameter(self.addr_offset), self.reg_save]
+
+        def printInfo(self, _: LabelTable):
             print(f"    {self.reg_save.getInfo()} = [{self.reg_addr.getInfo()} + {self.addr_offset}]")
 
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_BYTES_4.pack_into(buffer, offset, self.opcode, self.reg_addr.register_number,
+                                     self.addr_offset & 0xFF, self.reg_save.register_number)
+
     class Immediate(Instruction):
+        __slots__ = ("reg_save", "value")
+        name = "IMM"
+        opcode = 0b01101
+
         def __init__(self, reg_save: RegisterParameter, value: int):
-            super().__init__("IMM", 0b01101, [reg_save, Value16Parameter(value)], 4)
+            super().__init__()
             self.reg_save = reg_save
             self.value = value
 
-        def printInfo(self):
+        def getParams(self) -> list[Parameter]:
+            return [self.reg_save, Value16Parameter(self.value)]
+
+        def printInfo(self, _: LabelTable):
             print(f"    {self.reg_save.getInfo()} = {self.value}")
 
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_IMMEDIATE.pack_into(buffer, offset, self.opcode, self.reg_save.register_number, self.value & 0xFFFF)
+
     class ImmediateLabel(Instruction):
-        def __init__(self, reg_save: RegisterParameter, label_name: str):
-            super().__init__("IMM", 0b01101, [], 4)
+        __slots__ = ("reg_save", "label")
+        name = "IMM"
+        opcode = 0b01101
+
+        def __init__(self, reg_save: RegisterParameter, label: int):
+            super().__init__()
             self.reg_save = reg_save
-            self.label_name = label_name
+            self.label = label
 
-        def printInfo(self):
-            print(f"    {self.reg_save.getInfo()} = label {self.label_name}")
+        def getParams(self) -> list[Parameter]:
+            return []
 
-        def toBytes(self, labels: dict[str, int]) -> list[int]:
-            if self.label_name not in labels.keys():
-                raise JaclangSyntaxError(-1, f"Undefined symbol '{self.label_name}'")
-            value = labels[self.label_name]
-            return [self.opcode] + self.reg_save.toBytes() + Value16Parameter(value).toBytes()
+        def printInfo(self, labels: LabelTable):
+            print(f"    {self.reg_save.getInfo()} = label {labels.getName(self.label)}")
+
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_IMMEDIATE.pack_into(buffer, offset, self.opcode, self.reg_save.register_number, 0)
+
+        def assemble(self, assembler: Assembler):
+            offset = len(assembler.binary_code)
+            super().assemble(assembler)
+            address = assembler.label_addresses[self.label]
+            if address is None:
+                assembler.fixups.append((offset + 2, self.label, self))
+            else:
+                FORMAT_WORD.pack_into(assembler.binary_code, offset + 2, address & 0xFFFF)
 
     class Mov(Instruction):
+        __slots__ = ("reg_a", "reg_save")
+        name = "MOV"
+        opcode = 0b01110
+
         def __init__(self, reg_a: RegisterParameter, reg_save: RegisterParameter):
-            super().__init__("MOV", 0b01110, [reg_a, EmptyByteParameter(), reg_save], 4)
+            super().__init__()
             self.reg_a = reg_a
             self.reg_save = reg_save
 
-        def printInfo(self):
+        def getParams(self) -> list[Parameter]:
+            return [self.reg_a, EmptyByteParameter(), self.reg_save]
+
+        def printInfo(self, _: LabelTable):
             print(f"    {self.reg_save.getInfo()} = {self.reg_a.getInfo()}")
 
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_BYTES_4.pack_into(buffer, offset, self.opcode, self.reg_a.register_number, 0,
+                                     self.reg_save.register_number)
+
     class Compare(Instruction):
+        __slots__ = ("reg_a", "reg_b", "flags")
+        name = "CMP"
+        opcode = 0b01111
+
         def __init__(self, reg_a: RegisterParameter, reg_b: RegisterParameter, flags: int):
-            super().__init__("CMP", 0b01111, [reg_a, reg_b, Value8Parameter(flags)], 4)
+            super().__init__()
+            self.reg_a = reg_a
+            self.reg_b = reg_b
+            self.flags = flags
+
+        def getParams(self) -> list[Parameter]:
+            return [self.reg_a, self.reg_b, Value8Parameter(self.flags)]
+
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_BYTES_4.pack_into(buffer, offset, self.opcode, self.reg_a.register_number,
+                                     self.reg_b.register_number, self.flags & 0xFF)
 
     class Jump(Instruction):
+        __slots__ = ("reg",)
+        name = "JMP"
+        opcode = 0b10000
+
         def __init__(self, reg: RegisterParameter):
-            super().__init__("JMP", 0b10000, [reg, Value8Parameter(1), EmptyByteParameter()], 4)
+            super().__init__()
+            self.reg = reg
+
+        def getParams(self) -> list[Parameter]:
+            return [self.reg, Value8Parameter(1), EmptyByteParameter()]
+
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_BYTES_4.pack_into(buffer, offset, self.opcode, self.reg.register_number, 1, 0)
 
     class JumpIf(Instruction):
+        __slots__ = ("reg",)
+        name = "JMP"
+        opcode = 0b10000
+
         def __init__(self, reg: RegisterParameter):
-            super().__init__("JMP", 0b10000, [reg, Value8Parameter(0), EmptyByteParameter()], 4)
+            super().__init__()
+            self.reg = reg
+
+        def getParams(self) -> list[Parameter]:
+            return [self.reg, Value8Parameter(0), EmptyByteParameter()]
+
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_BYTES_4.pack_into(buffer, offset, self.opcode, self.reg.register_number, 0, 0)
 
     class GpuDraw(Instruction):
+        __slots__ = ("reg_a", "reg_b")
+        name = "GPU_DRAW"
+        opcode = 0b10001
+
         def __init__(self, reg_a: RegisterParameter, reg_b: RegisterParameter):
-            super().__init__("GPU_DRAW", 0b10001, [reg_a, reg_b, EmptyByteParameter()], 4)
+            super().__init__()
+            self.reg_a = reg_a
+            self.reg_b = reg_b
+
+        def getParams(self) -> list[Parameter]:
+            return [self.reg_a, self.reg_b, EmptyByteParameter()]
+
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_BYTES_4.pack_into(buffer, offset, self.opcode, self.reg_a.register_number,
+                                     self.reg_b.register_number, 0)
 
     class GpuDisplay(Instruction):
-        def __init__(self):
-            super().__init__("GPU_DISPLAY", 0b10010, [EmptyByteParameter()], 2)
+        __slots__ = ()
+        name = "GPU_DISPLAY"
+        opcode = 0b10010
+        length = 2
+
+        def getParams(self) -> list[Parameter]:
+            return [EmptyByteParameter()]
+
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_BYTES_2.pack_into(buffer, offset, self.opcode, 0)
 
     class Push(Instruction):
+        __slots__ = ("reg",)
+        name = "PUSH"
+        opcode = 0b10011
+
         def __init__(self, reg: RegisterParameter):
-            super().__init__("PUSH", 0b10011, [EmptyByteParameter(), reg, EmptyByteParameter()], 4)
+            super().__init__()
+            self.reg = reg
+
+        def getParams(self) -> list[Parameter]:
+            return [EmptyByteParameter(), self.reg, EmptyByteParameter()]
+
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_BYTES_4.pack_into(buffer, offset, self.opcode, 0, self.reg.register_number, 0)
 
     class Pop(Instruction):
+        __slots__ = ("reg",)
+        name = "POP"
+        opcode = 0b10100
+
         def __init__(self, reg: RegisterParameter):
-            super().__init__("POP", 0b10100, [EmptyByteParameter(), EmptyByteParameter(), reg], 4)
+            super().__init__()
+            self.reg = reg
+
+        def getParams(self) -> list[Parameter]:
+            return [EmptyByteParameter(), EmptyByteParameter(), self.reg]
+
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_BYTES_4.pack_into(buffer, offset, self.opcode, 0, 0, self.reg.register_number)
 
     class SetStackPointer(Instruction):
+        __slots__ = ("reg",)
+        name = "SETSP"
+        opcode = 0b10101
+        length = 2
+
         def __init__(self, reg: RegisterParameter):
-            super().__init__("SETSP", 0b10101, [reg], 2)
+            super().__init__()
             self.reg = reg
 
-        def printInfo(self):
+        def getParams(self) -> list[Parameter]:
+            return [self.reg]
+
+        def printInfo(self, _: LabelTable):
             print(f"    SP = {self.reg.getInfo()}")
 
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_BYTES_2.pack_into(buffer, offset, self.opcode, self.reg.register_number)
+
     class GetStackPointer(Instruction):
+        __slots__ = ("reg",)
+        name = "GETSP"
+        opcode = 0b10110
+
         def __init__(self, reg: RegisterParameter):
-            super().__init__("GETSP", 0b10110, [EmptyByteParameter(), EmptyByteParameter(), reg], 4)
+            super().__init__()
             self.reg = reg
 
-        def printInfo(self):
+        def getParams(self) -> list[Parameter]:
+            return [EmptyByteParameter(), EmptyByteParameter(), self.reg]
+
+        def printInfo(self, _: LabelTable):
             print(f"    {self.reg.getInfo()} = SP")
 
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_BYTES_4.pack_into(buffer, offset, self.opcode, 0, 0, self.reg.register_number)
+
     class Label(Instruction):
-        def __init__(self, label_name: str):
-            super().__init__("", 0b00000, [], 0)
-            self.label_name = label_name
+        __slots__ = ("label",)
+        length = 0
 
-        def printInfo(self):
-            print(f"{self.label_name}:")
+        def __init__(self, label: int):
+            super().__init__()
+            self.label = label
 
-        def preCompile(self, curr_addr: int, labels: dict[str, int]):
-            labels[self.label_name] = curr_addr
+        def getParams(self) -> list[Parameter]:
+            return []
+
+        def printInfo(self, labels: LabelTable):
+            print(f"{labels.getName(self.label)}:")
+
+        def encode(self, buffer: bytearray, offset: int):
+            pass
+
+        def assemble(self, assembler: Assembler):
+            assembler.label_addresses[self.label] = len(assembler.binary_code)
 
     class Value(Instruction):
+        __slots__ = ("value",)
+        length = 2
+
         def __init__(self, value: int):
-            super().__init__("", 0b00000, [], 2)
+            super().__init__()
             self.value = value
 
-        def printInfo(self):
+        def getParams(self) -> list[Parameter]:
+            return []
+
+        def printInfo(self, _: LabelTable):
             print(f"    {self.value}")
 
-        def toBytes(self, _: dict[str, int]) -> list[int]:
-            return [self.value & 0xFF, (self.value >> 8) & 0xFF]
+        def encode(self, buffer: bytearray, offset: int):
+            FORMAT_WORD.pack_into(buffer, offset, self.value & 0xFFFF)
@@ -0,0 +1,81 @@
+from typing import Optional
+
+from jaclang.generator.generator import Instruction, Registers, RegisterParameter, LabelTable
+from jaclang.generator.instructions import Instructions
+
+REGISTERS = sorted((register for register in vars(Registers).values() if type(register) is RegisterParameter),
+                   key=lambda register: register.register_number)
+
+# how an operand is stored in a packed instruction
+OPERAND_VALUE = 0
+OPERAND_REGISTER = 1
+OPERAND_LABEL = 2
+
+# instruction type -> (operand name, kind) in slot order
+operand_layouts: dict[type, list[tuple[str, int]]] = {}
+
+
+def getOperandLayout(instruction_type: type) -> list[tuple[str, int]]:
+    layout = operand_layouts.get(instruction_type)
+    if layout is None:
+        layout = []
+        for base in reversed(instruction_type.__mro__):
+            for name in base.__dict__.get("__slots__", ()):
+                if name.startswith("reg"):
+                    layout.append((name, OPERAND_REGISTER))
+                elif name == "label":
+                    layout.append((name, OPERAND_LABEL))
+                elif name != "span":
+                    layout.append((name, OPERAND_VALUE))
+        operand_layouts[instruction_type] = layout
+    return layout
+
+
+# name -> (instruction type, operand layout), looked up once per packed instruction
+INSTRUCTION_TYPES = {name: (instruction_type, getOperandLayout(instruction_type))
+                     for name, instruction_type in vars(Instructions).items()
+                     if isinstance(instruction_type, type) and issubclass(instruction_type, Instruction)}
+
+
+# instructions as plain tuples that can be stored or sent to another process, labels are numbered from 0 in the
+# order they are first used and described by (is named, name), registers by their number, spans are left out
+def packInstructions(instructions: list[Instruction], labels: LabelTable) -> (list[tuple[bool, str]], list[tuple]):
+    local_labels = {}
+    label_names = []
+    packed_instructions = []
+    for instruction in instructions:
+        operands = []
+        for name, kind in getOperandLayout(type(instruction)):
+            value = getattr(instruction, name)
+            if kind == OPERAND_REGISTER:
+                value = value.register_number
+            elif kind == OPERAND_LABEL:
+                if value not in local_labels:
+                    local_labels[value] = len(label_names)
+                    label_names.append((labels.isNamed(value), labels.names[value]))
+                value = local_labels[value]
+            operands.append(value)
+        packed_instructions.append((type(instruction).__name__, tuple(operands)))
+    return label_names, packed_instructions
+
+
+# named labels are shared with the rest of the program, the others get new ids in labels, every instruction gets
+# its span from spans or None
+def unpackInstructions(label_names: list[tuple[bool, str]], packed_instructions: list[tuple], labels: LabelTable,
+                       spans: Optional[list] = None) -> list[Instruction]:
+    label_ids = [labels.getNamed(name) if is_named else labels.createNumbered(name) for is_named, name in label_names]
+    if spans is None:
+        spans = [None] * len(packed_instructions)
+    instructions = []
+    for (type_name, operands), span in zip(packed_instructions, spans):
+        instruction_type, layout = INSTRUCTION_TYPES[type_name]
+        instruction = instruction_type.__new__(instruction_type)
+        instruction.span = span
+        for (name, kind), value in zip(layout, operands):
+            if kind == OPERAND_REGISTER:
+                value = REGISTERS[value]
+            elif kind == OPERAND_LABEL:
+                value = label_ids[value]
+            setattr(instruction, name, value)
+        instructions.append(instruction)
+    return instructions
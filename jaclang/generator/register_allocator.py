@@ -0,0 +1,22 @@
+from typing import Optional
+
+from jaclang.generator.generator import RegisterParameter, Registers
+
+
+class RegisterAllocator:
+    # registers that hold expression temporaries, callee code may overwrite all of them
+    TEMPORARY_REGISTERS = [Registers.REG1, Registers.REG2, Registers.REG3, Registers.REG4]
+
+    def __init__(self):
+        self.free_registers = list(reversed(RegisterAllocator.TEMPORARY_REGISTERS))
+
+    def allocate(self) -> Optional[RegisterParameter]:
+        if not self.free_registers:
+            return None
+        return self.free_registers.pop()
+
+    def free(self, register: RegisterParameter):
+        self.free_registers.append(register)
+
+    def getFreeCount(self) -> int:
+        return len(self.free_registers)
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
-from copy import copy
+import re
 from abc import abstractmethod
+from typing import Optional
 
 
 class Token:
     def __init__(self):
         self.pos = -1
+        self.end = -1
 
     @abstractmethod
     def getInfo(self) -> str:
@@ -15,16 +17,27 @@ class Token:
 
 class SymbolToken(Token):
     symbols = []
+    # master regex of the lexer, rebuilt when a symbol is registered
+    pattern: Optional[re.Pattern] = None
 
     def __init__(self, name: str, identifier: str):
         super().__init__()
         self.name = name
         self.identifier = identifier
         SymbolToken.symbols.append(self)
+        SymbolToken.pattern = None
 
     def getInfo(self) -> str:
         return self.name
 
+    def atPos(self, pos: int) -> SymbolToken:
+        token = object.__new__(SymbolToken)
+        token.name = self.name
+        token.identifier = self.identifier
+        token.pos = pos
+        token.end = pos + len(self.identifier)
+        return token
+
     def __hash__(self):
         return self.identifier.__hash__()
 
@@ -80,6 +93,14 @@ class KeywordToken(Token):
     def getInfo(self) -> str:
         return self.name
 
+    def atPos(self, pos: int) -> KeywordToken:
+        token = object.__new__(KeywordToken)
+        token.name = self.name
+        token.identifier = self.identifier
+        token.pos = pos
+        token.end = pos + len(self.identifier)
+        return token
+
     def __hash__(self):
         return self.identifier.__hash__()
 
@@ -143,45 +164,58 @@ class Keywords:
     WHILE = KeywordToken("WHILE", "while")
     VAR = KeywordToken("VAR", "var")
     RETURN = KeywordToken("RETURN", "return")
+    EXTERN = KeywordToken("EXTERN", "extern")
+
+
+def buildPattern() -> re.Pattern:
+    identifiers = [symbol.identifier for symbol in SymbolToken.symbols if symbol.identifier != ""]
+
+    # a word character is anything except a space or a character where some symbol begins
+    single_chars = {identifier for identifier in identifiers if len(identifier) == 1}
+    continuations = {}
+    for identifier in identifiers:
+        if len(identifier) > 1 and identifier[0] not in single_chars:
+            continuations.setdefault(identifier[0], []).append(identifier[1:])
+
+    breaking_chars = "".join(re.escape(char) for char in sorted(single_chars | continuations.keys()))
+    word_chars = [f"[^ {breaking_chars}]"]
+    for char, rests in continuations.items():
+        word_chars.append(re.escape(char) + "(?!" + "|".join(re.escape(rest) for rest in rests) + ")")
+
+    # alternatives are tried in registration order, which matches the symbol priority of SymbolToken.symbols
+    symbols = "|".join(re.escape(identifier) for identifier in identifiers)
+    return re.compile(f" +|(?P<symbol>{symbols})|(?P<word>(?:{'|'.join(word_chars)})+)")
 
 
 def tokenize(code: str, debug_output: bool = False) -> list[Token]:
+    if SymbolToken.pattern is None:
+        SymbolToken.pattern = buildPattern()
+
+    symbols = {}
+    for symbol in SymbolToken.symbols:
+        symbols.setdefault(symbol.identifier, symbol)
+    keywords = KeywordToken.keywords
+
     tokens = []
-    curr_token = ""
-
-    i = 0
-    while i < len(code):
-        curr_symbol = None
-        for symbol in SymbolToken.symbols:
-            if symbol.identifier != "" and code.startswith(symbol.identifier, i):
-                curr_symbol = copy(symbol)
-                break
-
-        if code[i] == ' ' or curr_symbol is not None:
-            if curr_token != "":
-                if curr_token.isdigit():
-                    new_token = ConstantToken(int(curr_token))
-                elif curr_token in KeywordToken.keywords.keys():
-                    new_token = KeywordToken.keywords[curr_token]
-                else:
-                    new_token = IdentifierToken(curr_token)
-                new_token.pos = i - len(curr_token)
-                curr_token = ""
-                tokens.append(new_token)
-
-            if code[i] == ' ':
-                i += 1
-
-            if curr_symbol is not None:
-                curr_symbol.pos = i
-                tokens.append(curr_symbol)
-                i += len(curr_symbol.identifier)
-        else:
-            curr_token += code[i]
-            i += 1
+    code_length = len(code)
+    for match in SymbolToken.pattern.finditer(code):
+        kind = match.lastgroup
+        if kind == "symbol":
+            tokens.append(symbols[match.group()].atPos(match.start()))
+        elif kind == "word" and match.end() != code_length:
+            # a word is only emitted once a space or a symbol ends it
+            word = match.group()
+            if word in keywords:
+                tokens.append(keywords[word].atPos(match.start()))
+                continue
+            new_token = ConstantToken(int(word)) if word.isdigit() else IdentifierToken(word)
+            new_token.pos = match.start()
+            new_token.end = match.end()
+            tokens.append(new_token)
 
     end_token = EndToken()
     end_token.pos = len(code)
+    end_token.end = len(code)
     tokens.append(end_token)
     if debug_output:
         print("Generated tokens:")
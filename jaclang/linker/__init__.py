@@ -0,0 +1,2 @@
+from jaclang.linker.object_file import ObjectFile, generateObject
+from jaclang.linker.linker import link
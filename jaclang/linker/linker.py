@@ -0,0 +1,129 @@
+from bisect import bisect_right
+from typing import Optional
+
+from jaclang.error.link_error import JaclangLinkError
+from jaclang.generator import Instructions, Registers, LabelTable
+from jaclang.generator.generator import FORMAT_WORD
+from jaclang.linker.object_file import ObjectFile, generateObject
+
+ADDRESS_SPACE_SIZE = 0x10000
+
+
+class Section:
+    # the code of an object from one symbol to the next, which is one function or one global variable
+    def __init__(self, object_file: ObjectFile, object_index: int, begin: int, end: int):
+        self.object_file = object_file
+        # position of the object on the command line, the same object can be given twice
+        self.object_index = object_index
+        self.begin = begin
+        self.end = end
+        self.symbols: list[str] = []
+        self.relocations: list[tuple[int, Optional[str], int]] = []
+        # address in the image, None while the section is not placed
+        self.address: Optional[int] = None
+        self.used = False
+
+
+# calls main and stops once it returns, like the start code of a program compiled in one piece
+def generateStartObject() -> ObjectFile:
+    labels = LabelTable()
+    return_label = labels.createNumbered("jump")
+    return generateObject([
+        Instructions.ImmediateLabel(Registers.ADDRESS, return_label),
+        Instructions.Push(Registers.ADDRESS),
+        Instructions.ImmediateLabel(Registers.ADDRESS, labels.getNamed("func main")),
+        Instructions.Jump(Registers.ADDRESS),
+        Instructions.Label(return_label),
+        Instructions.Terminate(),
+    ], labels, "start code")
+
+
+def splitSections(object_file: ObjectFile, object_index: int) -> list[Section]:
+    begins = sorted({0} | {offset for offset in object_file.symbols.values() if offset is not None})
+    sections = [Section(object_file, object_index, begin, end)
+                for begin, end in zip(begins, begins[1:] + [len(object_file.code)])]
+    for name, offset in object_file.symbols.items():
+        if offset is not None:
+            sections[bisect_right(begins, offset) - 1].symbols.append(name)
+    for relocation in object_file.relocations:
+        sections[bisect_right(begins, relocation[0]) - 1].relocations.append(relocation)
+    return sections
+
+
+def getTargetSection(section: Section, sections: list[Section], address: int) -> Section:
+    # an address right at the end of the section still belongs to it, like a label after the last instruction
+    if section.begin <= address <= section.end:
+        return section
+    return sections[bisect_right([other.begin for other in sections], address) - 1]
+
+
+def printLinkMap(sections: list[Section], removed_count: int):
+    print("Link map:")
+    print("---------------------------------")
+    for section in sections:
+        print(f"    {section.address:>5} {section.end - section.begin:>5}B {section.object_file.name}: "
+              f"{', '.join(section.symbols) if section.symbols else '-'}")
+    print(f"    removed {removed_count} unused sections")
+    print("---------------------------------")
+
+
+def link(objects: list[ObjectFile], debug_output: bool = False) -> bytearray:
+    objects = [generateStartObject()] + objects
+    sections_by_object = [splitSections(object_file, i) for i, object_file in enumerate(objects)]
+
+    # symbol name -> section it is defined in
+    definitions: dict[str, Section] = {}
+    for sections in sections_by_object:
+        for section in sections:
+            for name in section.symbols:
+                if name in definitions:
+                    raise JaclangLinkError(f"Symbol '{name}' is defined in both "
+                                           f"'{definitions[name].object_file.name}' and '{section.object_file.name}'")
+                definitions[name] = section
+    for object_file in objects:
+        for name, offset in object_file.symbols.items():
+            if offset is None and name not in definitions:
+                raise JaclangLinkError(f"Undefined symbol '{name}' used in '{object_file.name}'")
+
+    # only sections reachable from the start code end up in the image, unused library functions are left out
+    stack = [sections_by_object[0][0]]
+    while stack:
+        section = stack.pop()
+        if section.used:
+            continue
+        section.used = True
+        sections = sections_by_object[section.object_index]
+        for _, name, local_address in section.relocations:
+            if name is None:
+                stack.append(getTargetSection(section, sections, local_address))
+            else:
+                stack.append(definitions[name])
+
+    image = bytearray()
+    placed_sections = []
+    for sections in sections_by_object:
+        for section in sections:
+            if section.used:
+                section.address = len(image)
+                image += section.object_file.code[section.begin:section.end]
+                placed_sections.append(section)
+    if len(image) > ADDRESS_SPACE_SIZE:
+        raise JaclangLinkError(f"Program is {len(image)} bytes, which doesn't fit into the address space of "
+                               f"{ADDRESS_SPACE_SIZE} bytes")
+
+    for sections in sections_by_object:
+        for section in sections:
+            if not section.used:
+                continue
+            for offset, name, local_address in section.relocations:
+                if name is None:
+                    target = getTargetSection(section, sections, local_address)
+                    address = target.address + local_address - target.begin
+                else:
+                    target = definitions[name]
+                    address = target.address + target.object_file.symbols[name] - target.begin
+                FORMAT_WORD.pack_into(image, section.address + offset - section.begin, address & 0xFFFF)
+
+    if debug_output:
+        printLinkMap(placed_sections, sum(map(len, sections_by_object)) - len(placed_sections))
+    return image
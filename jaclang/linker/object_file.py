@@ -0,0 +1,114 @@
+from struct import Struct, error as StructError
+from typing import Optional
+
+from jaclang.error.link_error import JaclangLinkError
+from jaclang.error.syntax_error import JaclangSyntaxError
+from jaclang.generator import Instruction, Instructions, LabelTable, Assembler, printAssembly
+
+# bump the last byte when the layout changes
+OBJECT_MAGIC = b"JLO\x01"
+# magic, code size, symbol count, relocation count
+FORMAT_HEADER = Struct("<4sIII")
+# offset of the definition, length of the name that follows
+FORMAT_SYMBOL = Struct("<IH")
+# offset of the address in the code, index of the symbol plus one or 0 and the address in the same object
+FORMAT_RELOCATION = Struct("<III")
+UNDEFINED_OFFSET = 0xFFFFFFFF
+
+
+class ObjectFile:
+    def __init__(self, name: str):
+        # shown in link errors, usually the path the object was read from
+        self.name = name
+        self.code = bytearray()
+        # symbol name like "func main" -> offset of its definition, None for symbols defined in other objects
+        self.symbols: dict[str, Optional[int]] = {}
+        # (offset of a 16 bit address in the code, symbol it points to or None for a label without a name, address
+        # relative to the beginning of this object for None), an object can be larger than the address space until
+        # unused code is left out
+        self.relocations: list[tuple[int, Optional[str], int]] = []
+
+    def toBytes(self) -> bytes:
+        parts = [FORMAT_HEADER.pack(OBJECT_MAGIC, len(self.code), len(self.symbols), len(self.relocations)),
+                 bytes(self.code)]
+        symbol_indices = {}
+        for name, offset in self.symbols.items():
+            symbol_indices[name] = len(symbol_indices) + 1
+            encoded_name = name.encode()
+            parts.append(FORMAT_SYMBOL.pack(UNDEFINED_OFFSET if offset is None else offset, len(encoded_name)))
+            parts.append(encoded_name)
+        for offset, name, local_address in self.relocations:
+            parts.append(FORMAT_RELOCATION.pack(offset, 0 if name is None else symbol_indices[name], local_address))
+        return b"".join(parts)
+
+    @staticmethod
+    def fromBytes(data: bytes, name: str) -> "ObjectFile":
+        object_file = ObjectFile(name)
+        try:
+            magic, code_size, symbol_count, relocation_count = FORMAT_HEADER.unpack_from(data, 0)
+            if magic != OBJECT_MAGIC:
+                raise JaclangLinkError(f"'{name}' is not a jaclang object file")
+            pos = FORMAT_HEADER.size
+            object_file.code = bytearray(data[pos:pos + code_size])
+            pos += code_size
+
+            symbol_names = [None]
+            for _ in range(symbol_count):
+                offset, name_length = FORMAT_SYMBOL.unpack_from(data, pos)
+                pos += FORMAT_SYMBOL.size
+                symbol_name = data[pos:pos + name_length].decode()
+                pos += name_length
+                object_file.symbols[symbol_name] = None if offset == UNDEFINED_OFFSET else offset
+                symbol_names.append(symbol_name)
+
+            for _ in range(relocation_count):
+                offset, symbol_index, local_address = FORMAT_RELOCATION.unpack_from(data, pos)
+                pos += FORMAT_RELOCATION.size
+                object_file.relocations.append((offset, symbol_names[symbol_index], local_address))
+        except (StructError, IndexError, UnicodeDecodeError):
+            raise JaclangLinkError(f"'{name}' is not a valid jaclang object file")
+        return object_file
+
+    def write(self, path: str):
+        with open(path, "wb") as file:
+            file.write(self.toBytes())
+
+    @staticmethod
+    def read(path: str) -> "ObjectFile":
+        with open(path, "rb") as file:
+            return ObjectFile.fromBytes(file.read(), path)
+
+
+# assembles code that can refer to symbols of other objects, every label load becomes a relocation
+def generateObject(instructions: list[Instruction], labels: LabelTable, name: str, debug_output: bool = False) -> \
+        ObjectFile:
+    if debug_output:
+        printAssembly(instructions, labels)
+
+    assembler = Assembler(labels)
+    label_loads = []
+    for instruction in instructions:
+        if type(instruction) is Instructions.ImmediateLabel:
+            label_loads.append((len(assembler.binary_code) + 2, instruction))
+        instruction.assemble(assembler)
+
+    object_file = ObjectFile(name)
+    object_file.code = assembler.binary_code
+    for label, address in enumerate(assembler.label_addresses):
+        if address is not None and labels.isNamed(label):
+            object_file.symbols[labels.names[label]] = address
+
+    for offset, instruction in label_loads:
+        address = assembler.label_addresses[instruction.label]
+        if labels.isNamed(instruction.label):
+            # symbols of this object are referred to by name too, the address of a function is also the end of the
+            # section before it, so the address alone doesn't tell which section is meant
+            symbol_name = labels.names[instruction.label]
+            object_file.symbols.setdefault(symbol_name, None)
+            object_file.relocations.append((offset, symbol_name, 0))
+        elif address is not None:
+            object_file.relocations.append((offset, None, address))
+        else:
+            raise JaclangSyntaxError(instruction.span[0] if instruction.span is not None else -1,
+                                     f"Undefined symbol '{labels.getName(instruction.label)}'")
+    return object_file
@@ -0,0 +1,3 @@
+from jaclang.optimizer.cfg import ControlFlowGraph, BasicBlock
+from jaclang.optimizer.passes import optimize, Pass, PassManager, FunctionOptimizer, getPasses
+from jaclang.optimizer.peephole import PeepholePattern
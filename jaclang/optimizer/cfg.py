@@ -0,0 +1,197 @@
+from typing import Optional
+
+from jaclang.generator import Instruction, Instructions, Registers
+
+# registers are tracked as bit masks, bit n stands for register number n
+ALL_REGISTERS = 0xFF
+# the only jumps to unknown addresses are returns, and callers keep nothing in registers across a call
+# except for the returned value and their stack base, which the callee restores
+LIVE_AFTER_RETURN = 1 << Registers.RETURN.register_number | 1 << Registers.STACK_BASE.register_number
+
+PURE_INSTRUCTIONS = (Instructions.Add, Instructions.Subtract, Instructions.BitShiftLeft, Instructions.BitShiftRight,
+                     Instructions.Or, Instructions.And, Instructions.Xor, Instructions.Not, Instructions.Xnor,
+                     Instructions.Nand, Instructions.MemRead, Instructions.Immediate, Instructions.ImmediateLabel,
+                     Instructions.Mov, Instructions.Compare, Instructions.GetStackPointer)
+
+
+def getWrittenRegister(instruction: Instruction) -> Optional[int]:
+    if type(instruction) is Instructions.Compare:
+        return Registers.RETURN.register_number
+    if type(instruction) in (Instructions.Pop, Instructions.GetStackPointer):
+        return instruction.reg.register_number
+    if hasattr(instruction, "reg_save"):
+        return instruction.reg_save.register_number
+    return None
+
+
+def getReadRegisters(instruction: Instruction) -> int:
+    instruction_type = type(instruction)
+    if instruction_type in (Instructions.Pop, Instructions.GetStackPointer, Instructions.Immediate,
+                            Instructions.ImmediateLabel, Instructions.Label, Instructions.Value):
+        return 0
+    if instruction_type is Instructions.Terminate:
+        # the return code of the program is read from the return register
+        return 1 << Registers.RETURN.register_number
+    if instruction_type is Instructions.JumpIf:
+        return 1 << instruction.reg.register_number | 1 << Registers.RETURN.register_number
+    if instruction_type in (Instructions.Jump, Instructions.Push, Instructions.SetStackPointer):
+        return 1 << instruction.reg.register_number
+
+    mask = 0
+    for name in ("reg_a", "reg_b", "reg_addr", "reg_value"):
+        if hasattr(instruction, name):
+            mask |= 1 << getattr(instruction, name).register_number
+    return mask
+
+
+class BasicBlock:
+    def __init__(self, instructions: list[Instruction]):
+        # labels at the beginning of the block are included
+        self.instructions = instructions
+        # edges are None until ControlFlowGraph.computeEdges, large programs have many blocks that never need them
+        self.successors: Optional[list["BasicBlock"]] = None
+        # labels this block loads into a register, the blocks they name can be jumped to from anywhere later
+        self.referenced_labels: Optional[list[int]] = None
+        # ends with a jump to an address that is not known at compile time, like a return
+        self.has_unknown_jump = False
+        self.live_in = ALL_REGISTERS
+        self.live_out = ALL_REGISTERS
+
+    def getLabels(self) -> list[int]:
+        labels = []
+        for instruction in self.instructions:
+            if type(instruction) is not Instructions.Label:
+                break
+            labels.append(instruction.label)
+        return labels
+
+    # blocks with values hold global variables, they are never executed
+    def isData(self) -> bool:
+        return any(type(instruction) is Instructions.Value for instruction in self.instructions)
+
+    def fallsThrough(self) -> bool:
+        return not self.instructions or type(self.instructions[-1]) not in (Instructions.Jump, Instructions.Terminate)
+
+
+class ControlFlowGraph:
+    def __init__(self, blocks: list[BasicBlock]):
+        # blocks are kept in program order, the first one is where execution starts
+        self.blocks = blocks
+
+    @staticmethod
+    def fromInstructions(instructions: list[Instruction]) -> "ControlFlowGraph":
+        blocks = []
+        current = []
+        for instruction in instructions:
+            if type(instruction) is Instructions.Label and current and type(current[-1]) is not Instructions.Label:
+                blocks.append(BasicBlock(current))
+                current = []
+            current.append(instruction)
+            if type(instruction) in (Instructions.Jump, Instructions.JumpIf, Instructions.Terminate):
+                blocks.append(BasicBlock(current))
+                current = []
+        if current:
+            blocks.append(BasicBlock(current))
+        return ControlFlowGraph(blocks)
+
+    def toInstructions(self) -> list[Instruction]:
+        instructions = []
+        for block in self.blocks:
+            instructions += block.instructions
+        return instructions
+
+    def getSize(self) -> (int, int):
+        instruction_count = 0
+        byte_count = 0
+        for block in self.blocks:
+            for instruction in block.instructions:
+                instruction_count += instruction.length != 0
+                byte_count += instruction.length
+        return instruction_count, byte_count
+
+    # edges are only computed for the analyses that need them, passes that rebuild the graph don't
+    def computeEdges(self):
+        block_by_label = {}
+        for block in self.blocks:
+            for label in block.getLabels():
+                block_by_label[label] = block
+
+        for i, block in enumerate(self.blocks):
+            block.successors = []
+            block.referenced_labels = []
+            block.has_unknown_jump = False
+            # register number -> label it was loaded with
+            loaded_labels = {}
+            for instruction in block.instructions:
+                if type(instruction) in (Instructions.Jump, Instructions.JumpIf):
+                    target = block_by_label.get(loaded_labels.get(instruction.reg.register_number))
+                    if target is None:
+                        block.has_unknown_jump = True
+                    else:
+                        block.successors.append(target)
+                if type(instruction) is Instructions.ImmediateLabel:
+                    block.referenced_labels.append(instruction.label)
+                    loaded_labels[instruction.reg_save.register_number] = instruction.label
+                else:
+                    loaded_labels.pop(getWrittenRegister(instruction), None)
+
+            # global variables are never executed, so they don't lead into the function after them
+            if block.fallsThrough() and not block.isData():
+                if i + 1 < len(self.blocks):
+                    block.successors.append(self.blocks[i + 1])
+                else:
+                    # a function without a return runs into the code placed after it, which is not in the graph
+                    # when the function is optimized on its own
+                    block.has_unknown_jump = True
+
+    # entry_labels name blocks that are entered from outside, like the functions an object exports
+    def getReachableBlocks(self, entry_labels: list[int] = ()) -> set[BasicBlock]:
+        self.computeEdges()
+        block_by_label = {}
+        for block in self.blocks:
+            for label in block.getLabels():
+                block_by_label[label] = block
+
+        reachable = set()
+        stack = [self.blocks[0]] if self.blocks else []
+        stack += [block_by_label[label] for label in entry_labels if label in block_by_label]
+        while stack:
+            block = stack.pop()
+            if block in reachable:
+                continue
+            reachable.add(block)
+            stack += block.successors
+            # a loaded label can be jumped to later, like the return address of a call
+            stack += [block_by_label[label] for label in block.referenced_labels if label in block_by_label]
+        return reachable
+
+    def computeLiveness(self):
+        self.computeEdges()
+        for block in self.blocks:
+            block.live_in = 0
+            block.live_out = 0
+
+        changed = True
+        while changed:
+            changed = False
+            for block in reversed(self.blocks):
+                if block.isData():
+                    live_in = ALL_REGISTERS
+                else:
+                    live = LIVE_AFTER_RETURN if block.has_unknown_jump else 0
+                    for successor in block.successors:
+                        live |= successor.live_in
+                    block.live_out = live
+                    live_in = self.getLiveBefore(block.instructions, live)
+                if live_in != block.live_in:
+                    block.live_in = live_in
+                    changed = True
+
+    @staticmethod
+    def getLiveBefore(instructions: list[Instruction], live: int) -> int:
+        for instruction in reversed(instructions):
+            written = getWrittenRegister(instruction)
+            if written is not None:
+                live &= ~(1 << written)
+            live |= getReadRegisters(instruction)
+        return live
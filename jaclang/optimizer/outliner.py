@@ -0,0 +1,174 @@
+from jaclang.generator import Instruction, Instructions, Registers, LabelTable
+from jaclang.generator.packing import getOperandLayout, OPERAND_REGISTER
+from jaclang.optimizer.cfg import ControlFlowGraph, getWrittenRegister, getReadRegisters
+
+# an outlined sequence is called with the return address in a link register, which it jumps back to:
+# "link = return label, RADDR = sequence label, JMP RADDR" at every call and "JMP link" after the sequence
+CALL_SIZE = 12
+RETURN_SIZE = 4
+MIN_SEQUENCE_LENGTH = 3
+MAX_SEQUENCE_LENGTH = 24
+# tried in this order, the address register is used for the call and the stack base is live everywhere
+LINK_REGISTERS = [Registers.REG1, Registers.REG2, Registers.REG3, Registers.REG4, Registers.EXPRESSION,
+                  Registers.RETURN]
+ADDRESS_MASK = 1 << Registers.ADDRESS.register_number
+
+
+def canOutline(instruction: Instruction) -> bool:
+    if type(instruction) in (Instructions.Label, Instructions.Jump, Instructions.JumpIf, Instructions.Terminate,
+                             Instructions.Value):
+        return False
+    return not getUsedRegisters(instruction) & ADDRESS_MASK
+
+
+def getUsedRegisters(instruction: Instruction) -> int:
+    written = getWrittenRegister(instruction)
+    return getReadRegisters(instruction) | (1 << written if written is not None else 0)
+
+
+# equal for instructions that do the same, labels are compared by id, which is shared by the whole program
+def getInstructionKey(instruction: Instruction) -> tuple:
+    operands = []
+    for name, kind in getOperandLayout(type(instruction)):
+        value = getattr(instruction, name)
+        operands.append(value.register_number if kind == OPERAND_REGISTER else value)
+    return (type(instruction), tuple(operands))
+
+
+class Candidate:
+    def __init__(self, positions: list[int], length: int, size: int, used_registers: int):
+        # indices of the first instruction of every occurrence, in program order
+        self.positions = positions
+        self.length = length
+        self.size = size
+        self.used_registers = used_registers
+
+
+def getBenefit(occurrence_count: int, size: int) -> int:
+    return occurrence_count * (size - CALL_SIZE) - size - RETURN_SIZE
+
+
+# repeated sequences of instructions that don't change control flow become subroutines at the end of the code
+def outlineSequences(graph: ControlFlowGraph, labels: LabelTable) -> ControlFlowGraph:
+    graph.computeLiveness()
+    instructions = []
+    # registers live after each instruction
+    live_after = []
+    runs = []
+    for block in graph.blocks:
+        block_begin = len(instructions)
+        instructions += block.instructions
+        block_live_after = [None] * len(block.instructions)
+        live = block.live_out
+        for i in range(len(block.instructions) - 1, -1, -1):
+            instruction = block.instructions[i]
+            block_live_after[i] = live
+            written = getWrittenRegister(instruction)
+            if written is not None:
+                live &= ~(1 << written)
+            live |= getReadRegisters(instruction)
+        live_after += block_live_after
+        if block.isData():
+            continue
+
+        run_begin = None
+        for i, instruction in enumerate(block.instructions + [None]):
+            if instruction is not None and canOutline(instruction):
+                if run_begin is None:
+                    run_begin = block_begin + i
+            elif run_begin is not None:
+                runs.append((run_begin, block_begin + i))
+                run_begin = None
+
+    # every sequence is found by its instruction keys, occurrences may overlap until they are chosen
+    key_ids = {}
+    instruction_ids = [None] * len(instructions)
+    for begin, end in runs:
+        for i in range(begin, end):
+            instruction_ids[i] = key_ids.setdefault(getInstructionKey(instructions[i]), len(key_ids))
+    occurrences: dict[tuple, list[int]] = {}
+    for begin, end in runs:
+        for i in range(begin, end):
+            for length in range(MIN_SEQUENCE_LENGTH, min(MAX_SEQUENCE_LENGTH, end - i) + 1):
+                occurrences.setdefault(tuple(instruction_ids[i:i + length]), []).append(i)
+
+    candidates = []
+    for key, positions in occurrences.items():
+        if len(positions) < 2:
+            continue
+        length = len(key)
+        sequence = instructions[positions[0]:positions[0] + length]
+        size = sum(instruction.length for instruction in sequence)
+        if getBenefit(len(positions), size) <= 0:
+            continue
+        used_registers = 0
+        for instruction in sequence:
+            used_registers |= getUsedRegisters(instruction)
+        candidates.append(Candidate(positions, length, size, used_registers))
+    # the most saved bytes first, ties by position so the result doesn't depend on the order of the dictionary
+    candidates.sort(key=lambda candidate: (-getBenefit(len(candidate.positions), candidate.size),
+                                           candidate.positions[0]))
+
+    taken = [False] * len(instructions)
+    # first instruction of an occurrence -> (length, subroutine label, link register)
+    calls = {}
+    subroutines = []
+    for candidate in candidates:
+        # the address register and the link register are overwritten by the call, both have to be dead after it
+        best = None
+        for link_register in LINK_REGISTERS:
+            link_mask = 1 << link_register.register_number
+            if candidate.used_registers & link_mask:
+                continue
+            positions = []
+            next_free = 0
+            for position in candidate.positions:
+                end = position + candidate.length
+                if position < next_free or any(taken[position:end]) or \
+                        live_after[end - 1] & (link_mask | ADDRESS_MASK):
+                    continue
+                positions.append(position)
+                next_free = end
+            if best is None or len(positions) > len(best[1]):
+                best = (link_register, positions)
+        if best is None or getBenefit(len(best[1]), candidate.size) <= 0:
+            continue
+
+        link_register, positions = best
+        label = labels.createNumbered("outlined")
+        subroutines.append((label, positions[0], candidate.length, link_register))
+        for position in positions:
+            calls[position] = (candidate.length, label, link_register)
+            for i in range(position, position + candidate.length):
+                taken[i] = True
+
+    # the subroutines go after the last instruction, which must not fall through into them
+    last_instructions = [instruction for instruction in instructions if instruction.length != 0]
+    if not calls or type(last_instructions[-1]) not in (Instructions.Jump, Instructions.Terminate, Instructions.Value):
+        return graph
+
+    result = []
+    i = 0
+    while i < len(instructions):
+        if i not in calls:
+            result.append(instructions[i])
+            i += 1
+            continue
+        length, label, link_register = calls[i]
+        return_label = labels.createNumbered("outlined return")
+        call = [Instructions.ImmediateLabel(link_register, return_label),
+                Instructions.ImmediateLabel(Registers.ADDRESS, label),
+                Instructions.Jump(Registers.ADDRESS),
+                Instructions.Label(return_label)]
+        for instruction in call:
+            instruction.span = instructions[i].span
+        result += call
+        i += length
+
+    for label, position, length, link_register in subroutines:
+        sequence = [Instructions.Label(label)] + instructions[position:position + length] + \
+            [Instructions.Jump(link_register)]
+        sequence[0].span = sequence[1].span
+        sequence[-1].span = sequence[-2].span
+        result += sequence
+    return ControlFlowGraph.fromInstructions(result)
@@ -0,0 +1,250 @@
+from abc import abstractmethod
+from typing import Optional
+
+from jaclang.generator import Instruction, Instructions, Registers, LabelTable
+from jaclang.optimizer.cfg import ControlFlowGraph, PURE_INSTRUCTIONS, getWrittenRegister, getReadRegisters
+from jaclang.optimizer.outliner import outlineSequences
+from jaclang.optimizer.peephole import PeepholePattern, JumpToNextPattern, applyPatterns, createPatterns, \
+    printPatternReport
+
+
+class Pass:
+    def __init__(self, name: str):
+        self.name = name
+        self.instructions_removed = 0
+        self.bytes_saved = 0
+
+    # returns the graph after the pass, which may be a rebuilt one
+    @abstractmethod
+    def run(self, graph: ControlFlowGraph) -> ControlFlowGraph:
+        pass
+
+
+class PeepholePass(Pass):
+    def __init__(self, name: str = "peephole patterns", patterns: Optional[list[PeepholePattern]] = None):
+        super().__init__(name)
+        self.patterns: list[PeepholePattern] = createPatterns() if patterns is None else patterns
+
+    def run(self, graph: ControlFlowGraph) -> ControlFlowGraph:
+        # the patterns work on the linear code, they also look across block boundaries
+        return ControlFlowGraph.fromInstructions(applyPatterns(graph.toInstructions(), self.patterns))
+
+
+class UnreachableBlockPass(Pass):
+    def __init__(self, entry_labels: list[int] = (), name: str = "unreachable blocks"):
+        super().__init__(name)
+        self.entry_labels = entry_labels
+
+    def run(self, graph: ControlFlowGraph) -> ControlFlowGraph:
+        # this also removes functions whose every call was inlined
+        reachable = graph.getReachableBlocks(self.entry_labels)
+        blocks = [block for block in graph.blocks if block in reachable or block.isData()]
+        if len(blocks) == len(graph.blocks):
+            return graph
+        return ControlFlowGraph(blocks)
+
+
+class DeadRegisterWritePass(Pass):
+    def __init__(self):
+        super().__init__("dead register writes")
+
+    def run(self, graph: ControlFlowGraph) -> ControlFlowGraph:
+        graph.computeLiveness()
+        for block in graph.blocks:
+            if block.isData():
+                continue
+            live = block.live_out
+            kept = []
+            for instruction in reversed(block.instructions):
+                written = getWrittenRegister(instruction)
+                if type(instruction) in PURE_INSTRUCTIONS and not live & 1 << written:
+                    continue
+                if written is not None:
+                    live &= ~(1 << written)
+                live |= getReadRegisters(instruction)
+                kept.append(instruction)
+            kept.reverse()
+            block.instructions = kept
+        return graph
+
+
+# the instructions every return leaves the frame with, see ReturnStatementBranch
+def isEpilogue(instructions: list[Instruction], i: int) -> bool:
+    if i + 5 > len(instructions):
+        return False
+    pop_base, set_stack_pointer, mov, pop_return, jump = instructions[i:i + 5]
+    return type(pop_base) is Instructions.Pop and pop_base.reg is Registers.ADDRESS and \
+        type(set_stack_pointer) is Instructions.SetStackPointer and set_stack_pointer.reg is Registers.STACK_BASE and \
+        type(mov) is Instructions.Mov and mov.reg_a is Registers.ADDRESS and mov.reg_save is Registers.STACK_BASE and \
+        type(pop_return) is Instructions.Pop and pop_return.reg is Registers.ADDRESS and \
+        type(jump) is Instructions.Jump and jump.reg is Registers.ADDRESS
+
+
+class SharedEpiloguePass(Pass):
+    def __init__(self, labels: LabelTable):
+        super().__init__("shared function epilogues")
+        self.labels = labels
+
+    def run(self, graph: ControlFlowGraph) -> ControlFlowGraph:
+        instructions = graph.toInstructions()
+        # positions of the epilogues of each function, the code before the first function is its own group
+        epilogues = [[]]
+        for i, instruction in enumerate(instructions):
+            if type(instruction) is Instructions.Label and self.labels.isNamed(instruction.label) and \
+                    self.labels.names[instruction.label].startswith("func "):
+                epilogues.append([])
+            elif isEpilogue(instructions, i):
+                epilogues[-1].append(i)
+
+        # every return of a function jumps to its last epilogue, which takes 8 bytes instead of 18
+        replaced = {}
+        for positions in epilogues:
+            if len(positions) < 2:
+                continue
+            shared = positions[-1]
+            shared_label = self.labels.createNumbered("epilogue")
+            replaced[shared] = [Instructions.Label(shared_label)] + instructions[shared:shared + 5]
+            for i in positions[:-1]:
+                span = instructions[i].span
+                replaced[i] = [Instructions.ImmediateLabel(Registers.ADDRESS, shared_label),
+                               Instructions.Jump(Registers.ADDRESS)]
+                for instruction in replaced[i]:
+                    instruction.span = span
+        if not replaced:
+            return graph
+
+        result = []
+        i = 0
+        while i < len(instructions):
+            if i in replaced:
+                result += replaced[i]
+                i += 5
+            else:
+                result.append(instructions[i])
+                i += 1
+        return ControlFlowGraph.fromInstructions(result)
+
+
+class OutliningPass(Pass):
+    def __init__(self, labels: LabelTable):
+        super().__init__("outlined repeated sequences")
+        self.labels = labels
+
+    def run(self, graph: ControlFlowGraph) -> ControlFlowGraph:
+        # outlined sequences keep registers across their call, so the liveness of the other passes would be wrong
+        # for them, this pass only runs once all the others are done
+        return outlineSequences(graph, self.labels)
+
+
+class PassManager:
+    def __init__(self, passes: list[Pass], final_passes: list[Pass] = ()):
+        self.passes = passes
+        # run once after the others are done, the code they leave breaks assumptions the others make
+        self.final_passes = final_passes
+
+    # runs one pass and records what it removed, returns the new graph and whether the pass changed anything
+    @staticmethod
+    def runPass(optimization_pass: Pass, graph: ControlFlowGraph) -> (ControlFlowGraph, bool):
+        instructions_before, bytes_before = graph.getSize()
+        graph = optimization_pass.run(graph)
+        instructions_after, bytes_after = graph.getSize()
+        optimization_pass.instructions_removed += instructions_before - instructions_after
+        optimization_pass.bytes_saved += bytes_before - bytes_after
+        return graph, instructions_after != instructions_before
+
+    def run(self, instructions: list[Instruction]) -> list[Instruction]:
+        if not self.passes and not self.final_passes:
+            return instructions
+        graph = ControlFlowGraph.fromInstructions(instructions)
+        # passes can expose each other and themselves, like a removed dead write making the write before it dead,
+        # so they are repeated in turn until every pass, including the last one that changed something, changes nothing
+        runs_without_change = 0
+        i = 0
+        while runs_without_change < len(self.passes):
+            graph, changed = self.runPass(self.passes[i % len(self.passes)], graph)
+            runs_without_change = 0 if changed else runs_without_change + 1
+            i += 1
+        for optimization_pass in self.final_passes:
+            graph, _ = self.runPass(optimization_pass, graph)
+        return graph.toInstructions()
+
+
+def printPassReport(passes: list[Pass]):
+    print("Optimizer:")
+    print("---------------------------------")
+    print(f"{'pass':<44}{'instructions':>13}{'bytes':>7}")
+    for optimization_pass in passes:
+        print(f"{optimization_pass.name:<44}{optimization_pass.instructions_removed:>13}"
+              f"{optimization_pass.bytes_saved:>7}")
+    for optimization_pass in passes:
+        if type(optimization_pass) is PeepholePass:
+            print("---------------------------------")
+            printPatternReport(optimization_pass.patterns)
+    print("---------------------------------")
+
+
+# with size_labels, which new labels are created in, the passes of -Os are added
+def getPasses(optimization_level: int, entry_labels: list[int] = (), size_labels: Optional[LabelTable] = None) -> \
+        list[Pass]:
+    if optimization_level <= 0:
+        return []
+    if optimization_level == 1:
+        return [PeepholePass()]
+    passes = [UnreachableBlockPass(entry_labels), DeadRegisterWritePass(), PeepholePass()]
+    if size_labels is not None:
+        passes.append(SharedEpiloguePass(size_labels))
+    return passes
+
+
+class FunctionOptimizer:
+    # optimizes each function on its own right after it is generated, so the optimized code can be cached with it,
+    # the labels are the ones the function is generated with, new labels of -Os are created there
+    def __init__(self, optimization_level: int, size_optimized: bool, labels: LabelTable):
+        self.optimization_level = optimization_level
+        self.size_optimized = size_optimized
+        self.labels = labels
+        self.manager = PassManager(getPasses(optimization_level, (), labels if size_optimized else None))
+
+    def optimize(self, instructions: list[Instruction]) -> list[Instruction]:
+        return self.manager.run(instructions)
+
+    # the passes and peephole patterns, which all count what they removed
+    def getCounters(self) -> list:
+        counters = []
+        for optimization_pass in self.manager.passes:
+            counters.append(optimization_pass)
+            if type(optimization_pass) is PeepholePass:
+                counters += optimization_pass.patterns
+        return counters
+
+    # what was removed, as plain numbers that a worker process can send back
+    def getStatistics(self) -> list[tuple[int, int]]:
+        return [(counter.instructions_removed, counter.bytes_saved) for counter in self.getCounters()]
+
+    def addStatistics(self, statistics: list[tuple[int, int]]):
+        for counter, (instructions_removed, bytes_saved) in zip(self.getCounters(), statistics):
+            counter.instructions_removed += instructions_removed
+            counter.bytes_saved += bytes_saved
+
+
+# the functions were already optimized by function_optimizer, what is left is what only the whole program shows:
+# functions whose every call was inlined, tail calls of the function placed right after and, with -Os, code repeated
+# across functions
+def optimize(instructions: list[Instruction], function_optimizer: FunctionOptimizer, debug_output: bool = False,
+             entry_labels: list[int] = ()) -> list[Instruction]:
+    optimization_level = function_optimizer.optimization_level
+    passes = []
+    final_passes = []
+    if optimization_level >= 2:
+        passes.append(UnreachableBlockPass(entry_labels, "unreachable functions"))
+    # with entry labels the code is an object, the linker places each of its functions on its own and can leave out
+    # or move the function after, so a jump to it can't become a fall through
+    if optimization_level >= 1 and not entry_labels:
+        passes.append(PeepholePass("jumps to the next function", [JumpToNextPattern()]))
+    if optimization_level >= 1 and function_optimizer.size_optimized:
+        final_passes.append(OutliningPass(function_optimizer.labels))
+    instructions = PassManager(passes, final_passes).run(instructions)
+
+    if debug_output:
+        printPassReport(function_optimizer.manager.passes + passes + final_passes)
+    return instructions
@@ -0,0 +1,231 @@
+from abc import abstractmethod
+from typing import Optional
+
+from jaclang.generator import Instruction, Instructions, Registers
+from jaclang.generator.generator import RegisterParameter
+from jaclang.optimizer.cfg import getWrittenRegister
+
+
+def isSameRegister(reg_a: RegisterParameter, reg_b: RegisterParameter) -> bool:
+    return reg_a.register_number == reg_b.register_number
+
+
+def withSpan(instruction: Instruction, span: Optional[tuple[int, int]]) -> Instruction:
+    instruction.span = span
+    return instruction
+
+
+class PeepholePattern:
+    patterns = []
+
+    def __init__(self, name: str):
+        self.name = name
+        self.instructions_removed = 0
+        self.bytes_saved = 0
+
+    @abstractmethod
+    def apply(self, instructions: list[Instruction]) -> list[Instruction]:
+        pass
+
+    def recordRewrite(self, removed: list[Instruction], added: list[Instruction]):
+        self.instructions_removed += sum(instruction.length != 0 for instruction in removed) - \
+            sum(instruction.length != 0 for instruction in added)
+        self.bytes_saved += sum(instruction.length for instruction in removed) - \
+            sum(instruction.length for instruction in added)
+
+
+class WindowPattern(PeepholePattern):
+    def __init__(self, name: str, window_size: int, first_types: tuple):
+        super().__init__(name)
+        self.window_size = window_size
+        # windows starting with any other instruction type are skipped without calling rewrite
+        self.first_types = first_types
+
+    # returns the instructions that replace the window or None if the pattern does not match
+    @abstractmethod
+    def rewrite(self, window: list[Instruction]) -> Optional[list[Instruction]]:
+        pass
+
+    def apply(self, instructions: list[Instruction]) -> list[Instruction]:
+        result = []
+        i = 0
+        while i < len(instructions):
+            replacement = None
+            if type(instructions[i]) in self.first_types and i + self.window_size <= len(instructions):
+                window = instructions[i:i + self.window_size]
+                replacement = self.rewrite(window)
+            if replacement is None:
+                result.append(instructions[i])
+                i += 1
+            else:
+                self.recordRewrite(window, replacement)
+                result += replacement
+                i += self.window_size
+        return result
+
+
+class PushPopPattern(WindowPattern):
+    def __init__(self):
+        super().__init__("push followed by pop", 2, (Instructions.Push,))
+
+    def rewrite(self, window: list[Instruction]) -> Optional[list[Instruction]]:
+        push, pop = window
+        if type(push) is not Instructions.Push or type(pop) is not Instructions.Pop:
+            return None
+        if isSameRegister(push.reg, pop.reg):
+            return []
+        return [withSpan(Instructions.Mov(push.reg, pop.reg), push.span)]
+
+
+class SelfMovPattern(WindowPattern):
+    def __init__(self):
+        super().__init__("mov to itself", 1, (Instructions.Mov,))
+
+    def rewrite(self, window: list[Instruction]) -> Optional[list[Instruction]]:
+        mov = window[0]
+        if type(mov) is Instructions.Mov and isSameRegister(mov.reg_a, mov.reg_save):
+            return []
+        return None
+
+
+class LoadIntoTemporaryPattern(WindowPattern):
+    BINARY_OPERATIONS = (Instructions.Add, Instructions.Subtract, Instructions.BitShiftLeft, Instructions.BitShiftRight,
+                         Instructions.Or, Instructions.And, Instructions.Xor, Instructions.Xnor, Instructions.Nand)
+
+    def __init__(self):
+        super().__init__("value moved into a temporary", 3,
+                         LoadIntoTemporaryPattern.BINARY_OPERATIONS + (Instructions.Not, Instructions.Immediate,
+                                                                       Instructions.MemRead))
+
+    @staticmethod
+    def overwritesReturn(instruction: Instruction) -> bool:
+        if type(instruction) is Instructions.Immediate:
+            return isSameRegister(instruction.reg_save, Registers.RETURN)
+        if type(instruction) is Instructions.MemRead:
+            return isSameRegister(instruction.reg_save, Registers.RETURN) and \
+                not isSameRegister(instruction.reg_addr, Registers.RETURN)
+        return False
+
+    def rewrite(self, window: list[Instruction]) -> Optional[list[Instruction]]:
+        # RRET = value, R = RRET, RRET = other value -> R = value, RRET = other value
+        load, mov, next_load = window
+        if type(mov) is not Instructions.Mov or not isSameRegister(mov.reg_a, Registers.RETURN):
+            return None
+        if not self.overwritesReturn(next_load):
+            return None
+        if type(load) in LoadIntoTemporaryPattern.BINARY_OPERATIONS and isSameRegister(load.reg_save, Registers.RETURN):
+            new_load = type(load)(load.reg_a, load.reg_b, mov.reg_save)
+        elif type(load) is Instructions.Not and isSameRegister(load.reg_save, Registers.RETURN):
+            new_load = Instructions.Not(load.reg_a, mov.reg_save)
+        elif not self.overwritesReturn(load):
+            return None
+        elif type(load) is Instructions.Immediate:
+            new_load = Instructions.Immediate(mov.reg_save, load.value)
+        else:
+            new_load = Instructions.MemRead(load.reg_addr, load.addr_offset, mov.reg_save)
+        return [withSpan(new_load, load.span), next_load]
+
+
+class JumpToNextPattern(PeepholePattern):
+    def __init__(self):
+        super().__init__("jump to the next instruction")
+
+    def apply(self, instructions: list[Instruction]) -> list[Instruction]:
+        result = []
+        i = 0
+        while i < len(instructions):
+            load, jump = instructions[i], instructions[i + 1] if i + 1 < len(instructions) else None
+            if type(load) is Instructions.ImmediateLabel and type(jump) in (Instructions.Jump, Instructions.JumpIf) \
+                    and isSameRegister(load.reg_save, jump.reg):
+                j = i + 2
+                while j < len(instructions) and type(instructions[j]) is Instructions.Label:
+                    if instructions[j].label == load.label:
+                        break
+                    j += 1
+                else:
+                    j = -1
+                if j != -1:
+                    self.recordRewrite([load, jump], [])
+                    i += 2
+                    continue
+            result.append(load)
+            i += 1
+        return result
+
+
+class UnreachableCodePattern(PeepholePattern):
+    def __init__(self):
+        super().__init__("unreachable code after a jump")
+
+    def apply(self, instructions: list[Instruction]) -> list[Instruction]:
+        result = []
+        reachable = True
+        for instruction in instructions:
+            if type(instruction) is Instructions.Label:
+                reachable = True
+            # values are data, not code, so they are always kept
+            if reachable or type(instruction) is Instructions.Value:
+                result.append(instruction)
+            else:
+                self.recordRewrite([instruction], [])
+            if type(instruction) is Instructions.Jump:
+                reachable = False
+        return result
+
+
+class RedundantLabelLoadPattern(PeepholePattern):
+    def __init__(self):
+        super().__init__("reload of a label already in the register")
+
+    def apply(self, instructions: list[Instruction]) -> list[Instruction]:
+        result = []
+        # register number -> label its value was loaded from
+        known_labels = {}
+        for instruction in instructions:
+            if type(instruction) is Instructions.Label or type(instruction) is Instructions.Jump:
+                known_labels.clear()
+            elif type(instruction) is Instructions.ImmediateLabel:
+                register = instruction.reg_save.register_number
+                if known_labels.get(register) == instruction.label:
+                    self.recordRewrite([instruction], [])
+                    continue
+                known_labels[register] = instruction.label
+            else:
+                known_labels.pop(getWrittenRegister(instruction), None)
+            result.append(instruction)
+        return result
+
+
+PeepholePattern.patterns += [
+    UnreachableCodePattern(),
+    JumpToNextPattern(),
+    RedundantLabelLoadPattern(),
+    PushPopPattern(),
+    SelfMovPattern(),
+    LoadIntoTemporaryPattern(),
+]
+
+
+# new instances of every pattern, so each compile counts what its patterns removed on its own
+def createPatterns() -> list[PeepholePattern]:
+    return [type(pattern)() for pattern in PeepholePattern.patterns]
+
+
+def applyPatterns(instructions: list[Instruction], patterns: list[PeepholePattern]) -> list[Instruction]:
+    # patterns can expose each other, so they are repeated until nothing changes
+    changed = True
+    while changed:
+        changed = False
+        for pattern in patterns:
+            size = len(instructions)
+            instructions = pattern.apply(instructions)
+            changed = changed or len(instructions) != size
+    return instructions
+
+
+def printPatternReport(patterns: list[PeepholePattern]):
+    print(f"{'pattern':<44}{'instructions':>13}{'bytes':>7}")
+    for pattern in patterns:
+        print(f"{pattern.name:<44}{pattern.instructions_removed:>13}{pattern.bytes_saved:>7}")
+    print(f"{'total':<44}{sum(pattern.instructions_removed for pattern in patterns):>13}"
+          f"{sum(pattern.bytes_saved for pattern in patterns):>7}")
@@ -0,0 +1,35 @@
+from jaclang.generator import Instruction, Instructions, LabelTable
+
+START_CODE = "start code"
+OUTLINED_CODE = "outlined sequences"
+
+
+# bytes of code and data of every function and global variable, code before the first one is the start code and
+# subroutines made by the outliner are counted together
+def getSymbolSizes(instructions: list[Instruction], labels: LabelTable) -> dict[str, int]:
+    sizes = {START_CODE: 0}
+    symbol = START_CODE
+    for instruction in instructions:
+        if type(instruction) is Instructions.Label:
+            if labels.isNamed(instruction.label):
+                symbol = labels.names[instruction.label]
+            elif labels.names[instruction.label] == "outlined":
+                symbol = OUTLINED_CODE
+            sizes.setdefault(symbol, 0)
+        sizes[symbol] += instruction.length
+    return sizes
+
+
+def printSizeReport(baseline_name: str, baseline_sizes: dict[str, int], sizes: dict[str, int]):
+    print("Size report:")
+    print("---------------------------------")
+    print(f"{'symbol':<36}{baseline_name:>8}{'-Os':>8}{'change':>8}")
+    symbols = list(baseline_sizes.keys()) + [symbol for symbol in sizes.keys() if symbol not in baseline_sizes]
+    for symbol in symbols:
+        baseline_size = baseline_sizes.get(symbol, 0)
+        size = sizes.get(symbol, 0)
+        print(f"{symbol:<36}{baseline_size:>8}{size:>8}{size - baseline_size:>+8}")
+    baseline_total = sum(baseline_sizes.values())
+    total = sum(sizes.values())
+    print(f"{'total':<36}{baseline_total:>8}{total:>8}{total - baseline_total:>+8}")
+    print("---------------------------------")
@@ -1,7 +1,12 @@
-from jaclang.generator import Instruction
+from typing import Optional
+
+from jaclang.cache import FunctionCache
+from jaclang.generator import Instruction, LabelTable
 from jaclang.lexer import Token
+from jaclang.optimizer import FunctionOptimizer
 from jaclang.parser.expression import ValueFactory
-from jaclang.parser.root import RootFactory
+from jaclang.parser.root import RootFactory, RootBranch
+from jaclang.parser.scope import ParsedTokens
 
 # modules
 from jaclang.parser import if_statement, while_statement
@@ -21,10 +26,17 @@ variable.load()
 expression.load()
 
 
-def parse(tokens: list[Token], debug_output: bool = False) -> list[Instruction]:
-    root_factory = RootFactory()
+def parseTree(tokens: list[Token]) -> RootBranch:
+    _, root_branch = RootFactory.parse(0, ParsedTokens(tokens))
+    return root_branch
+
 
-    _, root_branch = root_factory.parse(0, tokens)
+def parse(tokens: list[Token], labels: LabelTable, debug_output: bool = False, inline_budget: int = 0,
+          fold_constants: bool = True, function_cache: Optional[FunctionCache] = None, start_code: bool = True,
+          worker_count: int = 1, function_optimizer: Optional[FunctionOptimizer] = None) -> list[Instruction]:
+    root_branch = parseTree(tokens)
+    if fold_constants:
+        root_branch.simplify()
 
     if debug_output:
         print("Generated abstract syntax tree:")
@@ -32,4 +44,5 @@ def parse(tokens: list[Token], debug_output: bool = False) -> list[Instruction]:
         root_branch.printInfo(0)
         print("---------------------------------")
 
-    return root_branch.generateInstructions()
+    return root_branch.generateInstructions(labels, inline_budget, function_cache, start_code, worker_count,
+                                            function_optimizer)
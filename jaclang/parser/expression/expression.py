@@ -1,7 +1,10 @@
-from jaclang.generator import Instruction, Instructions, Registers
+from typing import Optional
+
+from jaclang.generator import Instructions, Registers, Emitter
 from jaclang.lexer import Token
-from jaclang.parser.expression.operators import Operator
+from jaclang.parser.expression.operators import Operator, CompareOperator
 from jaclang.parser.expression.value import ValueBranch, ValueFactory
+from jaclang.parser.integer import IntegerBranch
 from jaclang.parser.scope import ScopeContext, BranchInScopeFactory, BranchInScope, TokenExpectedException
 
 
@@ -10,47 +13,157 @@ class ExpressionBranch(ValueBranch):
         self.value1 = value1
         self.value2 = value2
         self.expr_operator = expr_operator
+        self.register_need: Optional[int] = None
+        self.has_calls: Optional[bool] = None
+
+    def getOperandChain(self) -> (ValueBranch, list["ExpressionBranch"]):
+        # walks the left spine iteratively, so long operator chains don't hit the recursion limit
+        chain = []
+        branch = self
+        while type(branch) is ExpressionBranch:
+            chain.append(branch)
+            branch = branch.value1
+        chain.reverse()
+        return branch, chain
+
+    def analyze(self):
+        first_value, chain = self.getOperandChain()
+        register_need = first_value.getRegisterNeed()
+        has_calls = first_value.hasCalls()
+        for expression in chain:
+            value2_need = expression.value2.getRegisterNeed()
+            register_need = register_need + 1 if register_need == value2_need else max(register_need, value2_need)
+            has_calls = has_calls or expression.value2.hasCalls()
+            expression.register_need = register_need
+            expression.has_calls = has_calls
+
+    def getRegisterNeed(self) -> int:
+        if self.register_need is None:
+            self.analyze()
+        return self.register_need
+
+    def hasCalls(self) -> bool:
+        if self.has_calls is None:
+            self.analyze()
+        return self.has_calls
+
+    def isSwapped(self) -> bool:
+        # evaluate the operand that needs more registers first, if neither can observe the order
+        return not self.value1.hasCalls() and not self.value2.hasCalls() and \
+            self.value2.getRegisterNeed() > self.value1.getRegisterNeed()
+
+    def simplify(self) -> ValueBranch:
+        first_value, chain = self.getOperandChain()
+        value = first_value.simplify()
+        for expression in chain:
+            value2 = expression.value2.simplify()
+            if type(value) is IntegerBranch and type(value2) is IntegerBranch:
+                span = (value.span[0], value2.span[1])
+                value = IntegerBranch(expression.expr_operator.evaluate(value.getWord(), value2.getWord()))
+                value.span = span
+            else:
+                expression.value1 = value
+                expression.value2 = value2
+                value = expression
+        return value
 
     def printInfo(self, nested_level: int):
-        self.value1.printInfo(nested_level)
-        print('    ' * nested_level, self.expr_operator.name)
-        self.value2.printInfo(nested_level)
+        first_value, chain = self.getOperandChain()
+        first_value.printInfo(nested_level)
+        for expression in chain:
+            print('    ' * nested_level, expression.expr_operator.name)
+            expression.value2.printInfo(nested_level)
+
+    def generateInstructions(self, context: ScopeContext, emitter: Emitter):
+        self.generateChain(context, self.expr_operator, emitter)
+
+    def generateJumpIfFalse(self, context: ScopeContext, label: int, emitter: Emitter):
+        if type(self.expr_operator) is not CompareOperator:
+            super().generateJumpIfFalse(context, label, emitter)
+            return
+        # compare with the complemented flags and jump straight past the body
+        self.generateChain(context, self.expr_operator.getComplement(), emitter)
+        emitter.emit(Instructions.ImmediateLabel(Registers.ADDRESS, label))
+        emitter.emit(Instructions.JumpIf(Registers.ADDRESS))
 
-    def generateInstructions(self, context: ScopeContext) -> list[Instruction]:
-        instructions = []
+    # last_operator replaces the operator of this expression, the root of the chain
+    def generateChain(self, context: ScopeContext, last_operator: Operator, emitter: Emitter):
+        first_value, chain = self.getOperandChain()
+        if self.register_need is None:
+            # fills in the whole chain at once, isSwapped would otherwise analyze every prefix of it again
+            self.analyze()
+        allocator = context.register_allocator
+        swapped = [expression.isSwapped() for expression in chain]
 
-        instructions += self.value1.generateInstructions(context)
-        instructions += [
-            Instructions.Mov(Registers.RETURN, Registers.EXPRESSION),
-            Instructions.Push(Registers.EXPRESSION),
-        ]
-        instructions += self.value2.generateInstructions(context)
-        instructions += [
-            Instructions.Pop(Registers.EXPRESSION),
-        ]
+        # right operands of swapped operations are evaluated before everything left of them
+        held_registers = []
+        for expression, is_swapped in zip(reversed(chain), reversed(swapped)):
+            if is_swapped:
+                expression.value2.generateInstructions(context, emitter)
+                register = allocator.allocate()
+                if register is None:
+                    emitter.emit(Instructions.Push(Registers.RETURN))
+                else:
+                    emitter.emit(Instructions.Mov(Registers.RETURN, register))
+                held_registers.append(register)
 
-        instructions += self.expr_operator.generateInstructions()
+        first_value.generateInstructions(context, emitter)
+        for expression, is_swapped in zip(chain, swapped):
+            expr_operator = last_operator if expression is self else expression.expr_operator
+            if is_swapped:
+                register = held_registers.pop()
+                if register is None:
+                    emitter.emit(Instructions.Pop(Registers.EXPRESSION))
+                    register = Registers.EXPRESSION
+                else:
+                    allocator.free(register)
+                expr_operator.generateInstructions(Registers.RETURN, register, emitter)
+                continue
 
-        return instructions
+            register = None if expression.value2.hasCalls() else allocator.allocate()
+            if register is None:
+                emitter.emit(Instructions.Push(Registers.RETURN))
+                expression.value2.generateInstructions(context, emitter)
+                emitter.emit(Instructions.Pop(Registers.EXPRESSION))
+                expr_operator.generateInstructions(Registers.EXPRESSION, Registers.RETURN, emitter)
+            else:
+                emitter.emit(Instructions.Mov(Registers.RETURN, register))
+                expression.value2.generateInstructions(context, emitter)
+                expr_operator.generateInstructions(register, Registers.RETURN, emitter)
+                allocator.free(register)
 
 
 class ExpressionFactory(BranchInScopeFactory):
+    def getFirstTokens(self) -> Optional[list]:
+        return ValueFactory().getFirstTokens()
+
     def parseImpl(self, pos: int, tokens: list[Token]) -> (int, BranchInScope):
         value_factory = ValueFactory()
         pos, value = value_factory.parseDontExpect(pos, tokens)
         if value is None:
             raise TokenExpectedException(tokens[pos].pos, "Expected value")
 
-        return self.parseRecursive(pos, tokens, value)
+        # precedence climbing with explicit stacks instead of recursion
+        values = [value]
+        operators = []
+        while tokens[pos] in Operator.operators.keys():
+            expr_operator = Operator.operators[tokens[pos]]
+            while operators and operators[-1].precedence >= expr_operator.precedence:
+                self.reduce(values, operators)
+            operators.append(expr_operator)
 
-    def parseRecursive(self, pos: int, tokens: list[Token], expr_branch: ValueBranch) -> (int, ValueBranch):
-        if tokens[pos] not in Operator.operators.keys():
-            return pos, expr_branch
+            pos += 1
+            pos, value = value_factory.parseExpect(pos, tokens)
+            values.append(value)
 
-        expr_operator = Operator.operators[tokens[pos]]
-        pos += 1
-        value_factory = ValueFactory()
-        pos, value = value_factory.parseExpect(pos, tokens)
-        new_expr_branch = ExpressionBranch(expr_branch, expr_operator, value)
+        while operators:
+            self.reduce(values, operators)
+        return pos, values[0]
 
-        return self.parseRecursive(pos, tokens, new_expr_branch)
+    @staticmethod
+    def reduce(values: list[ValueBranch], operators: list[Operator]):
+        value2 = values.pop()
+        value1 = values.pop()
+        expr_branch = ExpressionBranch(value1, operators.pop(), value2)
+        expr_branch.span = (value1.span[0], value2.span[1])
+        values.append(expr_branch)
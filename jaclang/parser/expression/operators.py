@@ -1,103 +1,127 @@
 from abc import abstractmethod
 
-from jaclang.generator import Instructions, Registers, Instruction, CompareFlags
+from jaclang.generator import Instructions, Registers, RegisterParameter, CompareFlags, Emitter
 from jaclang.lexer import Symbols
 
 
 class Operator:
     operators = {}
 
-    def __init__(self, name: str):
+    def __init__(self, name: str, precedence: int = 0):
         self.name = name
+        # operators with higher precedence bind tighter, equal ones are applied left to right
+        self.precedence = precedence
 
+    # computes the operation on two 16 bit words like the cpu does
     @abstractmethod
-    def generateInstructions(self) -> list[Instruction]:
+    def evaluate(self, left: int, right: int) -> int:
         pass
 
+    # computes left operator right into the return register
+    @abstractmethod
+    def generateInstructions(self, left: RegisterParameter, right: RegisterParameter, emitter: Emitter):
+        pass
 
-class PlusOperator(Operator):
-    def generateInstructions(self) -> list[Instruction]:
-        return [Instructions.Add(Registers.EXPRESSION, Registers.RETURN, Registers.RETURN)]
-
-
-class MinusOperator(Operator):
-    def generateInstructions(self) -> list[Instruction]:
-        return [Instructions.Subtract(Registers.RETURN, Registers.EXPRESSION, Registers.RETURN)]
-
-
-class EqualsOperator(Operator):
-    def generateInstructions(self) -> list[Instruction]:
-        return [Instructions.Compare(Registers.EXPRESSION, Registers.RETURN, CompareFlags.EQUAL)]
 
+class PlusOperator(Operator):
+    def evaluate(self, left: int, right: int) -> int:
+        return (left + right) & 0xFFFF
 
-class LesserOperator(Operator):
-    def generateInstructions(self) -> list[Instruction]:
-        return [Instructions.Compare(Registers.EXPRESSION, Registers.RETURN, CompareFlags.LESSER)]
+    def generateInstructions(self, left: RegisterParameter, right: RegisterParameter, emitter: Emitter):
+        emitter.emit(Instructions.Add(left, right, Registers.RETURN))
 
 
-class GreaterOperator(Operator):
-    def generateInstructions(self) -> list[Instruction]:
-        return [Instructions.Compare(Registers.EXPRESSION, Registers.RETURN, CompareFlags.GREATER)]
+class MinusOperator(Operator):
+    def evaluate(self, left: int, right: int) -> int:
+        return (left - right) & 0xFFFF
 
+    def generateInstructions(self, left: RegisterParameter, right: RegisterParameter, emitter: Emitter):
+        emitter.emit(Instructions.Subtract(right, left, Registers.RETURN))
 
-class LesserOrEqualOperator(Operator):
-    def generateInstructions(self) -> list[Instruction]:
-        return [Instructions.Compare(Registers.EXPRESSION, Registers.RETURN, CompareFlags.LESSER_OR_EQUAL)]
 
+class CompareOperator(Operator):
+    def __init__(self, name: str, flags: int, precedence: int = 0):
+        super().__init__(name, precedence)
+        self.flags = flags
 
-class GreaterOrEqualOperator(Operator):
-    def generateInstructions(self) -> list[Instruction]:
-        return [Instructions.Compare(Registers.EXPRESSION, Registers.RETURN, CompareFlags.GREATER_OR_EQUAL)]
+    def evaluate(self, left: int, right: int) -> int:
+        return int(bool(left > right and self.flags & CompareFlags.GREATER or
+                        left < right and self.flags & CompareFlags.LESSER or
+                        left == right and self.flags & CompareFlags.EQUAL))
 
+    def generateInstructions(self, left: RegisterParameter, right: RegisterParameter, emitter: Emitter):
+        emitter.emit(Instructions.Compare(left, right, self.flags))
 
-class NotEqualOperator(Operator):
-    def generateInstructions(self) -> list[Instruction]:
-        return [Instructions.Compare(Registers.EXPRESSION, Registers.RETURN, CompareFlags.NOT_EQUAL)]
+    # operator that gives 1 exactly when this one gives 0
+    def getComplement(self) -> "CompareOperator":
+        return CompareOperator(self.name, CompareFlags.complement(self.flags), self.precedence)
 
 
 class BitShiftLeftOperator(Operator):
-    def generateInstructions(self) -> list[Instruction]:
-        return [Instructions.BitShiftLeft(Registers.EXPRESSION, Registers.RETURN, Registers.RETURN)]
+    def evaluate(self, left: int, right: int) -> int:
+        return (left << right) & 0xFFFF
+
+    def generateInstructions(self, left: RegisterParameter, right: RegisterParameter, emitter: Emitter):
+        emitter.emit(Instructions.BitShiftLeft(left, right, Registers.RETURN))
 
 
 class BitShiftRightOperator(Operator):
-    def generateInstructions(self) -> list[Instruction]:
-        return [Instructions.BitShiftRight(Registers.EXPRESSION, Registers.RETURN, Registers.RETURN)]
+    def evaluate(self, left: int, right: int) -> int:
+        return left >> right
+
+    def generateInstructions(self, left: RegisterParameter, right: RegisterParameter, emitter: Emitter):
+        emitter.emit(Instructions.BitShiftRight(left, right, Registers.RETURN))
 
 
 class OrOperator(Operator):
-    def generateInstructions(self) -> list[Instruction]:
-        return [Instructions.Or(Registers.EXPRESSION, Registers.RETURN, Registers.RETURN)]
+    def evaluate(self, left: int, right: int) -> int:
+        return left | right
+
+    def generateInstructions(self, left: RegisterParameter, right: RegisterParameter, emitter: Emitter):
+        emitter.emit(Instructions.Or(left, right, Registers.RETURN))
 
 
 class XorOperator(Operator):
-    def generateInstructions(self) -> list[Instruction]:
-        return [Instructions.Xor(Registers.EXPRESSION, Registers.RETURN, Registers.RETURN)]
+    def evaluate(self, left: int, right: int) -> int:
+        return left ^ right
+
+    def generateInstructions(self, left: RegisterParameter, right: RegisterParameter, emitter: Emitter):
+        emitter.emit(Instructions.Xor(left, right, Registers.RETURN))
 
 
 class AndOperator(Operator):
-    def generateInstructions(self) -> list[Instruction]:
-        return [Instructions.And(Registers.EXPRESSION, Registers.RETURN, Registers.RETURN)]
+    def evaluate(self, left: int, right: int) -> int:
+        return left & right
+
+    def generateInstructions(self, left: RegisterParameter, right: RegisterParameter, emitter: Emitter):
+        emitter.emit(Instructions.And(left, right, Registers.RETURN))
 
 
 class XnorOperator(Operator):
-    def generateInstructions(self) -> list[Instruction]:
-        return [Instructions.Xnor(Registers.EXPRESSION, Registers.RETURN, Registers.RETURN)]
+    def evaluate(self, left: int, right: int) -> int:
+        return ~(left ^ right) & 0xFFFF
+
+    def generateInstructions(self, left: RegisterParameter, right: RegisterParameter, emitter: Emitter):
+        emitter.emit(Instructions.Xnor(left, right, Registers.RETURN))
 
 
 class NandOperator(Operator):
-    def generateInstructions(self) -> list[Instruction]:
-        return [Instructions.Nand(Registers.EXPRESSION, Registers.RETURN, Registers.RETURN)]
+    def evaluate(self, left: int, right: int) -> int:
+        return ~(left & right) & 0xFFFF
+
+    def generateInstructions(self, left: RegisterParameter, right: RegisterParameter, emitter: Emitter):
+        emitter.emit(Instructions.Nand(left, right, Registers.RETURN))
 
 
+# all operators share one precedence level, so jaclang expressions are evaluated strictly left to right
 Operator.operators[Symbols.PLUS] = PlusOperator(Symbols.PLUS.name)
 Operator.operators[Symbols.MINUS] = MinusOperator(Symbols.MINUS.name)
-Operator.operators[Symbols.EQUALS] = EqualsOperator(Symbols.EQUALS.name)
-Operator.operators[Symbols.LESS_THAN] = LesserOperator(Symbols.LESS_THAN.name)
-Operator.operators[Symbols.GREATER_THAN] = GreaterOperator(Symbols.GREATER_THAN.name)
-Operator.operators[Symbols.LESS_OR_EQUAL_THAN] = LesserOrEqualOperator(Symbols.LESS_OR_EQUAL_THAN.name)
-Operator.operators[Symbols.GREATER_OR_EQUAL_THAN] = GreaterOrEqualOperator(Symbols.GREATER_OR_EQUAL_THAN.name)
-Operator.operators[Symbols.NOT_EQUAL] = NotEqualOperator(Symbols.NOT_EQUAL.name)
+Operator.operators[Symbols.EQUALS] = CompareOperator(Symbols.EQUALS.name, CompareFlags.EQUAL)
+Operator.operators[Symbols.LESS_THAN] = CompareOperator(Symbols.LESS_THAN.name, CompareFlags.LESSER)
+Operator.operators[Symbols.GREATER_THAN] = CompareOperator(Symbols.GREATER_THAN.name, CompareFlags.GREATER)
+Operator.operators[Symbols.LESS_OR_EQUAL_THAN] = CompareOperator(Symbols.LESS_OR_EQUAL_THAN.name, CompareFlags.LESSER_OR_EQUAL)
+Operator.operators[Symbols.GREATER_OR_EQUAL_THAN] = CompareOperator(Symbols.GREATER_OR_EQUAL_THAN.name, CompareFlags.GREATER_OR_EQUAL)
+Operator.operators[Symbols.NOT_EQUAL] = CompareOperator(Symbols.NOT_EQUAL.name, CompareFlags.NOT_EQUAL)
 Operator.operators[Symbols.BIT_SHIFT_LEFT] = BitShiftLeftOperator(Symbols.BIT_SHIFT_LEFT.name)
 Operator.operators[Symbols.BIT_SHIFT_RIGHT] = BitShiftRightOperator(Symbols.BIT_SHIFT_RIGHT.name)
 Operator.operators[Symbols.OR] = OrOperator(Symbols.OR.name)
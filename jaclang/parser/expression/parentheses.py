@@ -4,6 +4,8 @@ from jaclang.parser.scope import BranchInScopeFactory, BranchInScope, TokenExpec
 
 
 class ParenthesesFactory(BranchInScopeFactory):
+    first_tokens = [Symbols.LEFT_BRACKET]
+
     def parseImpl(self, pos: int, tokens: list[Token]) -> (int, BranchInScope):
         if tokens[pos] != Symbols.LEFT_BRACKET:
             raise TokenExpectedException(tokens[pos].pos, "Expected '('")
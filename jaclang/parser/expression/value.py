@@ -1,18 +1,46 @@
 from abc import ABC
+from typing import Optional
 
+from jaclang.generator import Instructions, Registers, Emitter
 from jaclang.lexer import Token
-from jaclang.parser.scope import BranchInScope, BranchInScopeFactory, TokenExpectedException
+from jaclang.parser.scope import BranchInScope, BranchInScopeFactory, TokenExpectedException, DispatchIndex, \
+    ScopeContext
 
 
 class ValueBranch(BranchInScope, ABC):
-    pass
+    # registers needed to evaluate the value without spilling to the stack (Sethi-Ullman number)
+    def getRegisterNeed(self) -> int:
+        return 1
+
+    # a function call may overwrite every temporary register, so nothing can be kept in them across it
+    def hasCalls(self) -> bool:
+        return False
+
+    # returns the value by jumping into the called function with the current frame, False if it can't,
+    # in which case nothing is emitted
+    def generateTailCallInstructions(self, context: ScopeContext, emitter: Emitter) -> bool:
+        return False
+
+    # jumps to the label unless the value is 1, which is when JumpIf would be taken
+    def generateJumpIfFalse(self, context: ScopeContext, label: int, emitter: Emitter):
+        condition_true = context.labels.createNumbered("condition true")
+        self.generateInstructions(context, emitter)
+        emitter.emit(Instructions.ImmediateLabel(Registers.ADDRESS, condition_true))
+        emitter.emit(Instructions.JumpIf(Registers.ADDRESS))
+        emitter.emit(Instructions.ImmediateLabel(Registers.ADDRESS, label))
+        emitter.emit(Instructions.Jump(Registers.ADDRESS))
+        emitter.emit(Instructions.Label(condition_true))
 
 
 class ValueFactory(BranchInScopeFactory):
     factories = []
+    dispatch_index = DispatchIndex(factories)
+
+    def getFirstTokens(self) -> Optional[list]:
+        return ValueFactory.dispatch_index.getFirstTokens()
 
     def parseImpl(self, pos: int, tokens: list[Token]) -> (int, BranchInScope):
-        for factory in ValueFactory.factories:
+        for factory in ValueFactory.dispatch_index.getCandidates(tokens[pos]):
             pos, value = factory.parseDontExpect(pos, tokens)
             if value is not None:
                 return pos, value
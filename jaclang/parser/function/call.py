@@ -1,9 +1,13 @@
+from copy import copy
+
 from jaclang.error.syntax_error import JaclangSyntaxError
-from jaclang.generator import Instruction, Instructions, Registers
+from jaclang.generator import Instructions, Registers, Emitter
 from jaclang.lexer import Token, IdentifierToken, Symbols
 from jaclang.parser.expression import ExpressionFactory
 from jaclang.parser.expression.value import ValueBranch
 from jaclang.parser.function.declaration import FunctionData
+from jaclang.parser.function.return_statement import generateLeaveFrame
+from jaclang.parser.variable.assignment import VariableData
 from jaclang.parser.root import InitGenerator, RootContext
 from jaclang.parser.scope import BranchInScope, BranchInScopeFactory, TokenExpectedException, ScopeContext, StackManager
 
@@ -19,40 +23,94 @@ class FunctionCallBranch(ValueBranch):
             print('    ' * nested_level, "arg:")
             arg.printInfo(nested_level + 1)
 
-    def generateInstructions(self, context: ScopeContext) -> list[Instruction]:
+    def hasCalls(self) -> bool:
+        return True
+
+    def simplify(self) -> ValueBranch:
+        self.args = [arg.simplify() for arg in self.args]
+        return self
+
+    def getFunction(self, context: ScopeContext) -> FunctionData:
         if self.function_name not in context.symbols.keys():
-            raise JaclangSyntaxError(-1, f"Symbol '{self.function_name}' undefined")
+            raise JaclangSyntaxError(self.span[0], f"Symbol '{self.function_name}' undefined")
 
         if type(context.symbols[self.function_name]) is not FunctionData:
-            raise JaclangSyntaxError(-1, f"Symbol '{self.function_name}' is not a function")
+            raise JaclangSyntaxError(self.span[0], f"Symbol '{self.function_name}' is not a function")
 
         func = context.symbols[self.function_name]
         if func.args_num != len(self.args):
-            raise JaclangSyntaxError(-1, f"Incorrect number of arguments on a function call (got {len(self.args)}, expected {func.args_num})")
+            raise JaclangSyntaxError(self.span[0], f"Incorrect number of arguments on a function call (got {len(self.args)}, expected {func.args_num})")
+
+        if func.body_size is None:
+            func.recursive = True
+        return func
+
+    def getFunctionLabel(self, context: ScopeContext) -> int:
+        return context.labels.getNamed("func " + self.function_name)
+
+    def generateInstructions(self, context: ScopeContext, emitter: Emitter):
+        func = self.getFunction(context)
+        if func.canInline(context.inline_budget, context.stack_manager):
+            self.generateInlineInstructions(context, func, emitter)
+            return
+
+        jmp_label = context.labels.createNumbered("jump")
+        for arg in self.args:
+            arg.generateInstructions(context, emitter)
+            emitter.emit(Instructions.Push(Registers.RETURN))
+
+        emitter.emit(Instructions.ImmediateLabel(Registers.ADDRESS, jmp_label))
+        emitter.emit(Instructions.Push(Registers.ADDRESS))
+        emitter.emit(Instructions.ImmediateLabel(Registers.ADDRESS, self.getFunctionLabel(context)))
+        emitter.emit(Instructions.Jump(Registers.ADDRESS))
+        emitter.emit(Instructions.Label(jmp_label))
+
+        for _ in self.args:
+            emitter.emit(Instructions.Pop(Registers.ADDRESS))
+
+    def generateTailCallInstructions(self, context: ScopeContext, emitter: Emitter) -> bool:
+        func = self.getFunction(context)
+        # the caller pops its own argument count after the return, so the callee can't take more arguments
+        if func.canInline(context.inline_budget, context.stack_manager) or func.args_num > context.frame_args_num:
+            return False
 
-        jmp_label = f"jump {context.id_manager.requestId()}"
-        instructions = []
         for arg in self.args:
-            instructions += arg.generateInstructions(context)
-            instructions += [
-                Instructions.Push(Registers.RETURN),
-            ]
+            arg.generateInstructions(context, emitter)
+            emitter.emit(Instructions.Push(Registers.RETURN))
+
+        # arguments go right below the return address, where the callee expects them, the last one on top
+        for pos_on_stack in range(-4, -4 - len(self.args) * 2, -2):
+            emitter.emit(Instructions.Pop(Registers.RETURN))
+            emitter.emit(Instructions.MemoryWrite(Registers.STACK_BASE, pos_on_stack, Registers.RETURN))
 
-        instructions += [
-            Instructions.ImmediateLabel(Registers.ADDRESS, jmp_label),
-            Instructions.Push(Registers.ADDRESS),
-            Instructions.ImmediateLabel(Registers.ADDRESS, "func " + self.function_name),
-            Instructions.Jump(Registers.ADDRESS),
-            Instructions.Label(jmp_label),
-        ]
+        generateLeaveFrame(emitter)
+        emitter.emit(Instructions.ImmediateLabel(Registers.ADDRESS, self.getFunctionLabel(context)))
+        emitter.emit(Instructions.Jump(Registers.ADDRESS))
+        return True
 
-        instructions += [
-            Instructions.Pop(Registers.ADDRESS),
-        ] * len(self.args)
-        return instructions
+    def generateInlineInstructions(self, context: ScopeContext, func: FunctionData, emitter: Emitter):
+        # the body runs in the caller's frame, arguments and locals get slots in it
+        inline_context = ScopeContext(copy(func.symbols), context.labels, context.stack_manager, context.inline_budget)
+        inline_context.inline_return_label = context.labels.createNumbered("inline end")
+
+        stack_top = context.stack_manager.top
+        arg_slots = []
+        for arg in self.args:
+            arg.generateInstructions(context, emitter)
+            arg_slots.append(context.stack_manager.allocate())
+            emitter.emit(Instructions.MemoryWrite(Registers.STACK_BASE, arg_slots[-1], Registers.RETURN))
+        # same order as in the declaration, so the first of two equally named arguments wins
+        for arg_name, pos_on_stack in reversed(list(zip(func.declaration.arg_names, arg_slots))):
+            inline_context.symbols[arg_name] = VariableData(pos_on_stack)
+
+        func.declaration.body.generateInstructions(inline_context, emitter)
+        emitter.emit(Instructions.Label(inline_context.inline_return_label))
+        context.stack_manager.release(stack_top)
 
 
 class FunctionCallFactory(BranchInScopeFactory):
+    first_tokens = [IdentifierToken]
+
     def parseImpl(self, pos: int, tokens: list[Token]) -> (int, BranchInScope):
         if type(tokens[pos]) is not IdentifierToken:
             raise TokenExpectedException(tokens[pos].pos, "Expected identifier")
@@ -73,6 +131,6 @@ class FunctionCallFactory(BranchInScopeFactory):
 
 
 class MainCallGenerator(InitGenerator):
-    def generateInitInstructions(self, context: RootContext) -> list[Instruction]:
-        return FunctionCallBranch("main", []).generateInstructions(
-            ScopeContext(context.symbols, context.id_manager, StackManager()))
+    def generateInitInstructions(self, context: RootContext, emitter: Emitter):
+        FunctionCallBranch("main", []).generateInstructions(
+            ScopeContext(context.symbols, context.labels, StackManager()), emitter)
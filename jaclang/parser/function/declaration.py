@@ -1,24 +1,66 @@
 from copy import copy
+from typing import Optional
 
+from jaclang.cache import CachedFunction
 from jaclang.error.syntax_error import JaclangSyntaxError
-from jaclang.generator import Instruction, Instructions, Registers
+from jaclang.generator import Instruction, Instructions, Registers, Emitter, LabelTable
+from jaclang.generator.packing import packInstructions, unpackInstructions
 from jaclang.lexer import Token, Keywords, IdentifierToken, Symbols
-from jaclang.parser.root import SymbolData, BranchInRoot, BranchInRootFactory, RootContext
+from jaclang.optimizer import FunctionOptimizer
+from jaclang.parser.root import SymbolData, BranchInRoot, BranchInRootFactory, RootContext, GenerationJob
 from jaclang.parser.scope import ScopeBranch, ScopeFactory, ScopeContext, StackManager
 from jaclang.parser.function.return_statement import ReturnStatementBranch
 from jaclang.parser.variable.assignment import VariableData
 
 
 class FunctionData(SymbolData):
-    def __init__(self, args_num: int):
+    def __init__(self, args_num: int, declaration: Optional["FunctionDeclarationBranch"] = None,
+                 symbols: Optional[dict[str, SymbolData]] = None):
         self.args_num = args_num
+        self.declaration = declaration
+        # symbols visible from the body, an inlined body is generated with these instead of the caller's
+        self.symbols = symbols
+        # size of the generated body in bytes, None while the body is being generated
+        self.body_size: Optional[int] = None
+        self.frame_size = 0
+        # a function only sees functions declared before it, so the only possible recursion is calling itself
+        self.recursive = False
+        # content hash of the function and everything it depends on, set when a function cache is used
+        self.cache_key: Optional[str] = None
+
+    def getCacheSignature(self, context: RootContext) -> str:
+        # an inlined body is part of the caller's code, so callers depend on all of it, not just the arity
+        return f"func {self.args_num} {self.cache_key if context.inline_budget > 0 else ''}"
+
+    def getWorkerCopy(self, inline_budget: int, copies: dict[SymbolData, SymbolData]) -> SymbolData:
+        if self in copies:
+            return copies[self]
+        if self.body_size is None or self.recursive or self.body_size > inline_budget:
+            # calls only need the number of arguments, like calls of an extern function
+            return FunctionData(self.args_num)
+
+        # the body can be inlined, so it is sent along with the symbols it uses
+        copy_data = FunctionData(self.args_num, self.declaration)
+        copies[self] = copy_data
+        copy_data.body_size = self.body_size
+        copy_data.frame_size = self.frame_size
+        copy_data.symbols = {name: symbol.getWorkerCopy(inline_budget, copies) for name, symbol in self.symbols.items()}
+        return copy_data
+
+    def canInline(self, budget: int, stack_manager: StackManager) -> bool:
+        if self.body_size is None or self.recursive or self.body_size > budget:
+            return False
+        # arguments and locals of the inlined body have to fit into the caller's frame
+        return stack_manager.top + self.args_num * 2 + self.frame_size <= StackManager.MAX_SIZE
 
 
 class FunctionDeclarationBranch(BranchInRoot):
-    def __init__(self, name: str, arg_names: list[str], body: ScopeBranch):
+    def __init__(self, name: str, arg_names: list[str], body: ScopeBranch, referenced_names: list[str]):
         self.name = name
         self.body = body
         self.arg_names = arg_names
+        # every identifier used in the body, which includes all the global symbols it refers to
+        self.referenced_names = referenced_names
 
     def printInfo(self, nested_level: int):
         print('    ' * nested_level, f"FunctionDeclaration:")
@@ -26,29 +68,189 @@ class FunctionDeclarationBranch(BranchInRoot):
         print('    ' * nested_level, f"    args: {' '.join(self.arg_names)}")
         self.body.printInfo(nested_level + 1)
 
-    def generateInstructions(self, context: RootContext) -> list[Instruction]:
-        context.symbols[self.name] = FunctionData(len(self.arg_names))
+    def simplify(self):
+        self.body.simplify()
 
-        new_context = ScopeContext(copy(context.symbols), context.id_manager, StackManager())
+    def getCacheDependencies(self, context: RootContext) -> list[str]:
+        dependencies = []
+        for name in self.referenced_names:
+            symbol = context.symbols.get(name)
+            dependencies.append(f"{name} {symbol.getCacheSignature(context) if symbol is not None else ''}")
+        return dependencies
+
+    def declareFunction(self, context: RootContext) -> FunctionData:
+        function_data = FunctionData(len(self.arg_names), self)
+        if context.function_cache is not None:
+            function_data.cache_key = context.function_cache.addFunction(self.span, self.getCacheDependencies(context))
+        context.symbols[self.name] = function_data
+        # the body can only refer to names it contains, leaving out the other symbols keeps copying them cheap
+        function_data.symbols = {name: context.symbols[name] for name in self.referenced_names
+                                 if name in context.symbols}
+        return function_data
+
+    def loadCached(self, function_data: FunctionData, context: RootContext, emitter: Emitter) -> bool:
+        if context.function_cache is None:
+            return False
+        cached_function = context.function_cache.load(function_data.cache_key, context.labels)
+        if cached_function is None:
+            return False
+        function_data.body_size = cached_function.body_size
+        function_data.frame_size = cached_function.frame_size
+        function_data.recursive = cached_function.recursive
+        emitter.extend(cached_function.instructions)
+        return True
+
+    def storeCached(self, function_data: FunctionData, context: RootContext, instructions: list[Instruction]):
+        if context.function_cache is not None:
+            context.function_cache.store(function_data.cache_key, CachedFunction(
+                instructions, function_data.body_size, function_data.frame_size, function_data.recursive),
+                context.labels)
+
+    def generateBody(self, function_data: FunctionData, labels: LabelTable, inline_budget: int, emitter: Emitter):
+        new_context = ScopeContext(copy(function_data.symbols), labels, StackManager(), inline_budget)
+        new_context.frame_args_num = len(self.arg_names)
 
         curr_pos_on_stack = -4
         for arg in reversed(self.arg_names):
             new_context.symbols[arg] = VariableData(curr_pos_on_stack)
             curr_pos_on_stack -= 2
 
-        body_instructions = self.body.generateInstructions(new_context)
+        # the frame size is only known after the body, it is filled in then
+        frame_size_load = Instructions.Immediate(Registers.RETURN, 0)
+        emitter.emit(Instructions.Label(labels.getNamed(f"func {self.name}")))
+        emitter.emit(Instructions.Mov(Registers.STACK_BASE, Registers.ADDRESS))
+        emitter.emit(Instructions.GetStackPointer(Registers.STACK_BASE))
+        emitter.emit(frame_size_load)
+        emitter.emit(Instructions.Add(Registers.STACK_BASE, Registers.RETURN, Registers.RETURN))
+        emitter.emit(Instructions.SetStackPointer(Registers.RETURN))
+        emitter.emit(Instructions.Push(Registers.ADDRESS))
+
+        body_begin = emitter.size
+        self.body.generateInstructions(new_context, emitter)
+        function_data.body_size = emitter.size - body_begin
+        function_data.frame_size = new_context.stack_manager.getSize()
+        frame_size_load.value = function_data.frame_size
+
+    # the code of the function, optimized on its own when an optimizer is given, only needs the symbols the function
+    # can see, so it can run in a worker process
+    def generateCode(self, function_data: FunctionData, labels: LabelTable, inline_budget: int,
+                     optimizer: Optional[FunctionOptimizer]) -> list[Instruction]:
+        emitter = Emitter()
+        emitter.beginSpan(self.span)
+        self.generateBody(function_data, labels, inline_budget, emitter)
+        if optimizer is None:
+            return emitter.instructions
+        return optimizer.optimize(emitter.instructions)
+
+    def generateInstructions(self, context: RootContext, emitter: Emitter):
+        function_data = self.declareFunction(context)
+        if self.loadCached(function_data, context, emitter):
+            return
+        instructions = self.generateCode(function_data, context.labels, context.inline_budget,
+                                         context.function_optimizer)
+        emitter.extend(instructions)
+        self.storeCached(function_data, context, instructions)
+
+    def declare(self, context: RootContext, emitter: Emitter) -> (Optional[GenerationJob], list[GenerationJob]):
+        function_data = self.declareFunction(context)
+        if self.loadCached(function_data, context, emitter):
+            return None, []
+
+        dependencies = []
+        if context.inline_budget > 0:
+            # inlining needs the generated size of the callee, so callees are generated first
+            dependencies = [context.generation_jobs[symbol] for symbol in function_data.symbols.values()
+                            if symbol in context.generation_jobs]
+        optimization = None
+        if context.function_optimizer is not None:
+            optimization = context.function_optimizer.optimization_level, context.function_optimizer.size_optimized
+        job = FunctionGenerationJob(function_data, context.inline_budget, optimization)
+        context.generation_jobs[function_data] = job
+        return job, dependencies
+
+
+class FunctionGenerationJob(GenerationJob):
+    def __init__(self, function_data: FunctionData, inline_budget: int, optimization: Optional[tuple[int, bool]]):
+        self.function_data = function_data
+        self.inline_budget = inline_budget
+        # optimization level and whether -Os is used, the worker optimizes the function with its own optimizer
+        # and sends back what it removed
+        self.optimization = optimization
+        # the function as it is sent to the worker, symbols of the whole program would make the job too large
+        self.worker_data: Optional[FunctionData] = None
+
+    def __getstate__(self):
+        return {"worker_data": self.worker_data, "inline_budget": self.inline_budget,
+                "optimization": self.optimization}
+
+    def prepare(self):
+        self.worker_data = FunctionData(self.function_data.args_num, self.function_data.declaration)
+        copies = {self.function_data: self.worker_data}
+        self.worker_data.symbols = {name: symbol.getWorkerCopy(self.inline_budget, copies)
+                                    for name, symbol in self.function_data.symbols.items()}
+
+    def run(self):
+        # the labels are local to the function, they get their ids in the whole program in emit
+        labels = LabelTable()
+        optimizer = None
+        if self.optimization is not None:
+            optimizer = FunctionOptimizer(*self.optimization, labels)
+        instructions = self.worker_data.declaration.generateCode(self.worker_data, labels, self.inline_budget,
+                                                                 optimizer)
+        label_names, packed_instructions = packInstructions(instructions, labels)
+        spans = [instruction.span for instruction in instructions]
+        statistics = optimizer.getStatistics() if optimizer is not None else []
+        return (label_names, packed_instructions, spans, self.worker_data.body_size, self.worker_data.frame_size,
+                self.worker_data.recursive, statistics)
 
-        begin_instructions: list[Instruction] = [
-            Instructions.Label(f"func {self.name}"),
-            Instructions.Mov(Registers.STACK_BASE, Registers.ADDRESS),
-            Instructions.GetStackPointer(Registers.STACK_BASE),
-            Instructions.Immediate(Registers.RETURN, new_context.stack_manager.getSize()),
-            Instructions.Add(Registers.STACK_BASE, Registers.RETURN, Registers.RETURN),
-            Instructions.SetStackPointer(Registers.RETURN),
-            Instructions.Push(Registers.ADDRESS),
-        ]
+    def finish(self, result, context: RootContext):
+        self.function_data.body_size, self.function_data.frame_size, self.function_data.recursive = result[3:6]
+        if context.function_optimizer is not None:
+            context.function_optimizer.addStatistics(result[6])
 
-        return begin_instructions + body_instructions
+    def emit(self, result, context: RootContext, emitter: Emitter):
+        label_names, packed_instructions, spans = result[:3]
+        instructions = unpackInstructions(label_names, packed_instructions, context.labels, spans)
+        emitter.extend(instructions)
+        self.function_data.declaration.storeCached(self.function_data, context, instructions)
+
+
+class ExternFunctionDeclarationBranch(BranchInRoot):
+    def __init__(self, name: str, arg_names: list[str]):
+        self.name = name
+        self.arg_names = arg_names
+
+    def printInfo(self, nested_level: int):
+        print('    ' * nested_level, f"ExternFunctionDeclaration:")
+        print('    ' * nested_level, f"    name: {self.name}")
+        print('    ' * nested_level, f"    args: {' '.join(self.arg_names)}")
+
+    def generateInstructions(self, context: RootContext, emitter: Emitter):
+        # the body is in another object or later in this file, calls go through the "func X" label
+        context.symbols[self.name] = FunctionData(len(self.arg_names))
+
+
+def parseFunctionHeader(pos: int, tokens: list[Token]) -> (int, str, list[str]):
+    pos += 1
+    if type(tokens[pos]) is not IdentifierToken:
+        raise JaclangSyntaxError(tokens[pos].pos, "Expected identifier after func keyword")
+    func_name = tokens[pos].identifier
+
+    pos += 1
+    if tokens[pos] != Symbols.LEFT_BRACKET:
+        raise JaclangSyntaxError(tokens[pos].pos, "Expected '(' after func name")
+
+    arg_names = []
+    pos += 1
+    while tokens[pos] != Symbols.RIGHT_BRACKET:
+        if type(tokens[pos]) is IdentifierToken:
+            arg_names.append(tokens[pos].identifier)
+            pos += 1
+        else:
+            raise JaclangSyntaxError(tokens[pos].pos, "Expected ')' or variable name")
+
+    pos += 1
+    return pos, func_name, arg_names
 
 
 class FunctionDeclarationFactory(BranchInRootFactory):
@@ -56,27 +258,23 @@ class FunctionDeclarationFactory(BranchInRootFactory):
         if tokens[pos] != Keywords.FUNC:
             return pos, None
 
-        pos += 1
-        if type(tokens[pos]) is not IdentifierToken:
-            raise JaclangSyntaxError(tokens[pos].pos, "Expected identifier after func keyword")
-        func_name = tokens[pos].identifier
+        pos, func_name, arg_names = parseFunctionHeader(pos, tokens)
 
-        pos += 1
-        if tokens[pos] != Symbols.LEFT_BRACKET:
-            raise JaclangSyntaxError(tokens[pos].pos, "Expected '(' after func name")
+        body_begin = pos
+        pos, body = ScopeFactory().parseExpect(pos, tokens)
+        referenced_names = sorted({token.identifier for token in tokens[body_begin:pos]
+                                   if type(token) is IdentifierToken})
+        implicit_return = ReturnStatementBranch(None)
+        implicit_return.span = (tokens[pos - 1].pos, tokens[pos - 1].end)
+        body.branches.append(implicit_return)
 
-        arg_names = []
-        pos += 1
-        while tokens[pos] != Symbols.RIGHT_BRACKET:
-            if type(tokens[pos]) is IdentifierToken:
-                arg_names.append(tokens[pos].identifier)
-                pos += 1
-            else:
-                raise JaclangSyntaxError(tokens[pos].pos, "Expected ')' or variable name")
+        return pos, FunctionDeclarationBranch(func_name, arg_names, body, referenced_names)
 
-        pos += 1
 
-        pos, body = ScopeFactory().parseExpect(pos, tokens)
-        body.branches.append(ReturnStatementBranch(None))
+class ExternFunctionDeclarationFactory(BranchInRootFactory):
+    def parse(self, pos: int, tokens: list[Token]) -> (int, BranchInRoot):
+        if tokens[pos] != Keywords.EXTERN or tokens[pos + 1] != Keywords.FUNC:
+            return pos, None
 
-        return pos, FunctionDeclarationBranch(func_name, arg_names, body)
+        pos, func_name, arg_names = parseFunctionHeader(pos + 1, tokens)
+        return pos, ExternFunctionDeclarationBranch(func_name, arg_names)
@@ -1,28 +1,42 @@
 from typing import Optional
 
-from jaclang.generator import Instruction, Instructions, Registers
+from jaclang.generator import Instructions, Registers, Emitter
 from jaclang.lexer import Token, Keywords
 from jaclang.parser.expression import ExpressionFactory
 from jaclang.parser.expression.value import ValueBranch
 from jaclang.parser.scope import BranchInScope, BranchInScopeFactory, TokenExpectedException, ScopeContext
 
 
+# sets the stack pointer back to the return address and restores the caller's stack base
+def generateLeaveFrame(emitter: Emitter):
+    emitter.emit(Instructions.Pop(Registers.ADDRESS))
+    emitter.emit(Instructions.SetStackPointer(Registers.STACK_BASE))
+    emitter.emit(Instructions.Mov(Registers.ADDRESS, Registers.STACK_BASE))
+
+
 class ReturnStatementBranch(BranchInScope):
     def __init__(self, value: Optional[ValueBranch]):
         self.value = value
 
-    def generateInstructions(self, context: ScopeContext) -> list[Instruction]:
-        instructions = []
+    def generateInstructions(self, context: ScopeContext, emitter: Emitter):
+        if self.value is not None and context.inline_return_label is None:
+            if self.value.generateTailCallInstructions(context, emitter):
+                return
+
         if self.value is not None:
-            instructions += self.value.generateInstructions(context)
-        instructions += [
-            Instructions.Pop(Registers.ADDRESS),
-            Instructions.SetStackPointer(Registers.STACK_BASE),
-            Instructions.Mov(Registers.ADDRESS, Registers.STACK_BASE),
-            Instructions.Pop(Registers.ADDRESS),
-            Instructions.Jump(Registers.ADDRESS),
-        ]
-        return instructions
+            self.value.generateInstructions(context, emitter)
+        if context.inline_return_label is not None:
+            emitter.emit(Instructions.ImmediateLabel(Registers.ADDRESS, context.inline_return_label))
+            emitter.emit(Instructions.Jump(Registers.ADDRESS))
+            return
+        generateLeaveFrame(emitter)
+        emitter.emit(Instructions.Pop(Registers.ADDRESS))
+        emitter.emit(Instructions.Jump(Registers.ADDRESS))
+
+    def simplify(self) -> BranchInScope:
+        if self.value is not None:
+            self.value = self.value.simplify()
+        return self
 
     def printInfo(self, nested_level: int):
         print('    ' * nested_level, "return:")
@@ -31,6 +45,8 @@ class ReturnStatementBranch(BranchInScope):
 
 
 class ReturnStatementFactory(BranchInScopeFactory):
+    first_tokens = [Keywords.RETURN]
+
     def parseImpl(self, pos: int, tokens: list[Token]) -> (int, BranchInScopeFactory):
         if tokens[pos] != Keywords.RETURN:
             raise TokenExpectedException(pos, "Expected return keyword")
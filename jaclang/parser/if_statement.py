@@ -1,8 +1,11 @@
-from jaclang.generator import Instruction, Instructions, Registers
+from typing import Optional
+
+from jaclang.generator import Instructions, Emitter
 from jaclang.lexer import Token, Keywords
 from jaclang.parser.expression import ExpressionFactory
 from jaclang.parser.expression.value import ValueBranch
-from jaclang.parser.scope import ScopeFactory, BranchInScope, BranchInScopeFactory, ModifierBranchInScope, \
+from jaclang.parser.integer import IntegerBranch
+from jaclang.parser.scope import ScopeFactory, DeadBranch, BranchInScope, BranchInScopeFactory, ModifierBranchInScope, \
     TokenExpectedException, ScopeContext
 
 
@@ -11,22 +14,29 @@ class IfStatementBranch(ModifierBranchInScope):
         super().__init__()
         self.condition = condition
 
-    def generateInstructions(self, context: ScopeContext) -> list[Instruction]:
-        instructions = self.condition.generateInstructions(context)
-        if_begin = f"if begin {context.id_manager.requestId()}"
-        if_end = f"if end {context.id_manager.requestId()}"
-        instructions += [
-            Instructions.ImmediateLabel(Registers.ADDRESS, if_begin),
-            Instructions.JumpIf(Registers.ADDRESS),
-            Instructions.ImmediateLabel(Registers.ADDRESS, if_end),
-            Instructions.Jump(Registers.ADDRESS),
-            Instructions.Label(if_begin),
-        ]
-        instructions += self.branch.generateInstructions(context)
-        instructions += [
-            Instructions.Label(if_end),
-        ]
-        return instructions
+    def simplify(self) -> Optional[BranchInScope]:
+        self.condition = self.condition.simplify()
+        branch = self.branch.simplify()
+        if type(self.condition) is IntegerBranch:
+            # the conditional jump is only taken when the condition is exactly 1
+            if self.condition.getWord() == 1:
+                return branch
+            return DeadBranch(branch) if branch is not None else None
+        if branch is None:
+            # the condition is still evaluated because it can call functions
+            return self.condition
+        self.branch = branch
+        return self
+
+    def generateInstructions(self, context: ScopeContext, emitter: Emitter):
+        if_end = context.labels.createNumbered("if end")
+        outer_span = emitter.beginSpan(self.condition.span)
+        self.condition.generateJumpIfFalse(context, if_end, emitter)
+        emitter.endSpan(outer_span)
+        outer_span = emitter.beginSpan(self.branch.span)
+        self.branch.generateInstructions(context, emitter)
+        emitter.endSpan(outer_span)
+        emitter.emit(Instructions.Label(if_end))
 
     def printInfo(self, nested_level: int):
         print("    " * nested_level, "IfStatement:")
@@ -35,6 +45,8 @@ class IfStatementBranch(ModifierBranchInScope):
 
 
 class IfStatementFactory(BranchInScopeFactory):
+    first_tokens = [Keywords.IF]
+
     def parseImpl(self, pos: int, tokens: list[Token]) -> (int, BranchInScope):
         if tokens[pos] != Keywords.IF:
             raise TokenExpectedException(tokens[pos].pos, "Expected if keyword")
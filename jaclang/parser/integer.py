@@ -1,7 +1,6 @@
-from jaclang.generator import Instruction, Instructions, Registers
+from jaclang.generator import Instructions, Registers, Emitter
 from jaclang.lexer import Token, ConstantToken
-from jaclang.parser.expression import ValueFactory
-from jaclang.parser.expression.value import ValueBranch
+from jaclang.parser.expression.value import ValueBranch, ValueFactory
 from jaclang.parser.scope import BranchInScopeFactory, TokenExpectedException, BranchInScope, ScopeContext
 
 
@@ -9,14 +8,20 @@ class IntegerBranch(ValueBranch):
     def __init__(self, value: int):
         self.value = value
 
+    # the value as the cpu sees it, constants are truncated to 16 bits when loaded
+    def getWord(self) -> int:
+        return self.value & 0xFFFF
+
     def printInfo(self, nested_level: int):
         print('    ' * nested_level, self.value)
 
-    def generateInstructions(self, _: ScopeContext) -> list[Instruction]:
-        return [Instructions.Immediate(Registers.RETURN, self.value)]
+    def generateInstructions(self, _: ScopeContext, emitter: Emitter):
+        emitter.emit(Instructions.Immediate(Registers.RETURN, self.value))
 
 
 class IntegerFactory(BranchInScopeFactory):
+    first_tokens = [ConstantToken]
+
     def parseImpl(self, pos: int, tokens: list[Token]) -> (int, BranchInScope):
         if type(tokens[pos]) is not ConstantToken:
             raise TokenExpectedException(tokens[pos].pos, "Expected integer")
@@ -1,39 +1,95 @@
 from abc import abstractmethod
+from typing import Optional
 
+from jaclang.cache import FunctionCache
 from jaclang.error.syntax_error import JaclangSyntaxError
-from jaclang.generator import Instruction, Instructions
+from jaclang.generator import Instruction, Instructions, Emitter, LabelTable
 from jaclang.lexer import Token, EndToken
+from jaclang.optimizer import FunctionOptimizer
 
 
 class SymbolData:
-    pass
+    # describes the symbol to code that refers to it, code cached with a different description is generated again
+    def getCacheSignature(self, context: "RootContext") -> str:
+        return type(self).__name__
 
-
-class IdManager:
-    def __init__(self):
-        self.curr_id = 0
-
-    def requestId(self):
-        result = self.curr_id
-        self.curr_id += 1
-        return result
+    # the symbol as it is sent to a worker process, with only what generating code that uses it needs,
+    # copies maps symbols that are already copied to their copies
+    def getWorkerCopy(self, inline_budget: int, copies: dict["SymbolData", "SymbolData"]) -> "SymbolData":
+        return self
 
 
 class RootContext:
-    def __init__(self, symbols: dict[str, SymbolData], id_manager: IdManager):
+    def __init__(self, symbols: dict[str, SymbolData], labels: LabelTable, inline_budget: int = 0,
+                 function_cache: Optional[FunctionCache] = None,
+                 function_optimizer: Optional[FunctionOptimizer] = None):
         self.symbols = symbols
-        self.id_manager = id_manager
+        self.labels = labels
+        # largest function body in bytes that is inlined at its call sites, 0 disables inlining
+        self.inline_budget = inline_budget
+        self.function_cache = function_cache
+        self.function_optimizer = function_optimizer
+        # symbol -> job generating its code, during parallel generation
+        self.generation_jobs: dict[SymbolData, "GenerationJob"] = {}
+
+
+class GenerationJob:
+    # generates the code of a branch, possibly in a worker process, the job is sent there with everything it needs
+    @abstractmethod
+    def run(self):
+        pass
+
+    # called in the compiling process right before the job is sent to a worker, once the jobs it depends on are done
+    def prepare(self):
+        pass
+
+    # called in the compiling process with the result of run as soon as it is done
+    def finish(self, result, context: RootContext):
+        pass
+
+    # called with the result of run in the order of the branches, once every job is done
+    @abstractmethod
+    def emit(self, result, context: RootContext, emitter: Emitter):
+        pass
+
+
+# runs in a worker process, errors are returned so the one a sequential compile would report can be raised
+def runGenerationJobs(jobs: list[GenerationJob]) -> list:
+    results = []
+    for job in jobs:
+        try:
+            results.append(job.run())
+        except Exception as error:
+            results.append(error)
+    return results
+
+
+# starting worker processes takes longer than generating a few functions
+MIN_PARALLEL_BRANCHES = 64
+MAX_JOB_BATCH = 64
 
 
 class BranchInRoot:
+    # (begin, end) offsets of the source this branch was parsed from
+    span = (-1, -1)
+
     @abstractmethod
-    def generateInstructions(self, context: RootContext) -> list[Instruction]:
+    def generateInstructions(self, context: RootContext, emitter: Emitter):
         pass
 
+    # first phase of parallel generation, declares the symbols of the branch and returns a job generating its code,
+    # with the jobs that have to be done before it can run, branches without a job generate their code right away
+    def declare(self, context: RootContext, emitter: Emitter) -> (Optional[GenerationJob], list[GenerationJob]):
+        self.generateInstructions(context, emitter)
+        return None, []
+
     @abstractmethod
     def printInfo(self, nested_level: int):
         pass
 
+    def simplify(self):
+        pass
+
 
 class BranchInRootFactory:
     @abstractmethod
@@ -42,8 +98,8 @@ class BranchInRootFactory:
 
 
 class InitGenerator:
-    def generateInitInstructions(self, context: RootContext) -> list[Instruction]:
-        return []
+    def generateInitInstructions(self, context: RootContext, emitter: Emitter):
+        pass
 
 
 class RootBranch:
@@ -56,22 +112,117 @@ class RootBranch:
         for branch in self.branches:
             branch.printInfo(nested_level)
 
-    def generateInstructions(self) -> list[Instruction]:
-        instructions = []
-
-        context = RootContext({}, IdManager())
+    def simplify(self):
         for branch in self.branches:
-            instructions += branch.generateInstructions(context)
-
-        start_instructions = []
+            branch.simplify()
+
+    # objects are generated without the start code, the linker adds it to the final image
+    def generateInstructions(self, labels: LabelTable, inline_budget: int = 0,
+                             function_cache: Optional[FunctionCache] = None, start_code: bool = True,
+                             worker_count: int = 1, function_optimizer: Optional[FunctionOptimizer] = None) -> \
+            list[Instruction]:
+        emitter = Emitter()
+        context = RootContext({}, labels, inline_budget, function_cache, function_optimizer)
+        if worker_count > 1 and len(self.branches) >= MIN_PARALLEL_BRANCHES:
+            self.generateInParallel(context, emitter, worker_count)
+        else:
+            for branch in self.branches:
+                outer_span = emitter.beginSpan(branch.span)
+                branch.generateInstructions(context, emitter)
+                emitter.endSpan(outer_span)
+        if not start_code:
+            return emitter.instructions
+
+        # the start code needs every function declared, it is generated last and placed at address 0
+        start_emitter = Emitter()
         for generator in self.init_generators:
-            start_instructions += generator.generateInitInstructions(context)
-
-        start_instructions += [
-            Instructions.Terminate()
-        ]
+            generator.generateInitInstructions(context, start_emitter)
+        start_emitter.emit(Instructions.Terminate())
+
+        start_instructions = start_emitter.instructions
+        if function_optimizer is not None:
+            start_instructions = function_optimizer.optimize(start_instructions)
+        emitter.instructions[:0] = start_instructions
+        return emitter.instructions
+
+    def generateInParallel(self, context: RootContext, emitter: Emitter, worker_count: int):
+        # every symbol is declared first, in order, so each job sees the same symbols as in a sequential compile
+        branch_emitters = []
+        jobs = []
+        # job index -> indices of the jobs that have to be done first
+        dependencies = []
+        job_indices = {}
+        for branch in self.branches:
+            branch_emitter = Emitter()
+            branch_emitter.beginSpan(branch.span)
+            job, job_dependencies = branch.declare(context, branch_emitter)
+            branch_emitters.append((branch_emitter, job))
+            if job is not None:
+                job_indices[job] = len(jobs)
+                jobs.append(job)
+                dependencies.append([job_indices[dependency] for dependency in job_dependencies])
+
+        results = self.runJobs(jobs, dependencies, context, worker_count)
+        # the error that comes first in the source is the one a sequential compile would have stopped at
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+        # labels and code are merged in the order of the branches, so the output doesn't depend on the scheduling
+        for branch_emitter, job in branch_emitters:
+            emitter.extend(branch_emitter.instructions)
+            if job is not None:
+                job.emit(results[job_indices[job]], context, emitter)
 
-        return start_instructions + instructions
+    @staticmethod
+    def runJobs(jobs: list[GenerationJob], dependencies: list[list[int]], context: RootContext, worker_count: int) \
+            -> list:
+        results = [None] * len(jobs)
+        waiting_counts = [len(job_dependencies) for job_dependencies in dependencies]
+        dependents = [[] for _ in jobs]
+        for i, job_dependencies in enumerate(dependencies):
+            for dependency in job_dependencies:
+                dependents[dependency].append(i)
+        ready = [i for i, count in enumerate(waiting_counts) if count == 0]
+        first_error = len(jobs)
+
+        # imported here, it takes longer to import than small programs take to compile
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+        with ProcessPoolExecutor(worker_count) as executor:
+            running = {}
+            while ready or running:
+                # a single function is too little work for a message to a worker, ready jobs are sent in batches
+                # that still leave a few for each worker
+                batch_size = max(1, min(MAX_JOB_BATCH, len(ready) // (worker_count * 4)))
+                for begin in range(0, len(ready), batch_size):
+                    batch = ready[begin:begin + batch_size]
+                    for i in batch:
+                        jobs[i].prepare()
+                    running[executor.submit(runGenerationJobs, [jobs[i] for i in batch])] = batch
+                ready = []
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = running.pop(future)
+                    try:
+                        batch_results = future.result()
+                    except Exception:
+                        # the jobs couldn't be sent to the worker, like a syntax tree deeper than pickle can handle
+                        batch_results = runGenerationJobs([jobs[i] for i in batch])
+                    for i, result in zip(batch, batch_results):
+                        results[i] = result
+                        if isinstance(result, Exception):
+                            first_error = min(first_error, i)
+                            continue
+                        jobs[i].finish(result, context)
+                        for dependent in dependents[i]:
+                            waiting_counts[dependent] -= 1
+                            # jobs after an error are not needed anymore, the error is reported before them
+                            if waiting_counts[dependent] == 0 and dependent < first_error:
+                                ready.append(dependent)
+                ready = [i for i in ready if i < first_error]
+        return results[:first_error + 1]
 
 
 class RootFactory:
@@ -82,8 +233,10 @@ class RootFactory:
         branches = []
         while tokens[pos] != EndToken():
             for factory in RootFactory.factories:
+                begin = pos
                 pos, branch = factory.parse(pos, tokens)
                 if branch is not None:
+                    branch.span = (tokens[begin].pos, tokens[pos - 1].end)
                     branches.append(branch)
                     break
             else:
@@ -1,39 +1,76 @@
 from abc import abstractmethod, ABC
 from copy import copy
+from typing import Optional, Union
 
 from jaclang.error.syntax_error import JaclangSyntaxError
-from jaclang.generator import Instruction
-from jaclang.lexer import Token, Symbols, EndToken
-from jaclang.parser.root import SymbolData, RootContext, IdManager
+from jaclang.generator import RegisterAllocator, Emitter, LabelTable
+from jaclang.lexer import Token, Symbols, EndToken, SymbolToken, KeywordToken
+from jaclang.parser.root import SymbolData, RootContext
 
 
 class StackManager:
+    # variables are addressed with a signed byte offset from the stack base
+    MAX_SIZE = 128
+
     def __init__(self):
         self.top = 0
+        self.size = 0
 
     def allocate(self):
         self.top += 2
+        self.size = max(self.size, self.top)
         return self.top - 2
 
+    # frees every slot allocated after top was returned, the frame keeps its largest size
+    def release(self, top: int):
+        self.top = top
+
     def getSize(self):
-        return self.top
+        return self.size
 
 
 class ScopeContext(RootContext):
-    def __init__(self, symbols: dict[str, SymbolData], id_manager: IdManager, stack_manager: StackManager):
-        super().__init__(symbols, id_manager)
+    def __init__(self, symbols: dict[str, SymbolData], labels: LabelTable, stack_manager: StackManager,
+                 inline_budget: int = 0):
+        super().__init__(symbols, labels, inline_budget)
         self.stack_manager = stack_manager
+        self.register_allocator = RegisterAllocator()
+        # set while generating an inlined function body, returns jump to this label instead of leaving the frame
+        self.inline_return_label: Optional[int] = None
+        # arguments the caller of the current function pushed below the return address
+        self.frame_args_num = 0
 
 
 class BranchInScope:
+    # (begin, end) offsets of the source this branch was parsed from
+    span = (-1, -1)
+
     @abstractmethod
-    def generateInstructions(self, context: ScopeContext) -> list[Instruction]:
+    def generateInstructions(self, context: ScopeContext, emitter: Emitter):
         pass
 
     @abstractmethod
     def printInfo(self, nested_level: int):
         pass
 
+    # returns the branch that replaces this one after constant folding, None if the branch can be dropped
+    def simplify(self) -> Optional["BranchInScope"]:
+        return self
+
+
+# branch that was removed by constant folding, still generated so errors in it are reported
+class DeadBranch(BranchInScope):
+    def __init__(self, branch: BranchInScope):
+        self.branch = branch
+        self.span = branch.span
+
+    def generateInstructions(self, context: ScopeContext, _: Emitter):
+        self.branch.generateInstructions(context, Emitter())
+
+    def printInfo(self, nested_level: int):
+        print("    " * nested_level, "Dead:")
+        self.branch.printInfo(nested_level + 1)
+
 
 # modifier branch is a branch that affects execution of the next branch such as if statement
 class ModifierBranchInScope(BranchInScope, ABC):
@@ -41,22 +78,88 @@ class ModifierBranchInScope(BranchInScope, ABC):
         self.branch: BranchInScope
 
 
+def getTokenKind(token: Token):
+    # symbols and keywords are told apart by value, other tokens only by their type
+    return token if type(token) is SymbolToken or type(token) is KeywordToken else type(token)
+
+
+class ParsedTokens(list):
+    # the tokens of one parse, which also keep the results of its parse attempts keyed by (factory type, token index),
+    # so the results are dropped with the tokens at the end of the parse
+    def __init__(self, tokens: list[Token]):
+        super().__init__(tokens)
+        self.memo: dict[tuple[type, int], Union[tuple[int, BranchInScope], JaclangSyntaxError]] = {}
+
+
 class BranchInScopeFactory:
+    # token kinds a branch of this factory can begin with, None if it can begin with anything
+    first_tokens: Optional[list] = None
+
     @abstractmethod
     def parseImpl(self, pos: int, tokens: list[Token]) -> (int, BranchInScope):
         pass
 
+    def getFirstTokens(self) -> Optional[list]:
+        return self.first_tokens
+
+    def parseMemoized(self, pos: int, tokens: ParsedTokens) -> Union[tuple[int, BranchInScope], JaclangSyntaxError]:
+        key = (type(self), pos)
+        result = tokens.memo.get(key)
+        if result is None:
+            try:
+                end, branch = self.parseImpl(pos, tokens)
+                branch.span = (tokens[pos].pos, tokens[end - 1].end)
+                result = end, branch
+            except TokenExpectedException as exception:
+                # the traceback would keep every frame of the failed attempt alive
+                result = exception.with_traceback(None)
+            tokens.memo[key] = result
+        return result
+
     def parseExpect(self, pos: int, tokens: list[Token]) -> (int, BranchInScope):
-        try:
-            return self.parseImpl(pos, tokens)
-        except TokenExpectedException as exception:
-            raise TokenNeededException(exception.pos, exception.message)
+        result = self.parseMemoized(pos, tokens)
+        if type(result) is TokenExpectedException:
+            raise TokenNeededException(result.pos, result.message)
+        return result
 
     def parseDontExpect(self, pos: int, tokens: list[Token]) -> (int, BranchInScope):
-        try:
-            return self.parseImpl(pos, tokens)
-        except TokenExpectedException as _:
+        result = self.parseMemoized(pos, tokens)
+        if type(result) is TokenExpectedException:
             return pos, None
+        return result
+
+
+class DispatchIndex:
+    def __init__(self, factories: list[BranchInScopeFactory]):
+        self.factories = factories
+        self.indexed_count = -1
+        self.candidates = {}
+        self.fallback = []
+
+    def build(self):
+        self.candidates = {}
+        self.fallback = []
+        for factory in self.factories:
+            first_tokens = factory.getFirstTokens()
+            if first_tokens is None:
+                # factories that can begin with anything stay candidates for every token in registration order
+                for candidates in self.candidates.values():
+                    candidates.append(factory)
+                self.fallback.append(factory)
+            else:
+                for kind in first_tokens:
+                    self.candidates.setdefault(kind, list(self.fallback)).append(factory)
+        self.indexed_count = len(self.factories)
+
+    def getCandidates(self, token: Token) -> list[BranchInScopeFactory]:
+        if self.indexed_count != len(self.factories):
+            self.build()
+        return self.candidates.get(getTokenKind(token), self.fallback)
+
+    def getFirstTokens(self) -> Optional[list]:
+        if self.indexed_count != len(self.factories):
+            self.build()
+        return None if self.fallback else list(self.candidates.keys())
 
 
 # Parser did not recognize branch type (throws if you need to have a branch present somewhere)
@@ -78,27 +181,41 @@ class ScopeBranch(BranchInScope):
         for branch in self.branches:
             branch.printInfo(nested_level + 1)
 
-    def generateInstructions(self, context: ScopeContext) -> list[Instruction]:
+    def simplify(self) -> Optional[BranchInScope]:
+        branches = []
+        for branch in self.branches:
+            branch = branch.simplify()
+            if branch is not None:
+                branches.append(branch)
+        self.branches = branches
+        return self
+
+    def generateInstructions(self, context: ScopeContext, emitter: Emitter):
         copied_context = context
         copied_context.symbols = copy(context.symbols)
-        instructions = []
         for branch in self.branches:
-            instructions += branch.generateInstructions(copied_context)
-        return instructions
+            outer_span = emitter.beginSpan(branch.span)
+            branch.generateInstructions(copied_context, emitter)
+            emitter.endSpan(outer_span)
 
 
 class ScopeFactory(BranchInScopeFactory):
     factories = []
+    dispatch_index = DispatchIndex(factories)
+    first_tokens = [Symbols.LEFT_BRACE]
 
     @staticmethod
     def parseStatement(pos: int, tokens: list[Token]) -> (int, BranchInScope):
-        for factory in ScopeFactory.factories:
+        for factory in ScopeFactory.dispatch_index.getCandidates(tokens[pos]):
             pos, branch = factory.parseDontExpect(pos, tokens)
             if branch is not None:
                 if issubclass(type(branch), ModifierBranchInScope):
                     pos, subbranch = ScopeFactory.parseStatement(pos, tokens)
                     branch.branch = subbranch
+                    branch.span = (branch.span[0], subbranch.span[1])
 
+                # the parser never backtracks over a finished statement, so earlier attempts are not needed anymore
+                tokens.memo.clear()
                 return pos, branch
 
         if tokens[pos] == EndToken():
@@ -1,7 +1,8 @@
 from jaclang.parser import ValueFactory, RootFactory
 from jaclang.parser.scope import ScopeFactory
 from jaclang.parser.variable.assignment import VariableAssignmentFactory
-from jaclang.parser.variable.declaration import VariableDeclarationFactory, GlobalVariableDeclarationFactory
+from jaclang.parser.variable.declaration import VariableDeclarationFactory, GlobalVariableDeclarationFactory, \
+    ExternGlobalVariableDeclarationFactory
 from jaclang.parser.variable.value import VariableFactory
 
 
@@ -10,3 +11,4 @@ def load():
     ScopeFactory.factories.append(VariableDeclarationFactory())
     ScopeFactory.factories.append(VariableAssignmentFactory())
     RootFactory.factories.append(GlobalVariableDeclarationFactory())
+    RootFactory.factories.append(ExternGlobalVariableDeclarationFactory())
@@ -1,7 +1,7 @@
 from typing import Optional
 
 from jaclang.error.syntax_error import JaclangSyntaxError
-from jaclang.generator import Instruction, Registers, Instructions
+from jaclang.generator import Registers, Instructions, Emitter
 from jaclang.lexer import IdentifierToken, Token, Symbols
 from jaclang.parser.expression.expression import ExpressionFactory
 from jaclang.parser.expression.value import ValueBranch
@@ -24,28 +24,27 @@ class VariableAssignmentBranch(BranchInScope):
         self.variable_name = variable_name
         self.value = value
 
-    def generateInstructions(self, context: ScopeContext) -> list[Instruction]:
+    def generateInstructions(self, context: ScopeContext, emitter: Emitter):
         if self.variable_name not in context.symbols.keys():
-            raise JaclangSyntaxError(-1, f"Variable '{self.variable_name}' not found")
+            raise JaclangSyntaxError(self.span[0], f"Variable '{self.variable_name}' not found")
         variable_obj = context.symbols[self.variable_name]
-        instructions = []
         if self.value is not None:
-            instructions += self.value.generateInstructions(context)
+            self.value.generateInstructions(context, emitter)
         if type(variable_obj) is VariableData:
             if self.value is not None:
-                instructions += [
-                    Instructions.MemoryWrite(Registers.STACK_BASE, variable_obj.pos_on_stack, Registers.RETURN),
-                ]
+                emitter.emit(Instructions.MemoryWrite(Registers.STACK_BASE, variable_obj.pos_on_stack, Registers.RETURN))
         elif type(variable_obj) is GlobalVariableData:
             if self.value is not None:
-                instructions += [
-                    Instructions.ImmediateLabel(Registers.ADDRESS, f"var {self.variable_name}"),
-                    Instructions.MemoryWrite(Registers.ADDRESS, 0, Registers.RETURN),
-                ]
+                variable_label = context.labels.getNamed(f"var {self.variable_name}")
+                emitter.emit(Instructions.ImmediateLabel(Registers.ADDRESS, variable_label))
+                emitter.emit(Instructions.MemoryWrite(Registers.ADDRESS, 0, Registers.RETURN))
         else:
-            raise JaclangSyntaxError(-1, f"Label '{self.variable_name}' is not a variable")
+            raise JaclangSyntaxError(self.span[0], f"Label '{self.variable_name}' is not a variable")
 
-        return instructions
+    def simplify(self) -> BranchInScope:
+        if self.value is not None:
+            self.value = self.value.simplify()
+        return self
 
     def printInfo(self, nested_level: int):
         print('    ' * nested_level, "VariableAssignment:")
@@ -55,6 +54,8 @@ class VariableAssignmentBranch(BranchInScope):
 
 
 class VariableAssignmentFactory(BranchInScopeFactory):
+    first_tokens = [IdentifierToken]
+
     def parseImpl(self, pos: int, tokens: list[Token]) -> (int, BranchInScope):
         if type(tokens[pos]) is not IdentifierToken:
             raise TokenExpectedException(tokens[pos].pos, "Expected variable name after var keyword")
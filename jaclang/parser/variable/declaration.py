@@ -1,7 +1,7 @@
 from typing import Optional
 
 from jaclang.error.syntax_error import JaclangSyntaxError
-from jaclang.generator import Instruction, Instructions
+from jaclang.generator import Instructions, Emitter
 from jaclang.lexer import Token, Keywords, IdentifierToken, Symbols
 from jaclang.parser.expression import ExpressionFactory
 from jaclang.parser.expression.value import ValueBranch
@@ -16,14 +16,16 @@ class VariableDeclarationBranch(BranchInScope):
         self.variable_name = variable_name
         self.assignment = VariableAssignmentBranch(variable_name, value)
 
-    def generateInstructions(self, context: ScopeContext) -> list[Instruction]:
+    def generateInstructions(self, context: ScopeContext, emitter: Emitter):
         pos_on_stack = context.stack_manager.allocate()
         context.symbols[self.variable_name] = VariableData(pos_on_stack)
 
-        instructions = []
         if self.assignment is not None:
-            instructions += self.assignment.generateInstructions(context)
-        return instructions
+            self.assignment.generateInstructions(context, emitter)
+
+    def simplify(self) -> BranchInScope:
+        self.assignment.simplify()
+        return self
 
     def printInfo(self, nested_level: int):
         print('    ' * nested_level, "VariableDeclaration:")
@@ -33,6 +35,8 @@ class VariableDeclarationBranch(BranchInScope):
 
 
 class VariableDeclarationFactory(BranchInScopeFactory):
+    first_tokens = [Keywords.VAR]
+
     def parseImpl(self, pos: int, tokens: list[Token]) -> (int, BranchInScope):
         if tokens[pos] != Keywords.VAR:
             raise TokenExpectedException(tokens[pos].pos, "Expected var keyword")
@@ -56,19 +60,30 @@ class GlobalVariableDeclarationBranch(BranchInRoot):
     def __init__(self, variable_name: str):
         self.variable_name = variable_name
 
-    def generateInstructions(self, context: RootContext) -> list[Instruction]:
+    def generateInstructions(self, context: RootContext, emitter: Emitter):
         context.symbols[self.variable_name] = GlobalVariableData()
 
-        return [
-            Instructions.Label(f"var {self.variable_name}"),
-            Instructions.Value(0),
-        ]
+        emitter.emit(Instructions.Label(context.labels.getNamed(f"var {self.variable_name}")))
+        emitter.emit(Instructions.Value(0))
 
     def printInfo(self, nested_level: int):
         print('    ' * nested_level, "GlobalVariableDeclaration:")
         print('    ' * nested_level, f"    name: {self.variable_name}")
 
 
+class ExternGlobalVariableDeclarationBranch(BranchInRoot):
+    def __init__(self, variable_name: str):
+        self.variable_name = variable_name
+
+    def generateInstructions(self, context: RootContext, emitter: Emitter):
+        # the value is in another object or later in this file, it is accessed through the "var X" label
+        context.symbols[self.variable_name] = GlobalVariableData()
+
+    def printInfo(self, nested_level: int):
+        print('    ' * nested_level, "ExternGlobalVariableDeclaration:")
+        print('    ' * nested_level, f"    name: {self.variable_name}")
+
+
 class GlobalVariableDeclarationFactory(BranchInRootFactory):
     def parse(self, pos: int, tokens: list[Token]) -> (int, BranchInRoot):
         if tokens[pos] != Keywords.VAR:
@@ -82,3 +97,12 @@ class GlobalVariableDeclarationFactory(BranchInRootFactory):
         pos += 1
 
         return pos, GlobalVariableDeclarationBranch(variable_name)
+
+
+class ExternGlobalVariableDeclarationFactory(BranchInRootFactory):
+    def parse(self, pos: int, tokens: list[Token]) -> (int, BranchInRoot):
+        if tokens[pos] != Keywords.EXTERN or tokens[pos + 1] != Keywords.VAR:
+            return pos, None
+
+        pos, branch = GlobalVariableDeclarationFactory().parse(pos + 1, tokens)
+        return pos, ExternGlobalVariableDeclarationBranch(branch.variable_name)
@@ -1,46 +1,70 @@
-from jaclang.generator import Instruction, Instructions, Registers
+from typing import Optional
+
+from jaclang.generator import Instructions, Registers, Emitter
 from jaclang.lexer import Token, Keywords
 from jaclang.parser.expression import ExpressionFactory
 from jaclang.parser.expression.value import ValueBranch
-from jaclang.parser.scope import ScopeFactory, BranchInScope, BranchInScopeFactory, ModifierBranchInScope, \
+from jaclang.parser.integer import IntegerBranch
+from jaclang.parser.scope import ScopeFactory, ScopeBranch, DeadBranch, BranchInScope, BranchInScopeFactory, ModifierBranchInScope, \
     TokenExpectedException, ScopeContext
 
 
 class WhileStatementBranch(ModifierBranchInScope):
     def __init__(self, condition: ValueBranch):
         super().__init__()
-        self.condition = condition
-
-    def generateInstructions(self, context: ScopeContext) -> list[Instruction]:
-        while_begin = f"while begin {context.id_manager.requestId()}"
-        while_begin2 = f"while begin2 {context.id_manager.requestId()}"
-        while_end = f"while end {context.id_manager.requestId()}"
-        instructions = [
-            Instructions.Label(while_begin),
-        ]
-        instructions += self.condition.generateInstructions(context)
-        instructions += [
-            Instructions.ImmediateLabel(Registers.ADDRESS, while_begin2),
-            Instructions.JumpIf(Registers.ADDRESS),
-            Instructions.ImmediateLabel(Registers.ADDRESS, while_end),
-            Instructions.Jump(Registers.ADDRESS),
-            Instructions.Label(while_begin2),
-        ]
-        instructions += self.branch.generateInstructions(context)
-        instructions += [
-            Instructions.ImmediateLabel(Registers.ADDRESS, while_begin),
-            Instructions.Jump(Registers.ADDRESS),
-            Instructions.Label(while_end),
-        ]
-        return instructions
+        # None if the condition is always true
+        self.condition: Optional[ValueBranch] = condition
+
+    def simplify(self) -> Optional[BranchInScope]:
+        branch = self.branch.simplify()
+        self.branch = branch if branch is not None else ScopeBranch([])
+        if self.condition is None:
+            return self
+        self.condition = self.condition.simplify()
+        if type(self.condition) is IntegerBranch:
+            if self.condition.getWord() != 1:
+                return DeadBranch(self.branch)
+            self.condition = None
+        return self
+
+    def generateInstructions(self, context: ScopeContext, emitter: Emitter):
+        while_begin = context.labels.createNumbered("while begin")
+        if self.condition is None:
+            emitter.emit(Instructions.Label(while_begin))
+            outer_span = emitter.beginSpan(self.branch.span)
+            self.branch.generateInstructions(context, emitter)
+            emitter.endSpan(outer_span)
+            emitter.emit(Instructions.ImmediateLabel(Registers.ADDRESS, while_begin))
+            emitter.emit(Instructions.Jump(Registers.ADDRESS))
+            return
+
+        # the condition is checked at the bottom, so each iteration takes a single conditional jump back
+        while_condition = context.labels.createNumbered("while condition")
+        emitter.emit(Instructions.ImmediateLabel(Registers.ADDRESS, while_condition))
+        emitter.emit(Instructions.Jump(Registers.ADDRESS))
+        emitter.emit(Instructions.Label(while_begin))
+        outer_span = emitter.beginSpan(self.branch.span)
+        self.branch.generateInstructions(context, emitter)
+        emitter.endSpan(outer_span)
+        emitter.emit(Instructions.Label(while_condition))
+        outer_span = emitter.beginSpan(self.condition.span)
+        self.condition.generateInstructions(context, emitter)
+        emitter.emit(Instructions.ImmediateLabel(Registers.ADDRESS, while_begin))
+        emitter.emit(Instructions.JumpIf(Registers.ADDRESS))
+        emitter.endSpan(outer_span)
 
     def printInfo(self, nested_level: int):
         print("    " * nested_level, "WhileStatement:")
-        self.condition.printInfo(nested_level + 1)
+        if self.condition is None:
+            print("    " * (nested_level + 1), "always")
+        else:
+            self.condition.printInfo(nested_level + 1)
         self.branch.printInfo(nested_level + 1)
 
 
 class WhileStatementFactory(BranchInScopeFactory):
+    first_tokens = [Keywords.WHILE]
+
     def parseImpl(self, pos: int, tokens: list[Token]) -> (int, BranchInScope):
         if tokens[pos] != Keywords.WHILE:
             raise TokenExpectedException(tokens[pos].pos, "Expected while keyword")
@@ -1,42 +1,53 @@
-from jaclang.error.syntax_error import JaclangSyntaxError
-
+import re
+from io import StringIO
+from typing import TextIO, Union
 
-def removeSingleLineComments(code: str) -> str:
-    new_code = ""
-    is_in_comment = False
-    for i, c in enumerate(code):
-        if i < len(code) - 1 and c == '/' and code[i + 1] == '/':
-            is_in_comment = True
+from jaclang.error.syntax_error import JaclangSyntaxError
 
-        if c == '\n':
-            is_in_comment = False
+CODE_PATTERN = re.compile(r"//|/\*|\*/(?!/)")
+COMMENT_PATTERN = re.compile(r"/\*|\*/")
+WHITESPACE = str.maketrans("\n\t\r", "   ")
 
-        new_code += " " if is_in_comment else c
 
-    return new_code
+def blank(text: str) -> str:
+    # keep line breaks so the preprocessed code lines up with the source
+    return re.sub(r"[^\n]", " ", text)
 
 
-def removeMultilineComments(code: str) -> str:
-    new_code = ""
+def removeComments(lines: TextIO) -> list[str]:
+    parts = []
     comment_nesting = 0
-    for i, c in enumerate(code):
-        if i < len(code) - 1 and c == '/' and code[i + 1] == '*':
-            comment_nesting += 1
-
-        if i > 1 and code[i - 2] == '*' and code[i - 1] == '/':
+    line_offset = 0
+    for line in lines:
+        pos = 0
+        while True:
+            match = (COMMENT_PATTERN if comment_nesting > 0 else CODE_PATTERN).search(line, pos)
+            if match is None:
+                parts.append(line[pos:] if comment_nesting == 0 else blank(line[pos:]))
+                break
+
+            symbol = match.group()
             if comment_nesting > 0:
-                comment_nesting -= 1
+                parts.append(blank(line[pos:match.end()]))
+                comment_nesting += 1 if symbol == "/*" else -1
+            elif symbol == "//":
+                parts.append(line[pos:match.start()])
+                parts.append(blank(line[match.start():]))
+                break
+            elif symbol == "/*":
+                parts.append(line[pos:match.start()])
+                parts.append("  ")
+                comment_nesting += 1
             else:
-                raise JaclangSyntaxError(i - 2, "Closed unopened multiline comment")
-
-        new_code += c if comment_nesting == 0 else " "
-
-    return new_code
+                raise JaclangSyntaxError(line_offset + match.start(), "Closed unopened multiline comment")
+            pos = match.end()
+        line_offset += len(line)
+    return parts
 
 
-def preprocess(file_contents: str, debug_output: bool = False) -> str:
-    file_contents = removeSingleLineComments(file_contents)
-    file_contents = removeMultilineComments(file_contents)
+def preprocess(source: Union[str, TextIO], debug_output: bool = False) -> str:
+    lines = StringIO(source) if isinstance(source, str) else source
+    file_contents = "".join(removeComments(lines))
 
     if debug_output:
         print("Preprocessed code:")
@@ -44,5 +55,4 @@ def preprocess(file_contents: str, debug_output: bool = False) -> str:
         print(file_contents)
         print("---------------------------------")
 
-    file_contents = file_contents.replace("\n", " ").replace("\t", " ")
-    return file_contents
+    return file_contents.translate(WHITESPACE)
@@ -0,0 +1 @@
+from jaclang.server.server import handleRequest, serveStream, serveSocket
@@ -0,0 +1,143 @@
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import TextIO
+
+from jaclang import compileJaclang, compileJaclangObject
+from jaclang.error.syntax_error import JaclangSyntaxError
+from jaclang.source_map import SourceMap
+
+
+class ThreadOutput:
+    # stands in for stdout, what a thread prints while it compiles a request goes to the output of that request
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.local = threading.local()
+
+    def getStream(self) -> TextIO:
+        output = getattr(self.local, "output", None)
+        return self.stream if output is None else output
+
+    def write(self, text: str) -> int:
+        return self.getStream().write(text)
+
+    def flush(self):
+        self.getStream().flush()
+
+
+install_lock = threading.Lock()
+
+
+# requests of different connections are compiled at the same time, so stdout can't be swapped for one of them
+@contextmanager
+def captureOutput(output: io.StringIO):
+    with install_lock:
+        if type(sys.stdout) is not ThreadOutput:
+            sys.stdout = ThreadOutput(sys.stdout)
+        thread_output = sys.stdout
+    thread_output.local.output = output
+    try:
+        yield
+    finally:
+        thread_output.local.output = None
+
+
+def getSyntaxDiagnostic(error: JaclangSyntaxError, source_map: SourceMap) -> dict:
+    diagnostic = {"severity": "error", "kind": "SyntaxError", "message": error.message, "pos": error.pos}
+    if error.pos != -1:
+        line_num, column = source_map.getLineAndColumn(error.pos)
+        diagnostic["line"] = line_num
+        diagnostic["column"] = column + 1
+    return diagnostic
+
+
+def getErrorResponse(request_id, kind: str, message: str) -> dict:
+    return {"id": request_id, "ok": False, "diagnostics": [{"severity": "error", "kind": kind, "message": message}]}
+
+
+# compiles {"id": any, "source": str, "options": [str], "object": name} into {"id", "ok", "binary" or "object" as hex,
+# "size", "diagnostics", "stage_times", "output", "time"}, without "object" the source is compiled into a program
+def handleRequest(request) -> dict:
+    request_id = request.get("id") if type(request) is dict else None
+    if type(request) is not dict or type(request.get("source")) is not str:
+        return getErrorResponse(request_id, "InvalidRequest", "A request needs the source as a string")
+    options = request.get("options", [])
+    if type(options) is not list or any(type(option) is not str for option in options):
+        return getErrorResponse(request_id, "InvalidRequest", "Options must be a list of strings")
+    object_name = request.get("object")
+    if object_name is not None and type(object_name) is not str:
+        return getErrorResponse(request_id, "InvalidRequest", "The object name must be a string")
+
+    source = request["source"]
+    source_map = SourceMap(source)
+    stage_times = {}
+    # debug options print like on the command line, the text is sent back instead of mixing with the responses
+    output = io.StringIO()
+    response = {"id": request_id, "ok": False}
+    begin = time.perf_counter()
+    try:
+        with captureOutput(output):
+            if object_name is None:
+                code = bytes(compileJaclang(source, options, stage_times, source_map))
+                response["binary"] = code.hex()
+            else:
+                code = compileJaclangObject(source, options, object_name, stage_times).toBytes()
+                response["object"] = code.hex()
+        response["ok"] = True
+        response["size"] = len(code)
+        response["diagnostics"] = []
+    except JaclangSyntaxError as error:
+        response["diagnostics"] = [getSyntaxDiagnostic(error, source_map)]
+    except Exception as error:
+        # like a bad option value or a program nested too deeply, the server keeps running for the next request
+        response["diagnostics"] = [{"severity": "error", "kind": type(error).__name__, "message": str(error)}]
+    response["stage_times"] = stage_times
+    response["output"] = output.getvalue()
+    response["time"] = time.perf_counter() - begin
+    return response
+
+
+# answers every request line with a response line, in order, until the input is closed
+def serveStream(input_stream: TextIO, output_stream: TextIO):
+    for line in input_stream:
+        if not line.strip():
+            continue
+        try:
+            response = handleRequest(json.loads(line))
+        except json.JSONDecodeError as error:
+            response = getErrorResponse(None, "InvalidRequest", f"Invalid JSON: {error}")
+        output_stream.write(json.dumps(response) + "\n")
+        output_stream.flush()
+
+
+class CompileRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        serveStream(io.TextIOWrapper(self.rfile, encoding="utf-8"),
+                    io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True))
+
+
+# every connection is a stream of requests like stdin, connections are served at the same time
+def serveSocket(path: str):
+    if not hasattr(socket, "AF_UNIX"):
+        raise OSError("Unix sockets are not supported on this platform")
+    # a socket left behind by a server that didn't shut down, other files are never removed
+    if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+        with socket.socket(socket.AF_UNIX) as client:
+            if client.connect_ex(path) == 0:
+                raise OSError(f"Another server is already listening on {path}")
+        os.remove(path)
+
+    server = socketserver.ThreadingUnixStreamServer(path, CompileRequestHandler)
+    server.daemon_threads = True
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.remove(path)
@@ -0,0 +1 @@
+from .source_map import SourceMap
@@ -0,0 +1,48 @@
+from bisect import bisect_right
+from typing import Optional
+
+
+class SourceMap:
+    def __init__(self, file_contents: str):
+        self.file_contents = file_contents
+        self.line_starts = [0]
+        newline = file_contents.find("\n")
+        while newline != -1:
+            self.line_starts.append(newline + 1)
+            newline = file_contents.find("\n", newline + 1)
+
+        # sorted, non overlapping (pc begin, pc end, source begin, source end)
+        self.pc_ranges: list[(int, int, int, int)] = []
+        self.pc_begins: list[int] = []
+
+    def getLineNumber(self, pos: int) -> int:
+        return bisect_right(self.line_starts, pos)
+
+    def getLineAndColumn(self, pos: int) -> (int, int):
+        line_num = self.getLineNumber(pos)
+        return line_num, pos - self.line_starts[line_num - 1]
+
+    def getLine(self, line_num: int) -> str:
+        begin = self.line_starts[line_num - 1]
+        if line_num < len(self.line_starts):
+            return self.file_contents[begin:self.line_starts[line_num] - 1]
+        return self.file_contents[begin:]
+
+    def addRange(self, pc_begin: int, pc_end: int, span: (int, int)):
+        if self.pc_ranges and self.pc_ranges[-1][1] == pc_begin and self.pc_ranges[-1][2:] == span:
+            self.pc_ranges[-1] = (self.pc_ranges[-1][0], pc_end) + span
+            return
+        self.pc_ranges.append((pc_begin, pc_end) + span)
+        self.pc_begins.append(pc_begin)
+
+    def lookupPc(self, pc: int) -> Optional[tuple[int, int]]:
+        index = bisect_right(self.pc_begins, pc) - 1
+        if index < 0 or pc >= self.pc_ranges[index][1]:
+            return None
+        return self.pc_ranges[index][2:]
+
+    def printRanges(self):
+        for pc_begin, pc_end, source_begin, source_end in self.pc_ranges:
+            line_num, column = self.getLineAndColumn(source_begin)
+            source = self.file_contents[source_begin:source_end].split("\n")[0]
+            print(f"    {pc_begin:>5}-{pc_end:<5} line {line_num}:{column + 1} {source}")
@@ -1,34 +1,215 @@
-from os import listdir
-from os.path import dirname
+import argparse
+import json
+import os
+import time
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from os.path import dirname, join, relpath
+from typing import Optional
 
-from jaclang import compileJaclang
+from jaclang import compileJaclang, compileJaclangObject
+from jaclang.binary_writer.fake_keyboard import replayUpload
+from jaclang.binary_writer.upload_plan import UploadTiming
+from jaclang.error.link_error import JaclangLinkError
+from jaclang.error.syntax_error import JaclangSyntaxError
+from jaclang.linker import link
 from virtual_machine import VirtualMachine
 
 
-def main():
-    success_count = 0
-    test_count = 0
-    tests_dir = dirname(__file__) + "/tests/"
-    for file in sorted(listdir(tests_dir)):
-        if file.endswith(".jl"):
-            with open(tests_dir + file, "r") as jl_file:
-                file_contents = jl_file.read()
-            lines = file_contents.split("\n")
-            line_tokens = lines[0].split(" ")
-            if len(line_tokens) != 3 or line_tokens[0:2] != ["///", "expect"]:
-                continue
-            expected_value = int(line_tokens[2])
-            binary_code = compileJaclang(file_contents, [])
+class TestResult:
+    def __init__(self, name: str):
+        self.name = name
+        self.expected: Optional[int] = None
+        self.actual: Optional[int] = None
+        self.success = False
+        self.error: Optional[str] = None
+        self.compile_times: dict[str, float] = {}
+        self.binary_size = 0
+        self.cycles = 0
+        self.max_stack = 0
+        self.run_time = 0.0
+        # seconds writing the program to logic world would take
+        self.upload_time = 0.0
+
+    def toJson(self) -> dict:
+        return {
+            "name": self.name,
+            "success": self.success,
+            "expected": self.expected,
+            "actual": self.actual,
+            "error": self.error,
+            "compile_times": self.compile_times,
+            "binary_size": self.binary_size,
+            "cycles": self.cycles,
+            "max_stack": self.max_stack,
+            "run_time": self.run_time,
+            "upload_time": self.upload_time,
+        }
+
+
+def readExpectedValue(file_contents: str) -> Optional[int]:
+    line_tokens = file_contents.split("\n")[0].split(" ")
+    if len(line_tokens) != 3 or line_tokens[0:2] != ["///", "expect"]:
+        return None
+    return int(line_tokens[2])
+
+
+# files listed on a "/// link" line are compiled separately and linked with the test
+def readLinkedFiles(file_contents: str) -> list[str]:
+    lines = file_contents.split("\n")
+    line_tokens = lines[1].split(" ") if len(lines) > 1 else []
+    if len(line_tokens) < 3 or line_tokens[0:2] != ["///", "link"]:
+        return []
+    return line_tokens[2:]
+
+
+def compileLinked(tests_dir: str, name: str, file_contents: str, linked_files: list[str], options: list[str],
+                  compile_times: dict[str, float]) -> bytearray:
+    objects = [compileJaclangObject(file_contents, options, name, compile_times)]
+    for linked_file in linked_files:
+        with open(join(tests_dir, linked_file), "r") as jl_file:
+            stage_times = {}
+            objects.append(compileJaclangObject(jl_file.read(), options, linked_file, stage_times))
+        for stage, duration in stage_times.items():
+            compile_times[stage] += duration
+
+    begin = time.perf_counter()
+    binary_code = link(objects)
+    compile_times["link"] = time.perf_counter() - begin
+    return binary_code
+
+
+def runTest(tests_dir: str, name: str) -> Optional[TestResult]:
+    with open(join(tests_dir, name), "r") as jl_file:
+        file_contents = jl_file.read()
+    expected_value = readExpectedValue(file_contents)
+    if expected_value is None:
+        return None
+
+    result = TestResult(name)
+    result.expected = expected_value
+    try:
+        linked_files = readLinkedFiles(file_contents)
+        if linked_files:
+            # also linked without optimizations, which keep every call between the functions of an object
             virtual_machine = VirtualMachine(2**16)
-            virtual_machine.run(binary_code)
-            success = virtual_machine.getReturnCode() == expected_value
-            test_count += 1
-            if success:
-                success_count += 1
-            print(f"Testing {file} {len(binary_code)}B, {virtual_machine.getCycleCount()} cycles, ram used {virtual_machine.max_stack}B ... {'SUCCESS' if success else 'FAIL'}")
-            if not success:
-                print(f"Test failed: expected {expected_value} but got {virtual_machine.getReturnCode()}")
-    print(f"Test results: {success_count} succeeded out of {test_count}")
+            virtual_machine.run(compileLinked(tests_dir, name, file_contents, linked_files, ["-O0"], {}))
+            if virtual_machine.getReturnCode() != expected_value:
+                raise ValueError(f"Linked at -O0, the program returned {virtual_machine.getReturnCode()}")
+            binary_code = compileLinked(tests_dir, name, file_contents, linked_files, [], result.compile_times)
+        else:
+            binary_code = compileJaclang(file_contents, [], result.compile_times)
+        result.binary_size = len(binary_code)
+
+        # the keys of the upload are played on a fake keyboard, which has to receive the same words from them as
+        # from the keys of the old writer
+        for simple in (True, False):
+            keyboard = replayUpload(binary_code, UploadTiming(), simple)
+            if not keyboard.hasWritten(binary_code):
+                raise ValueError("Upload doesn't write the binary code")
+        result.upload_time = keyboard.time
+
+        virtual_machine = VirtualMachine(2**16)
+        begin = time.perf_counter()
+        virtual_machine.run(binary_code)
+        result.run_time = time.perf_counter() - begin
+
+        result.actual = virtual_machine.getReturnCode()
+        result.cycles = virtual_machine.getCycleCount()
+        result.max_stack = virtual_machine.max_stack
+        result.success = result.actual == expected_value
+    except JaclangSyntaxError as error:
+        result.error = f"SyntaxError: {error.message}"
+    except JaclangLinkError as error:
+        result.error = f"LinkError: {error.message}"
+    except Exception as error:
+        result.error = f"{type(error).__name__}: {error}"
+    return result
+
+
+def findTests(tests_dir: str, patterns: list[str]) -> list[str]:
+    names = []
+    for directory, _, files in os.walk(tests_dir):
+        for file in files:
+            name = relpath(join(directory, file), tests_dir)
+            if file.endswith(".jl") and (not patterns or any(fnmatch(name, pattern) for pattern in patterns)):
+                names.append(name)
+    return sorted(names)
+
+
+def writeJson(results: list[TestResult], path: str):
+    with open(path, "w") as file:
+        json.dump({
+            "total": len(results),
+            "succeeded": sum(result.success for result in results),
+            "tests": [result.toJson() for result in results],
+        }, file, indent=2)
+
+
+def writeJunit(results: list[TestResult], path: str):
+    suite = ElementTree.Element("testsuite", {
+        "name": "jaclang_test",
+        "tests": str(len(results)),
+        "failures": str(sum(not result.success and result.error is None for result in results)),
+        "errors": str(sum(result.error is not None for result in results)),
+        "time": f"{sum(sum(result.compile_times.values()) + result.run_time for result in results):.6f}",
+    })
+    for result in results:
+        case = ElementTree.SubElement(suite, "testcase", {
+            "classname": "jaclang_test",
+            "name": result.name,
+            "time": f"{sum(result.compile_times.values()) + result.run_time:.6f}",
+        })
+        properties = ElementTree.SubElement(case, "properties")
+        values = {f"compile_time.{stage}": f"{duration:.6f}" for stage, duration in result.compile_times.items()}
+        values.update(binary_size=result.binary_size, cycles=result.cycles, max_stack=result.max_stack,
+                      upload_time=f"{result.upload_time:.1f}")
+        for name, value in values.items():
+            ElementTree.SubElement(properties, "property", {"name": name, "value": str(value)})
+
+        if result.error is not None:
+            ElementTree.SubElement(case, "error", {"message": result.error})
+        elif not result.success:
+            ElementTree.SubElement(case, "failure", {
+                "message": f"expected {result.expected} but got {result.actual}",
+            })
+    ElementTree.ElementTree(suite).write(path, encoding="utf-8", xml_declaration=True)
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(prog="jaclang_test", description="Compile and run jaclang tests")
+    argument_parser.add_argument("patterns", nargs="*", help="only run tests matching these glob patterns")
+    argument_parser.add_argument("--dir", default=join(dirname(__file__), "tests"), help="directory with .jl tests")
+    argument_parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="number of worker processes")
+    argument_parser.add_argument("--json", help="write results as json to this file")
+    argument_parser.add_argument("--junit", help="write results as junit xml to this file")
+    args = argument_parser.parse_args()
+
+    names = findTests(args.dir, args.patterns)
+    if args.jobs > 1 and len(names) > 1:
+        with ProcessPoolExecutor(args.jobs) as executor:
+            results = list(executor.map(runTest, [args.dir] * len(names), names, chunksize=8))
+    else:
+        results = [runTest(args.dir, name) for name in names]
+    results = [result for result in results if result is not None]
+
+    for result in results:
+        print(f"Testing {result.name} {result.binary_size}B, {result.cycles} cycles, ram used {result.max_stack}B ... {'SUCCESS' if result.success else 'FAIL'}")
+        if result.error is not None:
+            print(f"Test failed: {result.error}")
+        elif not result.success:
+            print(f"Test failed: expected {result.expected} but got {result.actual}")
+
+    success_count = sum(result.success for result in results)
+    print(f"Test results: {success_count} succeeded out of {len(results)}")
+
+    if args.json:
+        writeJson(results, args.json)
+    if args.junit:
+        writeJunit(results, args.junit)
+    if success_count != len(results):
+        exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,275 @@
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from os import listdir, cpu_count
+from os.path import dirname, abspath
+
+from jaclang import compileJaclang
+from jaclang.binary_writer.fake_keyboard import replayUpload
+from jaclang.binary_writer.upload_plan import UploadTiming, getWords
+from jaclang.generator import generate, LabelTable
+from jaclang.lexer import tokenize
+from jaclang.parser import parseTree, parse
+from jaclang.preprocessor import preprocess
+from jaclang_test.__main__ import readLinkedFiles
+from virtual_machine import VirtualMachine
+
+MIN_BENCHMARK_TIME = 0.5
+
+
+def loadTestPrograms() -> list[(str, list[int])]:
+    programs = []
+    tests_dir = dirname(__file__) + "/tests/"
+    for file in sorted(listdir(tests_dir)):
+        if file.endswith(".jl"):
+            with open(tests_dir + file, "r") as jl_file:
+                file_contents = jl_file.read()
+            # tests that are linked with other files can't be compiled on their own
+            if readLinkedFiles(file_contents):
+                continue
+            programs.append((file, compileJaclang(file_contents, [])))
+    return programs
+
+
+def generateFunction(i: int) -> str:
+    return f"""
+// generated function {i}
+func f{i}(a b) {{
+    var c = a + b - {i}
+    if c < 10
+        c = c + 1
+    while c > 100 {{
+        c = c - 3 /* keep it small */
+    }}
+    return c ^ (a & b) << 1
+}}
+"""
+
+
+def generateSource(size: int) -> str:
+    functions = []
+    source_size = 0
+    i = 0
+    while source_size < size:
+        function = generateFunction(i)
+        functions.append(function)
+        source_size += len(function)
+        i += 1
+    functions.append("\nfunc main() {\n    return f0(1 2)\n}\n")
+    return "".join(functions)
+
+
+def generateProgram(line_count: int) -> str:
+    functions = []
+    lines = 0
+    i = 0
+    while lines < line_count:
+        function = generateFunction(i)
+        functions.append(function)
+        lines += function.count("\n")
+        i += 1
+    # main calls every function, so the optimizer can't drop any of them
+    calls = " + ".join(f"f{j}(1 2)" for j in range(i))
+    functions.append(f"\nfunc main() {{\n    return {calls}\n}}\n")
+    return "".join(functions)
+
+
+def measureCyclesPerSecond(binary_code: list[int], translate_blocks: bool) -> (int, float):
+    # one instance is reused across runs like in long simulations, so translated blocks stay cached
+    virtual_machine = VirtualMachine(2**16, translate_blocks)
+    cycles = 0
+    begin = time.perf_counter()
+    elapsed = 0
+    while elapsed < MIN_BENCHMARK_TIME:
+        virtual_machine.reset()
+        virtual_machine.run(binary_code)
+        cycles += virtual_machine.getCycleCount()
+        elapsed = time.perf_counter() - begin
+    return cycles, elapsed
+
+
+def benchmarkVirtualMachine():
+    print(f"{'program':<28}{'cycles':>10}{'dispatch c/s':>16}{'translated c/s':>16}")
+    totals = {False: [0, 0], True: [0, 0]}
+    for file, binary_code in loadTestPrograms():
+        cycles_per_second = {}
+        for translate_blocks in totals.keys():
+            cycles, elapsed = measureCyclesPerSecond(binary_code, translate_blocks)
+            totals[translate_blocks][0] += cycles
+            totals[translate_blocks][1] += elapsed
+            cycles_per_second[translate_blocks] = cycles / elapsed
+
+        virtual_machine = VirtualMachine(2**16)
+        virtual_machine.run(binary_code)
+        print(f"{file:<28}{virtual_machine.getCycleCount():>10}"
+              f"{cycles_per_second[False]:>16.0f}{cycles_per_second[True]:>16.0f}")
+    print(f"{'total':<28}{'':>10}{totals[False][0] / totals[False][1]:>16.0f}"
+          f"{totals[True][0] / totals[True][1]:>16.0f}")
+
+
+def benchmarkPreprocessor():
+    print(f"{'source size':>12}{'time':>10}{'MB/s':>10}")
+    for size in (1_000_000, 2_000_000, 4_000_000):
+        source = generateSource(size)
+        begin = time.perf_counter()
+        preprocess(source)
+        elapsed = time.perf_counter() - begin
+        print(f"{len(source):>12}{elapsed:>9.3f}s{len(source) / elapsed / 1e6:>10.2f}")
+
+
+def benchmarkLexer():
+    print(f"{'source size':>12}{'tokens':>10}{'time':>10}{'MB/s':>10}{'tokens/s':>12}")
+    for size in (1_000_000, 2_000_000, 4_000_000):
+        code = preprocess(generateSource(size))
+        begin = time.perf_counter()
+        tokens = tokenize(code)
+        elapsed = time.perf_counter() - begin
+        print(f"{len(code):>12}{len(tokens):>10}{elapsed:>9.3f}s{len(code) / elapsed / 1e6:>10.2f}"
+              f"{len(tokens) / elapsed:>12.0f}")
+
+
+def benchmarkParser():
+    print(f"{'tokens':>10}{'time':>10}{'tokens/s':>12}{'ns/token':>10}")
+    for size in (250_000, 500_000, 1_000_000, 2_000_000):
+        tokens = tokenize(preprocess(generateSource(size)))
+        begin = time.perf_counter()
+        parseTree(tokens)
+        elapsed = time.perf_counter() - begin
+        print(f"{len(tokens):>10}{elapsed:>9.3f}s{len(tokens) / elapsed:>12.0f}{elapsed / len(tokens) * 1e9:>10.0f}")
+
+
+def benchmarkCompiler():
+    stages = ["preprocess", "tokenize", "parse", "optimize", "generate"]
+    print(f"{'lines':>8}{'level':>7}" + "".join(f"{stage:>11}" for stage in stages) + f"{'total':>10}{'lines/s':>10}")
+    for line_count in (25_000, 50_000, 100_000):
+        source = generateProgram(line_count)
+        for level in ("-O0", "-O2"):
+            stage_times = {}
+            begin = time.perf_counter()
+            compileJaclang(source, [level], stage_times)
+            elapsed = time.perf_counter() - begin
+            print(f"{line_count:>8}{level:>7}" + "".join(f"{stage_times[stage]:>10.3f}s" for stage in stages) +
+                  f"{elapsed:>9.3f}s{line_count / elapsed:>10.0f}")
+
+
+def benchmarkAssembler():
+    print(f"{'lines':>8}{'instructions':>14}{'labels':>9}{'time':>10}{'ns/instr':>10}{'peak memory':>13}")
+    for line_count in (25_000, 50_000, 100_000):
+        labels = LabelTable()
+        instructions = parse(tokenize(preprocess(generateProgram(line_count))), labels)
+        tracemalloc.start()
+        begin = time.perf_counter()
+        generate(instructions, labels)
+        elapsed = time.perf_counter() - begin
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{line_count:>8}{len(instructions):>14}{labels.getCount():>9}{elapsed:>9.3f}s"
+              f"{elapsed / len(instructions) * 1e9:>10.0f}{peak_memory / 1e6:>11.2f}MB")
+
+
+def benchmarkCache():
+    stages = ["preprocess", "tokenize", "parse", "optimize", "generate"]
+    print(f"{'lines':>8}{'level':>7}{'compile':>9}" + "".join(f"{stage:>11}" for stage in stages) + f"{'total':>10}")
+    for line_count in (25_000, 50_000):
+        source = generateProgram(line_count)
+        # one small edit to a single function, everything else can be reused
+        edited_source = source.replace("var c = a + b - 7\n", "var c = a + b - 8\n", 1)
+        for level in ("-O0", "-O2"):
+            with tempfile.TemporaryDirectory() as cache_directory:
+                for name, compiled_source in (("cold", source), ("warm", source), ("edit", edited_source)):
+                    stage_times = {}
+                    begin = time.perf_counter()
+                    compileJaclang(compiled_source, [level, f"cache={cache_directory}"], stage_times)
+                    elapsed = time.perf_counter() - begin
+                    print(f"{line_count:>8}{level:>7}{name:>9}" +
+                          "".join(f"{stage_times[stage]:>10.3f}s" for stage in stages) + f"{elapsed:>9.3f}s")
+
+
+def benchmarkParallel():
+    # the parse stage includes code generation and the optimization of each function, which is what runs in parallel
+    worker_counts = sorted({1, 2, 4, cpu_count() or 1})
+    print(f"{'lines':>8}{'level':>7}" + "".join(f"{f'jobs={count}':>11}" for count in worker_counts))
+    for line_count in (25_000, 50_000, 100_000):
+        source = generateProgram(line_count)
+        for level in ("-O0", "-O2"):
+            parse_times = []
+            for count in worker_counts:
+                stage_times = {}
+                compileJaclang(source, [level, f"jobs={count}"], stage_times)
+                parse_times.append(stage_times["parse"])
+            print(f"{line_count:>8}{level:>7}" + "".join(f"{parse_time:>10.3f}s" for parse_time in parse_times))
+
+
+def benchmarkServer():
+    # every test program compiled by its own process, like a build that runs the compiler once per file, against one
+    # server that gets all of them on stdin
+    tests_dir = dirname(abspath(__file__)) + "/tests/"
+    root_dir = dirname(dirname(abspath(__file__)))
+    files = [tests_dir + file for file in sorted(listdir(tests_dir)) if file.endswith(".jl")]
+
+    begin = time.perf_counter()
+    for file in files:
+        subprocess.run([sys.executable, "-m", "jaclang", file], cwd=root_dir, stdout=subprocess.DEVNULL)
+    process_time = time.perf_counter() - begin
+
+    requests = []
+    for file in files:
+        with open(file, "r") as jl_file:
+            requests.append(json.dumps({"id": file, "source": jl_file.read()}) + "\n")
+    begin = time.perf_counter()
+    result = subprocess.run([sys.executable, "-m", "jaclang", "server"], cwd=root_dir, input="".join(requests),
+                            capture_output=True, text=True)
+    server_time = time.perf_counter() - begin
+    compile_time = sum(json.loads(line)["time"] for line in result.stdout.splitlines())
+
+    print(f"{'programs':>9}{'processes':>11}{'server':>10}{'compiling':>11}{'ms/program':>12}{'server ms':>11}")
+    print(f"{len(files):>9}{process_time:>10.3f}s{server_time:>9.3f}s{compile_time:>10.3f}s"
+          f"{process_time / len(files) * 1000:>12.1f}{server_time / len(files) * 1000:>11.1f}")
+
+
+def benchmarkUpload():
+    # the old writer pressed every set bit of every word and waited for the bits, the clock and its release
+    timing = UploadTiming()
+    print(f"{'program':<28}{'words':>7}{'old keys':>10}{'keys':>7}{'old time':>10}{'time':>9}")
+    totals = [0, 0, 0, 0.0, 0.0]
+    for file, binary_code in loadTestPrograms():
+        old_keyboard = replayUpload(binary_code, timing, True)
+        keyboard = replayUpload(binary_code, timing)
+        values = [len(getWords(binary_code)), old_keyboard.key_presses, keyboard.key_presses, old_keyboard.time,
+                  keyboard.time]
+        totals = [total + value for total, value in zip(totals, values)]
+        print(f"{file:<28}{values[0]:>7}{values[1]:>10}{values[2]:>7}{values[3]:>9.1f}s{values[4]:>8.1f}s")
+    print(f"{'total':<28}{totals[0]:>7}{totals[1]:>10}{totals[2]:>7}{totals[3]:>9.1f}s{totals[4]:>8.1f}s")
+
+
+BENCHMARKS = {
+    "vm": benchmarkVirtualMachine,
+    "preprocess": benchmarkPreprocessor,
+    "lexer": benchmarkLexer,
+    "parser": benchmarkParser,
+    "compiler": benchmarkCompiler,
+    "assembler": benchmarkAssembler,
+    "cache": benchmarkCache,
+    "parallel": benchmarkParallel,
+    "server": benchmarkServer,
+    "upload": benchmarkUpload,
+}
+
+
+def main():
+    names = sys.argv[1:] if len(sys.argv) > 1 else list(BENCHMARKS.keys())
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}', available: {', '.join(BENCHMARKS.keys())}")
+            exit(1)
+        print(f"Benchmark: {name}")
+        print("---------------------------------")
+        BENCHMARKS[name]()
+        print("---------------------------------")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+/// expect 12
+
+/* comment test
+   /* nested comments are skipped as a whole */
+   return 1 // not a line comment inside a block comment
+*/
+
+func main() {
+    var a = 5 /* inline */ + 3 // return 0
+    /*/* var a = 0 */*/
+    return a + /* 2 + */ 4
+}
@@ -0,0 +1,8 @@
+/// expect 800
+
+// long expression test, deeper than the recursion limit
+
+func main() {
+    var a = 2
+    return a + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 + 1 - a + 2 - 2
+}
@@ -0,0 +1,15 @@
+/// expect 100
+
+// register allocation test, balanced trees need more registers than there are and calls force spills
+
+func three() {
+    return 3
+}
+
+func main() {
+    var a = 1
+    var b = 2
+    var c = (((((a + b) + (a + b)) + ((a + b) + (a + b))) + (((a + b) + (a + b)) + ((a + b) + (a + b)))) + ((((a + b) + (a + b)) + ((a + b) + (a + b))) + (((a + b) + (a + b)) + ((a + b) + (a + b))))) + (((((a + b) + (a + b)) + ((a + b) + (a + b))) + (((a + b) + (a + b)) + ((a + b) + (a + b)))) + ((((a + b) + (a + b)) + ((a + b) + (a + b))) + (((a + b) + (a + b)) + ((a + b) + (a + b)))))
+    var d = a - (b - (a - (b - (three() - (a + (b + three()))))))
+    return c + d + (three() + (a + (three() + b)))
+}
@@ -0,0 +1,22 @@
+/// expect 22
+
+// constant folding test, constants are 16 bit words and constant conditions drop or keep whole branches
+
+func main() {
+    var a = 2 + 3 << 1
+    if 1 == 2
+        a = 0
+    if 3 > 2 {
+        a = a + 1
+    }
+    while 0 {
+        a = 0
+    }
+    var b = 0 - 1 + 2
+    var c = 1 !& 1
+    while 1 {
+        a = a + 1
+        if a == 20
+            return a + b + (c == 65534)
+    }
+}
@@ -0,0 +1,40 @@
+/// expect 1365
+func bit(taken n) {
+    if taken
+        return 1 << n
+    return 0
+}
+
+func main() {
+    var a = 3
+    var b = 5
+    var result = 0
+    if a == b
+        result = result + 1
+    if a != b
+        result = result + bit(1 0)
+    if a < b
+        result = result + bit(1 2)
+    if b < a
+        result = result + 2
+    if a > b
+        result = result + 8
+    if a <= a
+        result = result + bit(1 4)
+    if b <= a
+        result = result + 32
+    if b >= a
+        result = result + bit(1 6)
+    if a >= b
+        result = result + 128
+
+    var i = 0
+    while i <= 2
+        i = i + 1
+    if i == 3
+        result = result + bit(1 8)
+    while i != 0
+        i = i - 1
+    result = result + bit(i == 0 10)
+    return result
+}
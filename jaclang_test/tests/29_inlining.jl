@@ -0,0 +1,36 @@
+/// expect 262
+var calls
+
+func max(a b) {
+    calls = calls + 1
+    if a > b
+        return a
+    return b
+}
+
+func sum(n) {
+    var total = 0
+    while n != 0 {
+        total = total + n
+        n = n - 1
+    }
+    return total
+}
+
+func clamp(x low high) {
+    return max(low x) - max(x high) + high
+}
+
+func main() {
+    var x = 7
+    var n = 3
+    var result = max(x 10) + max(20 x)
+    result = result + sum(n) + n
+    result = result + clamp(50 5 40) + clamp(1 5 40)
+    var i = 0
+    while i < 4 {
+        result = result + max(i 2) - 2 + sum(i)
+        i = i + 1
+    }
+    return result + (calls << 4) + x
+}
@@ -0,0 +1,18 @@
+/// expect 1043
+// recurses 10000 times, which only fits into memory when the frame is reused
+
+func countDown(n acc) {
+    if n == 0
+        return acc
+    return countDown(n - 1 acc + n)
+}
+
+func addBits(x steps unused) {
+    if steps == 0
+        return x
+    return countDown(steps x & 7)
+}
+
+func main() {
+    return countDown(10000 0) + addBits(5 3 0)
+}
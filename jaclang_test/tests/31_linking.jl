@@ -0,0 +1,18 @@
+/// expect 111
+/// link lib/runtime.jl
+
+extern func multiply(a b)
+extern func square(a)
+extern func applyTwice(a)
+extern var runtime_calls
+
+var base
+
+func offset(a) {
+    return a + 1
+}
+
+func main() {
+    base = 3
+    return square(base + 7) + multiply(2 base) - runtime_calls + applyTwice(5)
+}
@@ -0,0 +1,9 @@
+/// expect 184
+/// link lib/next_function.jl
+
+extern func callNext(a)
+extern func storeNext(a)
+
+func main() {
+    return callNext(41) + storeNext(40)
+}
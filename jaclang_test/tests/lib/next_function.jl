@@ -0,0 +1,21 @@
+/// functions calling the function defined right after them, compiled on its own and linked into the tests that list it
+
+extern func addOne(a)
+extern func addTwo(a)
+
+func callNext(a) {
+    return addOne(a)
+}
+
+func addOne(a) {
+    return a + 1
+}
+
+func storeNext(a) {
+    var result = addTwo(a)
+    return result + 100
+}
+
+func addTwo(a) {
+    return a + 2
+}
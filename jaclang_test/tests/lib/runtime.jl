@@ -0,0 +1,27 @@
+/// shared runtime, compiled on its own and linked into the tests that list it
+
+extern func offset(a)
+
+var runtime_calls
+
+func multiply(a b) {
+    runtime_calls = runtime_calls + 1
+    var result = 0
+    while b != 0 {
+        result = result + a
+        b = b - 1
+    }
+    return result
+}
+
+func square(a) {
+    return multiply(a a)
+}
+
+func applyTwice(a) {
+    return offset(offset(a))
+}
+
+func unused(a) {
+    return a + 1000
+}
@@ -1,24 +1,73 @@
+import sys
+
+# registers are 16 bits wide like on the cpu, so results that can leave that range are masked
+BINARY_OPERATIONS = {
+    0b00001: "(r{a} + r{b}) & 0xFFFF",
+    0b00010: "(r{b} - r{a}) & 0xFFFF",
+    0b00011: "(r{a} << r{b}) & 0xFFFF",
+    0b00100: "r{a} >> r{b}",
+    0b00101: "r{a} | r{b}",
+    0b00110: "r{a} ^ r{b}",
+    0b00111: "r{a} & r{b}",
+    0b01000: "~r{a} & 0xFFFF",
+    0b01001: "~(r{a} ^ r{b}) & 0xFFFF",
+    0b01010: "~(r{a} & r{b}) & 0xFFFF",
+}
+
+
 class VirtualMachine:
-    def __init__(self, memory_size: int):
-        self.memory = [0] * memory_size
+    def __init__(self, memory_size: int, translate_blocks: bool = False):
+        if sys.byteorder != "little":
+            raise Exception("VirtualMachine word access requires a little-endian host")
+
+        # memory is a byte array, aligned 16 bit words are accessed through a word view of the same buffer
+        self.memory = bytearray(memory_size)
+        self.words = memoryview(self.memory).cast("H")
+        self.zeroes = memoryview(bytes(memory_size))
+        # everything below dirty_end may have been written since the last reset
+        self.dirty_end = 0
+
         self.registers = [0] * 8
         self.stack_pointer = 0
         self.program_counter = 0
         self.cycle_count = 0
         self.max_stack = 0
 
+        # basic block translation cache: entry pc -> generated function running the block until its jump
+        self.translate_blocks = translate_blocks
+        self.block_cache = {}
+        self.translated = bytearray(memory_size) if translate_blocks else None
+        self.loaded_program = b""
+        self.code_modified = False
+
     def getMemorySize(self):
         return len(self.memory)
 
+    def readWord(self, address: int) -> int:
+        if address & 1:
+            return self.memory[address] + (self.memory[address + 1] << 8)
+        return self.words[address >> 1]
+
+    def writeWord(self, address: int, value: int):
+        if address & 1:
+            self.memory[address] = value & 0xFF
+            self.memory[address + 1] = (value >> 8) & 0xFF
+        else:
+            self.words[address >> 1] = value & 0xFFFF
+
+    def markDirty(self, address: int):
+        if address < 0:
+            address += len(self.memory)
+        self.dirty_end = max(self.dirty_end, address + 2)
+
     def pushToStack(self, value: int):
-        self.memory[self.stack_pointer] = value & 0xFF
-        self.memory[self.stack_pointer + 1] = (value >> 8) & 0xFF
+        self.writeWord(self.stack_pointer, value)
         self.stack_pointer += 2
         self.max_stack = max(self.stack_pointer, self.max_stack)
 
     def popFromStack(self) -> int:
         self.stack_pointer -= 2
-        return self.memory[self.stack_pointer] + (self.memory[self.stack_pointer + 1] << 8)
+        return self.readWord(self.stack_pointer)
 
     def getReturnCode(self) -> int:
         return self.registers[0]
@@ -26,148 +75,373 @@ class VirtualMachine:
     def getCycleCount(self) -> int:
         return self.cycle_count
 
+    # zeroes only the memory written since the last reset, so one instance can run many programs cheaply
+    def reset(self):
+        dirty_end = min(max(self.dirty_end, self.max_stack), len(self.memory))
+        if self.translate_blocks and any(self.translated[len(self.loaded_program):dirty_end]):
+            self.invalidateBlocks()
+        self.memory[:dirty_end] = self.zeroes[:dirty_end]
+        self.dirty_end = 0
+
+        self.registers[:] = [0] * len(self.registers)
+        self.stack_pointer = 0
+        self.program_counter = 0
+        self.cycle_count = 0
+        self.max_stack = 0
+
+    def loadProgram(self, instructions: list[int]):
+        program = bytes(instructions)
+        if self.translate_blocks and (program != self.loaded_program or self.code_modified):
+            self.invalidateBlocks()
+            self.code_modified = False
+        self.loaded_program = program
+
+        self.memory[:len(program)] = program
+        self.dirty_end = max(self.dirty_end, len(program))
+        self.stack_pointer = len(program)
+
     def run(self, instructions: list[int]):
-        for i in range(len(instructions)):
-            self.memory[i] = instructions[i]
-        self.stack_pointer = len(instructions)
+        self.loadProgram(instructions)
 
         self.cycle_count = 0
         self.max_stack = 0
+
+        if self.translate_blocks:
+            self.runTranslated()
+        else:
+            self.runDispatch()
+        self.dirty_end = max(self.dirty_end, self.max_stack)
+
+    def runDispatch(self):
+        # each handler executes the instruction at pc and returns the address of the next one, or None to halt
+        handlers = self.createHandlers()
+        memory = self.memory
+        pc = self.program_counter
+        cycle_count = 0
         while True:
-            curr_opcode = self.memory[self.program_counter]
-            if curr_opcode == 0b00000:  # nop
+            next_pc = handlers[memory[pc]](pc)
+            if next_pc is None:
                 break
-            elif curr_opcode == 0b00001:  # add
-                reg_a = self.memory[self.program_counter + 1]
-                reg_b = self.memory[self.program_counter + 2]
-                reg_save = self.memory[self.program_counter + 3]
-                self.registers[reg_save] = self.registers[reg_a] + self.registers[reg_b]
-                self.program_counter += 4
-            elif curr_opcode == 0b00010:  # sub
-                reg_a = self.memory[self.program_counter + 1]
-                reg_b = self.memory[self.program_counter + 2]
-                reg_save = self.memory[self.program_counter + 3]
-                self.registers[reg_save] = self.registers[reg_b] - self.registers[reg_a]
-                self.program_counter += 4
-            elif curr_opcode == 0b00011:  # bsl
-                reg_a = self.memory[self.program_counter + 1]
-                reg_b = self.memory[self.program_counter + 2]
-                reg_save = self.memory[self.program_counter + 3]
-                self.registers[reg_save] = self.registers[reg_a] << self.registers[reg_b]
-                self.program_counter += 4
-            elif curr_opcode == 0b00100:  # bsr
-                reg_a = self.memory[self.program_counter + 1]
-                reg_b = self.memory[self.program_counter + 2]
-                reg_save = self.memory[self.program_counter + 3]
-                self.registers[reg_save] = self.registers[reg_a] >> self.registers[reg_b]
-                self.program_counter += 4
-            elif curr_opcode == 0b00101:  # or
-                reg_a = self.memory[self.program_counter + 1]
-                reg_b = self.memory[self.program_counter + 2]
-                reg_save = self.memory[self.program_counter + 3]
-                self.registers[reg_save] = self.registers[reg_a] | self.registers[reg_b]
-                self.program_counter += 4
-            elif curr_opcode == 0b00110:  # xor
-                reg_a = self.memory[self.program_counter + 1]
-                reg_b = self.memory[self.program_counter + 2]
-                reg_save = self.memory[self.program_counter + 3]
-                self.registers[reg_save] = self.registers[reg_a] ^ self.registers[reg_b]
-                self.program_counter += 4
-            elif curr_opcode == 0b00111:  # and
-                reg_a = self.memory[self.program_counter + 1]
-                reg_b = self.memory[self.program_counter + 2]
-                reg_save = self.memory[self.program_counter + 3]
-                self.registers[reg_save] = self.registers[reg_a] & self.registers[reg_b]
-                self.program_counter += 4
-            elif curr_opcode == 0b01000:  # not
-                reg_a = self.memory[self.program_counter + 1]
-                reg_save = self.memory[self.program_counter + 3]
-                self.registers[reg_save] = ~self.registers[reg_a]
-                self.program_counter += 4
-            elif curr_opcode == 0b01001:  # xnor
-                reg_a = self.memory[self.program_counter + 1]
-                reg_b = self.memory[self.program_counter + 2]
-                reg_save = self.memory[self.program_counter + 3]
-                self.registers[reg_save] = ~(self.registers[reg_a] ^ self.registers[reg_b])
-                self.program_counter += 4
-            elif curr_opcode == 0b01010:  # nand
-                reg_a = self.memory[self.program_counter + 1]
-                reg_b = self.memory[self.program_counter + 2]
-                reg_save = self.memory[self.program_counter + 3]
-                self.registers[reg_save] = ~(self.registers[reg_a] & self.registers[reg_b])
-                self.program_counter += 4
-            elif curr_opcode == 0b01011:  # memw
-                reg_addr = self.memory[self.program_counter + 1]
-                reg_value = self.memory[self.program_counter + 2]
-                offset = self.memory[self.program_counter + 3]
-                address = self.registers[reg_addr] + offset
-                if (offset >> 7) & 1 == 1:
-                    address -= 1 << 8
-                value = self.registers[reg_value]
-                self.memory[address] = value & 0xFF
-                self.memory[address + 1] = (value >> 8) & 0xFF
-                self.program_counter += 4
-            elif curr_opcode == 0b01100:  # memr
-                reg_addr = self.memory[self.program_counter + 1]
-                offset = self.memory[self.program_counter + 2]
-                reg_save = self.memory[self.program_counter + 3]
-                address = self.registers[reg_addr] + offset
-                if (offset >> 7) & 1 == 1:
-                    address -= 1 << 8
-                value = self.memory[address] + (self.memory[address + 1] << 8)
-                self.registers[reg_save] = value
-                self.program_counter += 4
-            elif curr_opcode == 0b01101:  # imm
-                reg = self.memory[self.program_counter + 1]
-                value = self.memory[self.program_counter + 2] + (self.memory[self.program_counter + 3] << 8)
-                self.registers[reg] = value
-                self.program_counter += 4
-            elif curr_opcode == 0b01110:  # mov
-                reg = self.memory[self.program_counter + 1]
-                reg_save = self.memory[self.program_counter + 3]
-                self.registers[reg_save] = self.registers[reg]
-                self.program_counter += 4
-            elif curr_opcode == 0b01111:  # cmp
-                reg1 = self.memory[self.program_counter + 1]
-                reg2 = self.memory[self.program_counter + 2]
-                flags = self.memory[self.program_counter + 3]
-                val1 = self.registers[reg1]
-                val2 = self.registers[reg2]
-                greater = (flags >> 0) % 2 == 1
-                lesser = (flags >> 1) % 2 == 1
-                equal = (flags >> 2) % 2 == 1
-                result = (val1 > val2 and greater) or (val1 < val2 and lesser) or (val1 == val2 and equal)
-                self.registers[0] = 1 if result else 0
-                self.program_counter += 4
-            elif curr_opcode == 0b10000:  # jmp
-                reg = self.memory[self.program_counter + 1]
-                cond = self.memory[self.program_counter + 2]
-                if cond == 1 or self.registers[0] == 1:
-                    self.program_counter = self.registers[reg]
+            pc = next_pc
+            cycle_count += 1
+
+        self.program_counter = pc
+        self.cycle_count = cycle_count
+
+    def runTranslated(self):
+        block_cache = self.block_cache
+        pc = self.program_counter
+        cycle_count = 0
+        while pc is not None:
+            try:
+                pc, cycles = block_cache[pc]()
+            except KeyError:
+                pc, cycles = self.translateBlock(pc)()
+            cycle_count += cycles
+
+        self.cycle_count = cycle_count
+
+    def invalidateBlocks(self):
+        self.block_cache.clear()
+        self.translated[:] = self.zeroes
+
+    # decodes instructions from pc up to and including the next jump (or halt) and compiles them into one python
+    # function, which returns the next pc (None on halt) and the number of executed cycles
+    def translateBlock(self, entry_pc: int):
+        memory = self.memory
+        decoded = []
+        pc = entry_pc
+        while True:
+            opcode = memory[pc]
+            decoded.append((pc, opcode, memory[pc + 1:pc + 4]))
+            if opcode not in BINARY_OPERATIONS and opcode not in (0b01011, 0b01100, 0b01101, 0b01110, 0b01111,
+                                                                  0b10011, 0b10100, 0b10101, 0b10110):
+                break
+            pc += 2 if opcode == 0b10101 else 4
+        block_end = pc + (2 if memory[pc] == 0b00000 else 4)
+
+        # registers the block touches live in python locals inside it and the modified ones are written back on
+        # every exit
+        used_registers = set()
+        written_registers = set()
+        for _, opcode, operands in decoded:
+            op1, op2, op3 = (list(operands) + [0, 0, 0])[:3]
+            if opcode in BINARY_OPERATIONS:
+                used_registers.update((op1, op2, op3))
+                written_registers.add(op3)
+            elif opcode in (0b01100, 0b01110):  # memr, mov
+                used_registers.update((op1, op3))
+                written_registers.add(op3)
+            elif opcode == 0b01011:  # memw
+                used_registers.update((op1, op2))
+            elif opcode == 0b01111:  # cmp
+                used_registers.update((op1, op2, 0))
+                written_registers.add(0)
+            elif opcode == 0b01101:  # imm
+                used_registers.add(op1)
+                written_registers.add(op1)
+            elif opcode in (0b10000, 0b10101):  # jmp, setsp
+                used_registers.update((op1, 0))
+            elif opcode == 0b10011:  # push
+                used_registers.add(op2)
+            elif opcode in (0b10100, 0b10110):  # pop, getsp
+                used_registers.add(op3)
+                written_registers.add(op3)
+        used_registers &= set(range(len(self.registers)))
+
+        uses_stack = any(opcode in (0b10011, 0b10100, 0b10101, 0b10110) for _, opcode, _ in decoded)
+        lines = ["def block(r=registers, m=memory, w=words, vm=vm, t=translated):"]
+        lines += [f"    r{register} = r[{register}]" for register in sorted(used_registers)]
+        if uses_stack:
+            lines.append("    sp = vm.stack_pointer")
+            lines.append("    ms = vm.max_stack")
+
+        def exitBlock(indent: str, next_pc: str, cycles: int):
+            lines.extend(f"{indent}r[{register}] = r{register}" for register in sorted(written_registers))
+            if uses_stack:
+                lines.append(f"{indent}vm.stack_pointer = sp")
+                lines.append(f"{indent}vm.max_stack = ms")
+            lines.append(f"{indent}return {next_pc}, {cycles}")
+
+        for cycles, (pc, opcode, operands) in enumerate(decoded):
+            op1, op2, op3 = (list(operands) + [0, 0, 0])[:3]
+            if opcode in BINARY_OPERATIONS:
+                lines.append(f"    r{op3} = " + BINARY_OPERATIONS[opcode].format(a=op1, b=op2))
+            elif opcode == 0b01011:  # memw
+                offset = op3 - (1 << 8) if (op3 >> 7) & 1 == 1 else op3
+                lines.append(f"    a = r{op1} + {offset}")
+                lines.append(f"    v = r{op2}")
+                lines.append("    if a & 1:")
+                lines.append("        m[a] = v & 0xFF")
+                lines.append("        m[a + 1] = (v >> 8) & 0xFF")
+                lines.append("    else:")
+                lines.append("        w[a >> 1] = v & 0xFFFF")
+                lines.append("    if a >= vm.dirty_end or a < 0:")
+                lines.append("        vm.markDirty(a)")
+                lines.append("    if t[a] or t[a + 1]:")
+                lines.append("        vm.invalidateBlocks()")
+                lines.append("        vm.code_modified = True")
+                exitBlock("        ", str(pc + 4), cycles + 1)
+            elif opcode == 0b01100:  # memr
+                offset = op2 - (1 << 8) if (op2 >> 7) & 1 == 1 else op2
+                lines.append(f"    a = r{op1} + {offset}")
+                lines.append(f"    r{op3} = m[a] + (m[a + 1] << 8) if a & 1 else w[a >> 1]")
+            elif opcode == 0b01101:  # imm
+                lines.append(f"    r{op1} = {op2 + (op3 << 8)}")
+            elif opcode == 0b01110:  # mov
+                lines.append(f"    r{op3} = r{op1}")
+            elif opcode == 0b01111:  # cmp
+                conditions = []
+                if (op3 >> 0) % 2 == 1:
+                    conditions.append(f"r{op1} > r{op2}")
+                if (op3 >> 1) % 2 == 1:
+                    conditions.append(f"r{op1} < r{op2}")
+                if (op3 >> 2) % 2 == 1:
+                    conditions.append(f"r{op1} == r{op2}")
+                if conditions:
+                    lines.append(f"    r0 = 1 if {' or '.join(conditions)} else 0")
                 else:
-                    self.program_counter += 4
-            # elif curr_opcode == 0b10001:  # gpudraw
-            #     self.program_counter += 2
-            # elif curr_opcode == 0b10010:  # gpudisplay
-            #     self.program_counter += 2
-            elif curr_opcode == 0b10011:  # push
-                reg = self.memory[self.program_counter + 2]
-                self.pushToStack(self.registers[reg])
-                self.program_counter += 4
-            elif curr_opcode == 0b10100:  # pop
-                reg = self.memory[self.program_counter + 3]
-                self.registers[reg] = self.popFromStack()
-                self.program_counter += 4
-            elif curr_opcode == 0b10101:  # setsp
-                reg = self.memory[self.program_counter + 1]
-                self.stack_pointer = self.registers[reg]
-                self.program_counter += 2
-            elif curr_opcode == 0b10110:  # getsp
-                reg = self.memory[self.program_counter + 3]
-                self.registers[reg] = self.stack_pointer
-                self.program_counter += 4
+                    lines.append("    r0 = 0")
+            elif opcode == 0b10000:  # jmp
+                if op2 == 1:
+                    exitBlock("    ", f"r{op1}", cycles + 1)
+                else:
+                    lines.append("    if r0 == 1:")
+                    exitBlock("        ", f"r{op1}", cycles + 1)
+                    exitBlock("    ", str(pc + 4), cycles + 1)
+            elif opcode == 0b10011:  # push
+                lines.append(f"    v = r{op2}")
+                lines.append("    if sp & 1:")
+                lines.append("        m[sp] = v & 0xFF")
+                lines.append("        m[sp + 1] = (v >> 8) & 0xFF")
+                lines.append("    else:")
+                lines.append("        w[sp >> 1] = v & 0xFFFF")
+                lines.append("    sp += 2")
+                lines.append("    if sp > ms:")
+                lines.append("        ms = sp")
+            elif opcode == 0b10100:  # pop
+                lines.append("    sp -= 2")
+                lines.append(f"    r{op3} = m[sp] + (m[sp + 1] << 8) if sp & 1 else w[sp >> 1]")
+            elif opcode == 0b10101:  # setsp
+                lines.append(f"    sp = r{op1}")
+                lines.append("    if sp < 0:")
+                lines.append("        vm.markDirty(sp)")
+            elif opcode == 0b10110:  # getsp
+                lines.append(f"    r{op3} = sp")
+            else:
+                if opcode != 0b00000:
+                    lines.append(f"    print('Unknown opcode: {opcode} {opcode:b}')")
+                lines.append(f"    vm.program_counter = {pc}")
+                exitBlock("    ", "None", cycles)
+
+        namespace = {"registers": self.registers, "memory": memory, "words": self.words, "vm": self,
+                     "translated": self.translated}
+        exec(compile("\n".join(lines), f"<block {entry_pc}>", "exec"), namespace)
+        block = namespace["block"]
+
+        self.block_cache[entry_pc] = block
+        self.translated[entry_pc:block_end] = b"\x01" * (block_end - entry_pc)
+        return block
+
+    # handlers are closures over memory and registers, so decoding an instruction is a single table lookup
+    def createHandlers(self) -> list:
+        vm = self
+        memory = self.memory
+        words = self.words
+        registers = self.registers
+
+        def nop(_: int):
+            return None
+
+        def unknownOpcode(pc: int):
+            curr_opcode = memory[pc]
+            print(f"Unknown opcode: {curr_opcode} {curr_opcode:b}")
+            return None
+
+        def add(pc: int):
+            registers[memory[pc + 3]] = (registers[memory[pc + 1]] + registers[memory[pc + 2]]) & 0xFFFF
+            return pc + 4
+
+        def sub(pc: int):
+            registers[memory[pc + 3]] = (registers[memory[pc + 2]] - registers[memory[pc + 1]]) & 0xFFFF
+            return pc + 4
+
+        def bsl(pc: int):
+            registers[memory[pc + 3]] = (registers[memory[pc + 1]] << registers[memory[pc + 2]]) & 0xFFFF
+            return pc + 4
+
+        def bsr(pc: int):
+            registers[memory[pc + 3]] = registers[memory[pc + 1]] >> registers[memory[pc + 2]]
+            return pc + 4
+
+        def bitwiseOr(pc: int):
+            registers[memory[pc + 3]] = registers[memory[pc + 1]] | registers[memory[pc + 2]]
+            return pc + 4
+
+        def bitwiseXor(pc: int):
+            registers[memory[pc + 3]] = registers[memory[pc + 1]] ^ registers[memory[pc + 2]]
+            return pc + 4
+
+        def bitwiseAnd(pc: int):
+            registers[memory[pc + 3]] = registers[memory[pc + 1]] & registers[memory[pc + 2]]
+            return pc + 4
+
+        def bitwiseNot(pc: int):
+            registers[memory[pc + 3]] = ~registers[memory[pc + 1]] & 0xFFFF
+            return pc + 4
+
+        def xnor(pc: int):
+            registers[memory[pc + 3]] = ~(registers[memory[pc + 1]] ^ registers[memory[pc + 2]]) & 0xFFFF
+            return pc + 4
+
+        def nand(pc: int):
+            registers[memory[pc + 3]] = ~(registers[memory[pc + 1]] & registers[memory[pc + 2]]) & 0xFFFF
+            return pc + 4
+
+        def memw(pc: int):
+            offset = memory[pc + 3]
+            address = registers[memory[pc + 1]] + offset
+            if (offset >> 7) & 1 == 1:
+                address -= 1 << 8
+            value = registers[memory[pc + 2]]
+            if address & 1:
+                memory[address] = value & 0xFF
+                memory[address + 1] = (value >> 8) & 0xFF
+            else:
+                words[address >> 1] = value & 0xFFFF
+            if address >= vm.dirty_end or address < 0:
+                vm.markDirty(address)
+            return pc + 4
+
+        def memr(pc: int):
+            offset = memory[pc + 2]
+            address = registers[memory[pc + 1]] + offset
+            if (offset >> 7) & 1 == 1:
+                address -= 1 << 8
+            if address & 1:
+                registers[memory[pc + 3]] = memory[address] + (memory[address + 1] << 8)
             else:
-                print(f"Unknown opcode: {curr_opcode} {curr_opcode:b}")
-                return
+                registers[memory[pc + 3]] = words[address >> 1]
+            return pc + 4
+
+        def imm(pc: int):
+            registers[memory[pc + 1]] = memory[pc + 2] + (memory[pc + 3] << 8)
+            return pc + 4
+
+        def mov(pc: int):
+            registers[memory[pc + 3]] = registers[memory[pc + 1]]
+            return pc + 4
+
+        def cmp(pc: int):
+            flags = memory[pc + 3]
+            val1 = registers[memory[pc + 1]]
+            val2 = registers[memory[pc + 2]]
+            greater = (flags >> 0) % 2 == 1
+            lesser = (flags >> 1) % 2 == 1
+            equal = (flags >> 2) % 2 == 1
+            result = (val1 > val2 and greater) or (val1 < val2 and lesser) or (val1 == val2 and equal)
+            registers[0] = 1 if result else 0
+            return pc + 4
+
+        def jmp(pc: int):
+            if memory[pc + 2] == 1 or registers[0] == 1:
+                return registers[memory[pc + 1]]
+            return pc + 4
+
+        def push(pc: int):
+            value = registers[memory[pc + 2]]
+            stack_pointer = vm.stack_pointer
+            if stack_pointer & 1:
+                memory[stack_pointer] = value & 0xFF
+                memory[stack_pointer + 1] = (value >> 8) & 0xFF
+            else:
+                words[stack_pointer >> 1] = value & 0xFFFF
+            stack_pointer += 2
+            vm.stack_pointer = stack_pointer
+            if stack_pointer > vm.max_stack:
+                vm.max_stack = stack_pointer
+            return pc + 4
+
+        def pop(pc: int):
+            stack_pointer = vm.stack_pointer - 2
+            vm.stack_pointer = stack_pointer
+            if stack_pointer & 1:
+                registers[memory[pc + 3]] = memory[stack_pointer] + (memory[stack_pointer + 1] << 8)
+            else:
+                registers[memory[pc + 3]] = words[stack_pointer >> 1]
+            return pc + 4
+
+        def setsp(pc: int):
+            vm.stack_pointer = registers[memory[pc + 1]]
+            if vm.stack_pointer < 0:
+                vm.markDirty(vm.stack_pointer)
+            return pc + 2
+
+        def getsp(pc: int):
+            registers[memory[pc + 3]] = vm.stack_pointer
+            return pc + 4
 
-            self.cycle_count += 1
+        handlers = [unknownOpcode] * 256
+        handlers[0b00000] = nop
+        handlers[0b00001] = add
+        handlers[0b00010] = sub
+        handlers[0b00011] = bsl
+        handlers[0b00100] = bsr
+        handlers[0b00101] = bitwiseOr
+        handlers[0b00110] = bitwiseXor
+        handlers[0b00111] = bitwiseAnd
+        handlers[0b01000] = bitwiseNot
+        handlers[0b01001] = xnor
+        handlers[0b01010] = nand
+        handlers[0b01011] = memw
+        handlers[0b01100] = memr
+        handlers[0b01101] = imm
+        handlers[0b01110] = mov
+        handlers[0b01111] = cmp
+        handlers[0b10000] = jmp
+        # 0b10001 gpudraw and 0b10010 gpudisplay are not emulated
+        handlers[0b10011] = push
+        handlers[0b10100] = pop
+        handlers[0b10101] = setsp
+        handlers[0b10110] = getsp
+        return handlers